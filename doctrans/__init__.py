@@ -6,17 +6,77 @@ Root __init__
 
 import logging
 from logging.config import dictConfig as _dictConfig
-from os import path
-
-import yaml
+from os import environ, path
 
 __author__ = "Samuel Marks"
 __version__ = "0.0.62"
 
+# Environment variable naming a YAML or JSON logging config file, overriding `DEFAULT_LOGGING_CONFIG`
+LOGGING_CONFIG_ENV = "DOCTRANS_LOGGING_CONFIG"
+
+# Same as _data/logging.yml, built-in so that YAML needn't be loaded at startup
+DEFAULT_LOGGING_CONFIG = {
+    "version": 1,
+    "formatters": {
+        "simple": {
+            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            "datefmt": "%Y-%m-%d %H:%M:%S",
+        }
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "level": "DEBUG",
+            "formatter": "simple",
+            "stream": "ext://sys.stdout",
+        }
+    },
+    "loggers": {
+        "simpleExample": {"level": "DEBUG", "handlers": ["console"], "propagate": False}
+    },
+    "root": {"level": "DEBUG", "handlers": ["console"]},
+}
+
+_logging_configured = False
+
+
+def load_logging_config():
+    """
+    Load the logging config from the file named by the `DOCTRANS_LOGGING_CONFIG` environment variable,
+     falling back to `DEFAULT_LOGGING_CONFIG`
+
+    :returns: Config for `logging.config.dictConfig`
+    :rtype: ```dict```
+    """
+    filename = environ.get(LOGGING_CONFIG_ENV)
+    if not filename:
+        return DEFAULT_LOGGING_CONFIG
+    with open(path.realpath(path.expanduser(filename)), "rt") as f:
+        if filename.endswith(".json"):
+            from json import load
+
+            return load(f)
+
+        import yaml
+
+        return yaml.load(f, Loader=yaml.SafeLoader)
+
+
+def configure_logging(config=None):
+    """
+    Configure logging. Called once by `get_logger`; call it directly to override the config.
+
+    :param config: Config for `logging.config.dictConfig`. If None uses `load_logging_config()`.
+    :type config: ```Optional[dict]```
+    """
+    global _logging_configured
+    _dictConfig(load_logging_config() if config is None else config)
+    _logging_configured = True
+
 
 def get_logger(name=None):
     """
-    Create a logger instance with the provided name, and default YAML config from this package
+    Create a logger instance with the provided name, configuring logging on first use
 
     :param name: Name of logger instance. Usually the module name with filename dot-appended. None gives root logger.
     :type name: Optional[str]
@@ -24,13 +84,20 @@ def get_logger(name=None):
     :returns: logger instance
     :rtype: ```logging.Logger```
     """
-    with open(path.join(path.dirname(__file__), "_data", "logging.yml"), "rt") as f:
-        data = yaml.load(f, Loader=yaml.SafeLoader)
-    _dictConfig(data)
+    if not _logging_configured:
+        configure_logging()
     return logging.getLogger(name=name)
 
 
 root_logger = get_logger()
 logging.getLogger("blib2to3").setLevel(logging.WARNING)
 
-__all__ = ["get_logger", "root_logger", "__version__"]
+__all__ = [
+    "DEFAULT_LOGGING_CONFIG",
+    "LOGGING_CONFIG_ENV",
+    "configure_logging",
+    "get_logger",
+    "load_logging_config",
+    "root_logger",
+    "__version__",
+]
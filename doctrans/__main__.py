@@ -3,15 +3,19 @@
 """
 `__main__` implementation, can be run directly or with `python -m doctrans`
 """
+import sys
 from argparse import ArgumentParser, Namespace
 from codecs import decode
 from os import path
 
 from doctrans import __version__
-from doctrans.conformance import ground_truth
+from doctrans.conformance import ground_truth, ground_truth_manifest, watch
 from doctrans.gen import gen
 from doctrans.pure_utils import pluralise
-from doctrans.sync_properties import sync_properties
+from doctrans.sync_properties import sync_properties_effect, sync_properties_manifest
+
+# `sync` arguments which are not wrapped in a list
+_sync_scalar_args = frozenset(("truth", "cache_dir", "jobs", "watch", "check", "diff"))
 
 
 def _build_parser():
@@ -94,6 +98,15 @@ def _build_parser():
             " str]]`"
         ),
     )
+    property_parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory to record emitted file hashes in, so that no-op syncs skip"
+            " formatting and writing."
+        ),
+        type=str,
+    )
+    _add_dry_run_arguments(property_parser)
 
     ########
     # Sync #
@@ -157,6 +170,90 @@ def _build_parser():
         type=str,
         required=True,
     )
+    sync_parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory to cache parsed truths and emitted file hashes in, so that"
+            " unchanged sources skip parsing and no-op emits skip formatting."
+        ),
+        type=str,
+    )
+    sync_parser.add_argument(
+        "--jobs",
+        "-j",
+        help="Number of processes to conform files with.",
+        type=int,
+        default=1,
+    )
+    sync_parser.add_argument(
+        "--watch",
+        help=(
+            "Keep running, conforming again the files affected by each change to the"
+            " truth or to the files."
+        ),
+        action="store_true",
+    )
+    _add_dry_run_arguments(sync_parser)
+
+    #################
+    # Sync manifest #
+    #################
+    manifest_parser = subparsers.add_parser(
+        "sync_manifest",
+        help=(
+            "Force many groups of argparse, classes, and/or methods to be equivalent,"
+            " in one process"
+        ),
+    )
+    manifest_parser.add_argument(
+        "--manifest",
+        help=(
+            'JSON (or YAML) file of the form `{"groups": [...]}`, each group having'
+            " the same keys as the `sync` arguments, e.g., `classes`, `class_names`,"
+            " `truth`. Each file is parsed and written once."
+        ),
+        type=str,
+        required=True,
+    )
+    manifest_parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory to cache parsed truths and emitted file hashes in, so that"
+            " unchanged sources skip parsing and no-op emits skip formatting."
+        ),
+        type=str,
+    )
+
+    ############################
+    # Sync properties manifest #
+    ############################
+    properties_manifest_parser = subparsers.add_parser(
+        "sync_properties_manifest",
+        help=(
+            "Synchronise many properties between input and output Python files, in one"
+            " process"
+        ),
+    )
+    properties_manifest_parser.add_argument(
+        "--manifest",
+        help=(
+            'JSON (or YAML) file of the form `{"groups": [...]}`, each group having'
+            " the same keys as the `sync_properties` arguments, e.g.,"
+            " `input_filename`, `input_params`, `output_filename`, `output_params`."
+            " Each file is parsed once, and each output file written once."
+        ),
+        type=str,
+        required=True,
+    )
+    properties_manifest_parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory to record emitted file hashes in, so that no-op syncs skip"
+            " formatting and writing."
+        ),
+        type=str,
+    )
+    _add_dry_run_arguments(properties_manifest_parser)
 
     #######
     # Gen #
@@ -174,7 +271,10 @@ def _build_parser():
     )
     gen_parser.add_argument(
         "--input-mapping",
-        help="Import location of dictionary/mapping/2-tuple collection.",
+        help=(
+            "Import location of dictionary/mapping/2-tuple collection; or of a module,"
+            " to generate from its public classes and functions."
+        ),
         required=True,
     )
     gen_parser.add_argument(
@@ -214,86 +314,291 @@ def _build_parser():
         type=str,
         dest="decorator_list",
     )
+    gen_parser.add_argument(
+        "--jobs",
+        "-j",
+        help=(
+            "Number of processes to generate with, streaming each result to the"
+            " output file in order."
+        ),
+        type=int,
+        default=1,
+    )
+    gen_parser.add_argument(
+        "--prune-imports",
+        action="store_true",
+        help=(
+            "Drop the imports of names unused by the generated module (akin to"
+            " `autoflake --remove-all-unused-imports`)."
+        ),
+    )
+
+    #########
+    # Serve #
+    #########
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help=(
+            "Serve `sync`, `sync_manifest`, `sync_properties`,"
+            " `sync_properties_manifest`, and `gen` requests as JSON-RPC, keeping"
+            " parsed truths and formatted sources in memory"
+        ),
+    )
+    serve_parser.add_argument(
+        "--socket",
+        help="Unix socket to listen on. Defaults to stdio: one request per line.",
+        type=str,
+    )
 
     return parser
 
 
-def main(cli_argv=None, return_args=False):
+def _add_dry_run_arguments(parser):
     """
-    Run the CLI parser
+    Add the `--check` and `--diff` arguments, with which nothing is written
 
-    :param cli_argv: CLI arguments. If None uses `sys.argv`.
-    :type cli_argv: ```Optional[List[str]]```
+    :param parser: `sync`, `sync_properties`, or `sync_properties_manifest` parser
+    :type parser: ```ArgumentParser```
+    """
+    parser.add_argument(
+        "--check",
+        help=(
+            "Don't write, exit with status 1 if anything is out of sync. Stops at the"
+            " first file out of sync, unless with `--diff`."
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--diff",
+        help="Don't write, print a unified diff of the changes instead.",
+        action="store_true",
+    )
 
-    :param return_args: Primarily use is for tests. Returns the args rather than executing anything.
+
+def _command_kwargs(args):
+    """
+    :param args: Parsed CLI arguments
+    :type args: ```Namespace```
+
+    :returns: The arguments, without the subcommand, as keyword arguments of its implementation
+    :rtype: ```dict```
+    """
+    return {k: v for k, v in vars(args).items() if k != "command"}
+
+
+def _sync(parser, args, return_args):
+    """
+    Validate, then run, `sync`
+
+    :param parser: The CLI parser, used to report invalid arguments
+    :type parser: ```ArgumentParser```
+
+    :param args: Parsed CLI arguments of `sync`
+    :type args: ```Namespace```
+
+    :param return_args: Return the validated args rather than running `sync`
     :type return_args: ```bool```
 
-    :returns: the args if `return_args`, else None
-    :rtype: ```Optional[Namespace]```
+    :returns: the args if `return_args`, else filename -> whether the file was modified
+    :rtype: ```Union[Namespace, OrderedDict]```
     """
-    _parser = _build_parser()
-    args = _parser.parse_args(args=cli_argv)
-    command = args.command
-    args_dict = {k: v for k, v in vars(args).items() if k != "command"}
-    if command == "sync":
-        args = Namespace(
-            **{
-                k: v if k == "truth" or isinstance(v, list) or v is None else [v]
-                for k, v in args_dict.items()
-            }
+    args = Namespace(
+        **{
+            k: v if k in _sync_scalar_args or isinstance(v, list) or v is None else [v]
+            for k, v in _command_kwargs(args).items()
+        }
+    )
+
+    truth_file = getattr(args, pluralise(args.truth))
+    if truth_file is None:
+        parser.error("--truth must be an existent file. Got: None")
+    else:
+        truth_file = truth_file[0]
+
+    truth_file = path.realpath(path.expanduser(truth_file))
+
+    number_of_files = sum(
+        len(val)
+        for key, val in vars(args).items()
+        if isinstance(val, list) and not key.endswith("_names")
+    )
+
+    if number_of_files < 2:
+        parser.error(
+            "Two or more of `--argparse-function`, `--class`, and `--function` must"
+            " be specified"
         )
+    elif truth_file is None or not path.isfile(truth_file):
+        parser.error("--truth must be an existent file. Got: {!r}".format(truth_file))
+    elif args.watch and (args.check or args.diff):
+        parser.error("--watch writes, so can't be used with --check or --diff")
+
+    if return_args:
+        return args
+    effect = (watch if args.watch else ground_truth)(args, truth_file)
+    if args.check and any(effect.values()):
+        sys.exit(1)
+    return effect
 
-        truth_file = getattr(args, pluralise(args.truth))
-        if truth_file is None:
-            _parser.error("--truth must be an existent file. Got: None")
-        else:
-            truth_file = truth_file[0]
 
-        truth_file = path.realpath(path.expanduser(truth_file))
+def _sync_manifest(parser, args, return_args):
+    """
+    Validate, then run, `sync_manifest`
+
+    :param parser: The CLI parser, used to report invalid arguments
+    :type parser: ```ArgumentParser```
+
+    :param args: Parsed CLI arguments of `sync_manifest`
+    :type args: ```Namespace```
+
+    :param return_args: Return the validated args rather than running `sync_manifest`
+    :type return_args: ```bool```
 
-        number_of_files = sum(
-            len(val)
-            for key, val in vars(args).items()
-            if isinstance(val, list) and not key.endswith("_names")
+    :returns: the args if `return_args`, else filename -> whether the file was modified
+    :rtype: ```Union[Namespace, OrderedDict]```
+    """
+    if not path.isfile(args.manifest):
+        parser.error(
+            "--manifest must be an existent file. Got: {!r}".format(args.manifest)
         )
+    return args if return_args else ground_truth_manifest(**_command_kwargs(args))
 
-        if number_of_files < 2:
-            _parser.error(
-                "Two or more of `--argparse-function`, `--class`, and `--function` must"
-                " be specified"
-            )
-        elif truth_file is None or not path.isfile(truth_file):
-            _parser.error(
-                "--truth must be an existent file. Got: {!r}".format(truth_file)
-            )
 
-        return args if return_args else ground_truth(args, truth_file)
-    elif command == "sync_properties":
-        for fname in "input_filename", "output_filename":
-            if path.isfile(getattr(args, fname)):
-                setattr(
-                    args, fname, path.realpath(path.expanduser(getattr(args, fname)))
-                )
-        if args.input_filename is None or not path.isfile(args.input_filename):
-            _parser.error(
-                "--input-file must be an existent file. Got: {!r}".format(
-                    args.input_filename
-                )
-            )
-        elif args.output_filename is None or not path.isfile(args.output_filename):
-            _parser.error(
-                "--output-file must be an existent file. Got: {!r}".format(
-                    args.output_filename
-                )
+def _sync_properties_manifest(parser, args, return_args):
+    """
+    Validate, then run, `sync_properties_manifest`
+
+    :param parser: The CLI parser, used to report invalid arguments
+    :type parser: ```ArgumentParser```
+
+    :param args: Parsed CLI arguments of `sync_properties_manifest`
+    :type args: ```Namespace```
+
+    :param return_args: Return the validated args rather than running `sync_properties_manifest`
+    :type return_args: ```bool```
+
+    :returns: the args if `return_args`, else output filename -> whether the file was modified
+    :rtype: ```Union[Namespace, OrderedDict]```
+    """
+    if not path.isfile(args.manifest):
+        parser.error(
+            "--manifest must be an existent file. Got: {!r}".format(args.manifest)
+        )
+    if return_args:
+        return args
+    effect = sync_properties_manifest(**_command_kwargs(args))
+    if args.check and any(effect.values()):
+        sys.exit(1)
+    return effect
+
+
+def _sync_properties(parser, args, return_args):
+    """
+    Validate, then run, `sync_properties`
+
+    :param parser: The CLI parser, used to report invalid arguments
+    :type parser: ```ArgumentParser```
+
+    :param args: Parsed CLI arguments of `sync_properties`
+    :type args: ```Namespace```
+
+    :param return_args: Return the validated args rather than running `sync_properties`
+    :type return_args: ```bool```
+
+    :returns: the args if `return_args`, else output filename -> whether the file was modified
+    :rtype: ```Union[Namespace, OrderedDict]```
+    """
+    for fname in "input_filename", "output_filename":
+        if path.isfile(getattr(args, fname)):
+            setattr(args, fname, path.realpath(path.expanduser(getattr(args, fname))))
+    if args.input_filename is None or not path.isfile(args.input_filename):
+        parser.error(
+            "--input-file must be an existent file. Got: {!r}".format(
+                args.input_filename
             )
-        sync_properties(**args_dict)
-    elif command == "gen":
-        if path.isfile(args.output_filename):
-            raise IOError(
-                "File exists and this is a destructive operation. Delete/move {!r} then"
-                " rerun.".format(args.output_filename)
+        )
+    elif args.output_filename is None or not path.isfile(args.output_filename):
+        parser.error(
+            "--output-file must be an existent file. Got: {!r}".format(
+                args.output_filename
             )
-        gen(**args_dict)
+        )
+    if return_args:
+        return args
+    effect = sync_properties_effect(**_command_kwargs(args))
+    if args.check and any(effect.values()):
+        sys.exit(1)
+    return effect
+
+
+def _gen(parser, args, return_args):
+    """
+    Validate, then run, `gen`
+
+    :param parser: The CLI parser, unused as `gen` raises on invalid arguments
+    :type parser: ```ArgumentParser```
+
+    :param args: Parsed CLI arguments of `gen`
+    :type args: ```Namespace```
+
+    :param return_args: Unused; `gen` always runs
+    :type return_args: ```bool```
+    """
+    if path.isfile(args.output_filename):
+        raise IOError(
+            "File exists and this is a destructive operation. Delete/move {!r} then"
+            " rerun.".format(args.output_filename)
+        )
+    gen(**_command_kwargs(args))
+
+
+def _serve(parser, args, return_args):
+    """
+    Run `serve`
+
+    :param parser: The CLI parser, unused
+    :type parser: ```ArgumentParser```
+
+    :param args: Parsed CLI arguments of `serve`
+    :type args: ```Namespace```
+
+    :param return_args: Unused; `serve` always runs
+    :type return_args: ```bool```
+    """
+    from doctrans.daemon import serve
+
+    serve(**_command_kwargs(args))
+
+
+# Subcommand -> function validating, then running, it
+_commands = {
+    "sync": _sync,
+    "sync_manifest": _sync_manifest,
+    "sync_properties": _sync_properties,
+    "sync_properties_manifest": _sync_properties_manifest,
+    "gen": _gen,
+    "serve": _serve,
+}
+
+
+def main(cli_argv=None, return_args=False):
+    """
+    Run the CLI parser
+
+    :param cli_argv: CLI arguments. If None uses `sys.argv`.
+    :type cli_argv: ```Optional[List[str]]```
+
+    :param return_args: Primarily use is for tests. Returns the validated args rather than running the `sync*`
+      subcommands; `gen` and `serve` always run.
+    :type return_args: ```bool```
+
+    :returns: the args if `return_args`, else what the subcommand returned, e.g., for `sync*`,
+      output filename -> whether the file was modified
+    :rtype: ```Union[Namespace, OrderedDict]```
+    """
+    _parser = _build_parser()
+    args = _parser.parse_args(args=cli_argv)
+    return _commands[args.command](_parser, args, return_args)
 
 
 if __name__ == "__main__":
@@ -2,11 +2,11 @@
 ast_utils, bunch of helpers for converting input into ast.* input_str
 """
 import ast
-import pickle
 from ast import (
     AST,
     AnnAssign,
     Assign,
+    AsyncFunctionDef,
     Attribute,
     Call,
     ClassDef,
@@ -14,6 +14,8 @@ from ast import (
     Dict,
     Expr,
     FunctionDef,
+    Import,
+    ImportFrom,
     Index,
     Load,
     Module,
@@ -32,14 +34,15 @@ from ast import (
     walk,
 )
 from contextlib import suppress
-from copy import deepcopy
+from copy import copy, deepcopy
+from functools import lru_cache
+from hashlib import blake2b
 from importlib import import_module
 from inspect import isclass, isfunction
-from json import dumps
-from operator import inv, neg, not_, pos
+from itertools import chain
+from operator import attrgetter, inv, neg, not_, pos
 from sys import version_info
-
-from yaml import safe_dump_all
+from weakref import WeakKeyDictionary
 
 from doctrans.defaults_utils import extract_default, needs_quoting
 from doctrans.pure_utils import (
@@ -54,6 +57,7 @@ from doctrans.pure_utils import (
     rpartial,
     simple_types,
 )
+from doctrans.type_utils import parse_type
 
 # Was `"globals().__getitem__"`; this type is used for `Any` and any other unhandled
 
@@ -77,7 +81,7 @@ def param2ast(param):
     :returns: AST node for assignment
     :rtype: ```Union[AnnAssign, Assign]```
     """
-    name, _param = param
+    name, _param = param[0], dict(param[1])
     del param
     if _param.get("typ") is None and "default" in _param and "[" not in _param:
         _param["typ"] = type(_param["default"]).__name__
@@ -272,7 +276,7 @@ def param2argparse_param(param, word_wrap=True, emit_default_doc=True):
     :returns: `argparse.add_argument` call—with arguments—as an AST node
     :rtype: ```Expr```
     """
-    name, _param = param
+    name, _param = param[0], dict(param[1])
     del param
     typ, choices, required, action = (
         "str",
@@ -506,10 +510,7 @@ def _resolve_arg(action, choices, param, required, typ):
     elif _param["typ"] == "dict" or name.endswith("kwargs"):
         typ, required = "loads", not name.endswith("kwargs")
     elif _param["typ"]:
-        from doctrans.emitter_utils import ast_parse_fix
-
-        parsed_type = ast_parse_fix(_param["typ"])
-        for node in walk(parsed_type):
+        for node in walk(parse_type(_param["typ"])):
             _required, action, choices, typ = _parse_node_for_arg(
                 _required, action, choices, node, typ
             )
@@ -692,6 +693,123 @@ def get_at_root(node, types):
     return list(filter(rpartial(isinstance, types), node.body))
 
 
+def ast_hash(node, memoize=True):
+    """
+    Structural hash of the AST: over the type and `_fields` of each node, so ignoring positions and annotations
+     such as `_location` and `_idx`. Memoized per node, so a node mustn't be modified once hashed (copies may be).
+
+    :param node: AST node, list of them, or a field's value
+    :type node: ```Union[AST, List[AST], Any]```
+
+    :param memoize: Whether to memoize, and reuse memoized, digests. False for an AST that is still being modified.
+    :type memoize: ```bool```
+
+    :returns: Hex digest, equal for structurally equal ASTs
+    :rtype: ```str```
+    """
+    if isinstance(node, AST):
+        digest = _ast_hashes.get(node) if memoize else None
+        if digest is None:
+            # An absent field is distinct from `None`—as in `cmp_ast`—and "absent" from any digest
+            digest = _digest(
+                type(node).__name__,
+                *chain.from_iterable(
+                    map(
+                        lambda field: (
+                            field,
+                            ast_hash(getattr(node, field), memoize)
+                            if hasattr(node, field)
+                            else "absent",
+                        ),
+                        node._fields,
+                    )
+                )
+            )
+            if memoize:
+                _ast_hashes[node] = digest
+        return digest
+    elif isinstance(node, (list, tuple)):
+        return _digest(
+            type(node).__name__, *map(lambda elt: ast_hash(elt, memoize), node)
+        )
+    return _digest(type(node).__name__, repr(node))
+
+
+def _digest(*parts):
+    """
+    :param parts: Parts to digest, none of which may contain a null character
+    :type parts: ```*str```
+
+    :returns: Hex digest of the parts
+    :rtype: ```str```
+    """
+    return blake2b("\0".join(parts).encode("utf8"), digest_size=16).hexdigest()
+
+
+# Digest of each AST node hashed, dropped along with the node
+_ast_hashes = WeakKeyDictionary()
+
+
+def names_used(node):
+    """
+    Names referenced anywhere within the node, e.g., `a` and `b` of `a.c(b)`
+
+    :param node: AST node
+    :type node: ```AST```
+
+    :returns: The `id` of every `Name` within the node
+    :rtype: ```FrozenSet[str]```
+    """
+    return frozenset(
+        map(attrgetter("id"), filter(rpartial(isinstance, Name), walk(node)))
+    )
+
+
+def prune_unused_imports(nodes, used):
+    """
+    Drop the names imported but not used, akin to `autoflake --remove-all-unused-imports`.
+    `__future__` and `*` imports are kept. The nodes are not modified.
+
+    :param nodes: AST nodes, e.g., the body of a module
+    :type nodes: ```List[AST]```
+
+    :param used: Names used, e.g., `names_used(module)`
+    :type used: ```FrozenSet[str]```
+
+    :returns: `nodes`, with each import only of the names used, and the imports of no used names removed
+    :rtype: ```List[AST]```
+    """
+
+    def prune(node):
+        """
+        :param node: AST node
+        :type node: ```AST```
+
+        :returns: `node`, or a copy of the import with only the used names, or None if none are used
+        :rtype: ```Optional[AST]```
+        """
+        if not isinstance(node, (Import, ImportFrom)) or (
+            isinstance(node, ImportFrom) and node.module == "__future__"
+        ):
+            return node
+        names = list(
+            filter(
+                lambda _alias: _alias.name == "*"
+                or (_alias.asname or _alias.name).partition(".")[0] in used,
+                node.names,
+            )
+        )
+        if not names:
+            return None
+        elif len(names) == len(node.names):
+            return node
+        node = copy(node)
+        node.names = names
+        return node
+
+    return list(filter(None, map(prune, nodes)))
+
+
 def set_value(value, kind=None):
     """
     Creates a Constant or a Str depending on Python version in use
@@ -1048,6 +1166,229 @@ class RewriteAtQuery(NodeTransformer):
         return node
 
 
+class LocationIndex(object):
+    """
+    Index of the named nodes within an AST, built in one walk: the classes and functions, their arguments,
+     and the assignments to names. Each is found by its location, e.g., `('A', 'F')` for `class A: F = None`
+     or `('f', 'g')` for `def f(g): pass`, which maps to the slot holding the node—(parent, field, index)—so
+     that lookups and replacements are O(1). Where a location repeats, the first node is indexed.
+
+    :ivar root: The indexed AST node. If it has a `name`, every location starts with it.
+    """
+
+    def __init__(self, root):
+        """
+        :param root: AST node to index
+        :type root: ```AST```
+        """
+        self.root = root
+        self._root_location = (root.name,) if hasattr(root, "name") else ()
+        self._slots, self._children = {self._root_location: (None, None, None)}, {}
+        self._index_children(root, self._root_location)
+
+    def __contains__(self, location):
+        """
+        :param location: Location within the AST, e.g., `['A', 'F']` for `class A: F`
+        :type location: ```Sequence[str]```
+
+        :returns: Whether a node is indexed at the location
+        :rtype: ```bool```
+        """
+        return tuple(location) in self._slots
+
+    def __len__(self):
+        """
+        :returns: The number of indexed locations, including the root's
+        :rtype: ```int```
+        """
+        return len(self._slots)
+
+    def get(self, location):
+        """
+        Find the node at the location
+
+        :param location: Location within the AST, e.g., `['A', 'F']` for `class A: F`
+        :type location: ```Sequence[str]```
+
+        :returns: AST node at the location, or None if nothing is there
+        :rtype: ```Optional[AST]```
+        """
+        slot = self._slots.get(tuple(location))
+        if slot is None:
+            return None
+        parent, field, index = slot
+        return self.root if parent is None else getattr(parent, field)[index]
+
+    def replace(self, location, node):
+        """
+        Replace the node at the location, in-place.
+        A function argument may be replaced by an `AnnAssign` or `Assign`; an `AnnAssign` also sets its default.
+
+        :param location: Location within the AST, e.g., `['A', 'F']` for `class A: F`
+        :type location: ```Sequence[str]```
+
+        :param node: AST node to put at the location
+        :type node: ```AST```
+
+        :returns: Whether there was a node at the location to replace
+        :rtype: ```bool```
+        """
+        location = tuple(location)
+        slot = self._slots.get(location)
+        if slot is None:
+            return False
+        parent, field, index = slot
+        if parent is None:
+            self.root = node
+        else:
+            if isinstance(parent, ast.arguments):
+                node = _arg_setting_default(parent, field, index, node)
+            getattr(parent, field)[index] = node
+
+        self._unindex(location)
+        names = _location_names(node)
+        self._add(location[:-1] + names[:1] if names else location, slot, node)
+        return True
+
+    def append(self, node):
+        """
+        Append the node to the body of the root, in-place
+
+        :param node: AST node
+        :type node: ```AST```
+        """
+        self.root.body.append(node)
+        self._index_stmt(self._root_location, self.root, len(self.root.body) - 1)
+
+    def _add(self, location, slot, node):
+        """
+        Index the node, and its children, at the location; unless the location is already taken
+
+        :param location: Location of the node
+        :type location: ```Tuple[str, ...]```
+
+        :param slot: Where the node is held: (parent, field, index)
+        :type slot: ```Tuple[Optional[AST], Optional[str], Optional[int]]```
+
+        :param node: AST node
+        :type node: ```AST```
+        """
+        if location in self._slots:
+            return
+        self._slots[location] = slot
+        self._children.setdefault(location[:-1], []).append(location)
+        self._index_children(node, location)
+
+    def _index_children(self, node, location):
+        """
+        Index the arguments of the function, and the named statements of the body
+
+        :param node: AST node
+        :type node: ```AST```
+
+        :param location: Location of the node
+        :type location: ```Tuple[str, ...]```
+        """
+        if isinstance(node, (FunctionDef, AsyncFunctionDef)):
+            for field in "posonlyargs", "args", "kwonlyargs":
+                for index, _arg in enumerate(getattr(node.args, field, ())):
+                    self._add(location + (_arg.arg,), (node.args, field, index), _arg)
+        if isinstance(node, (Module, ClassDef, FunctionDef, AsyncFunctionDef)):
+            for index in range(len(node.body)):
+                self._index_stmt(location, node, index)
+
+    def _index_stmt(self, location, parent, index):
+        """
+        Index the statement within the body of its parent
+
+        :param location: Location of the parent
+        :type location: ```Tuple[str, ...]```
+
+        :param parent: AST node with a `body`
+        :type parent: ```AST```
+
+        :param index: Index of the statement within the body
+        :type index: ```int```
+        """
+        stmt = parent.body[index]
+        for name in _location_names(stmt):
+            self._add(location + (name,), (parent, "body", index), stmt)
+
+    def _unindex(self, location):
+        """
+        Remove the location, and every location within it, from the index
+
+        :param location: Location of the node
+        :type location: ```Tuple[str, ...]```
+        """
+        self._slots.pop(location, None)
+        for child_location in self._children.pop(location, ()):
+            self._unindex(child_location)
+
+
+def _location_names(node):
+    """
+    :param node: AST node
+    :type node: ```AST```
+
+    :returns: The names that the node is found by, e.g., `('a', 'b')` for `a = b = 5`
+    :rtype: ```Tuple[str, ...]```
+    """
+    if isinstance(node, (ClassDef, FunctionDef, AsyncFunctionDef)):
+        return (node.name,)
+    elif isinstance(node, ast.arg):
+        return (node.arg,)
+    elif isinstance(node, AnnAssign) and isinstance(node.target, Name):
+        return (node.target.id,)
+    elif isinstance(node, Assign):
+        return tuple(
+            map(attrgetter("id"), filter(rpartial(isinstance, Name), node.targets))
+        )
+    return ()
+
+
+def _arg_setting_default(arguments, field, index, node):
+    """
+    Convert the node to the `arg` replacing `getattr(arguments, field)[index]`.
+    The value of an `AnnAssign` becomes the default, if the argument already has a default (or is keyword-only).
+
+    :param arguments: Arguments of a function
+    :type arguments: ```ast.arguments```
+
+    :param field: Field of `arguments` the replaced `arg` is in, e.g., "args"
+    :type field: ```str```
+
+    :param index: Index within the field of the replaced `arg`
+    :type index: ```int```
+
+    :param node: The replacement
+    :type node: ```Union[ast.arg, AnnAssign, Assign]```
+
+    :returns: The replacement as an `arg`
+    :rtype: ```ast.arg```
+    """
+    if isinstance(node, Assign):
+        return set_arg(arg=node.targets[0].id, annotation=node.value)
+    elif isinstance(node, AnnAssign) and node.value is not None:
+        if field == "kwonlyargs":
+            arguments.kw_defaults[index] = node.value
+        else:
+            positional_index = (
+                index
+                + (len(getattr(arguments, "posonlyargs", ())) if field == "args" else 0)
+                - len(getattr(arguments, "posonlyargs", ()))
+                - len(arguments.args)
+                + len(arguments.defaults)
+            )
+            if positional_index >= 0:
+                arguments.defaults[positional_index] = node.value
+    node = emit_arg(node)
+    assert isinstance(node, ast.arg), "Expected ast.arg got {!r}".format(
+        type(node).__name__
+    )
+    return node
+
+
 def emit_ann_assign(node):
     """
     Produce an `AnnAssign` from the input
@@ -1163,8 +1504,12 @@ def infer_type_and_default(action, default, typ, required):
     elif isinstance(default, dict):
         typ = "loads"
         try:
+            from json import dumps
+
             default = dumps(default)
         except TypeError:
+            from yaml import safe_dump_all
+
             # YAML is more permissive though less concise, but `loads` from yaml is used so this works
             default = safe_dump_all(default)
     elif default is None:
@@ -1173,7 +1518,9 @@ def infer_type_and_default(action, default, typ, required):
         ):
             typ = None
     elif isinstance(default, type) or isfunction(default) or isclass(default):
-        typ, default, required = "pickle.loads", pickle.dumps(default), False
+        from pickle import dumps
+
+        typ, default, required = "pickle.loads", dumps(default), False
     else:
         raise NotImplementedError(
             "Parsing type {!s}, which contains {!r}".format(type(default), default)
@@ -1208,6 +1555,8 @@ def _infer_type_and_default_for_list_or_tuple(action, default, required):
             type(default[0]).__name__,
         )
     else:
+        from json import dumps
+
         typ, default = "loads", dumps(default)
     return action, default, required, typ
 
@@ -1348,6 +1697,21 @@ json_type2typ = {
 typ2json_type = {v: k for k, v in json_type2typ.items()}
 
 
+@lru_cache(maxsize=None)
+def _unparser():
+    """
+    Resolve the unparser once, on first use: astor on Python < 3.9, else `ast.unparse`
+
+    :returns: Function converting an AST node to Python source
+    :rtype: ```Callable[[AST], str]```
+    """
+    return (
+        getattr(import_module("astor"), "to_source")
+        if version_info[:2] < (3, 9)
+        else getattr(import_module("ast"), "unparse")
+    )
+
+
 # `to_code` doesn't work due to partially instantiated module
 def _to_code(node):
     """
@@ -1359,12 +1723,7 @@ def _to_code(node):
     :returns: Python source
     :rtype: ```str```
     """
-
-    return (
-        getattr(import_module("astor"), "to_source")
-        if version_info[:2] < (3, 9)
-        else getattr(import_module("ast"), "unparse")
-    )(node)
+    return _unparser()(node)
 
 
 NoneStr = "```(None)```" if PY_GTE_3_9 else "```None```"
@@ -1372,9 +1731,11 @@ NoneStr = "```(None)```" if PY_GTE_3_9 else "```None```"
 __all__ = [
     "FALLBACK_ARGPARSE_TYP",
     "FALLBACK_TYP",
+    "LocationIndex",
     "NoneStr",
     "RewriteAtQuery",
     "annotate_ancestry",
+    "ast_hash",
     "emit_ann_assign",
     "emit_arg",
     "find_ast_type",
@@ -1387,9 +1748,11 @@ __all__ = [
     "is_argparse_description",
     "it2literal",
     "maybe_type_comment",
+    "names_used",
     "param2argparse_param",
     "param2ast",
     "parse_to_scalar",
+    "prune_unused_imports",
     "set_arg",
     "set_slice",
     "set_value",
@@ -2,16 +2,25 @@
 Given the truth, show others the path
 """
 
+import sys
+from argparse import Namespace
 from ast import ClassDef, FunctionDef, Module
 from collections import OrderedDict
-from os import path
-
-from meta.asttools import cmp_ast
+from copy import deepcopy
+from functools import partial
+from itertools import chain, count
+from operator import itemgetter
+from os import path, stat
+from pickle import dumps
+from time import sleep
 
 from doctrans import emit, parse
-from doctrans.ast_utils import RewriteAtQuery, find_in_ast, get_function_type
-from doctrans.pure_utils import pluralise, strip_split
-from doctrans.source_transformer import ast_parse
+from doctrans.ast_utils import LocationIndex, ast_hash, get_function_type
+from doctrans.file_hashes import FileHashes
+from doctrans.ir_cache import IRCache, MemoryIRCache
+from doctrans.formatter import formatter
+from doctrans.pure_utils import pluralise, strip_split, unified_diff
+from doctrans.source_transformer import ast_parse, splice_source, to_code
 
 
 def _default_options(node, search, type_wanted):
@@ -61,6 +70,18 @@ def _get_name_from_namespace(args, fun_name):
     )
 
 
+def _arg2parse_emit_type():
+    """
+    :returns: CLI argument name -> (parse function, emit function, AST type) for each kind of file
+    :rtype: ```Dict[str, Tuple[Callable, Callable, type]]```
+    """
+    return {
+        "argparse_function": (parse.argparse_ast, emit.argparse_function, FunctionDef),
+        "class": (parse.class_, emit.class_, ClassDef),
+        "function": (parse.function, emit.function, FunctionDef),
+    }
+
+
 def ground_truth(args, truth_file):
     """
     There is but one truth. Conform.
@@ -71,30 +92,100 @@ def ground_truth(args, truth_file):
     :param truth_file: contains the filename of the one true source
     :type truth_file: ```str```
 
-    :returns: Filenames and whether they were changed
+    :returns: Filenames and whether they were changed. With `args.check` (and not `args.diff`), whether they would
+      be changed, up to the first which would be.
     :rtype: ```OrderedDict```
     """
-    arg2parse_emit_type = {
-        "argparse_function": (parse.argparse_ast, emit.argparse_function, FunctionDef),
-        "class": (parse.class_, emit.class_, ClassDef),
-        "function": (parse.function, emit.function, FunctionDef),
-    }
+    return OrderedDict(
+        _run_tasks(
+            _conform_tasks(args, _parse_truth(args, truth_file)),
+            jobs=getattr(args, "jobs", None) or 1,
+            stop_at_modified=getattr(args, "check", False)
+            and not getattr(args, "diff", False),
+        )
+    )
+
+
+def _parse_truth(args, truth_file, index=None, source=None):
+    """
+    Parse the node of the truth into its IR, from the cache if `args` has one
 
-    parse_func, emit_func, type_wanted = arg2parse_emit_type[args.truth]
+    :param args: Namespace with the values of the CLI arguments
+    :type args: ```Namespace```
+
+    :param truth_file: contains the filename of the one true source
+    :type truth_file: ```str```
+
+    :param index: Location index of the truth, already parsed. If None reads and parses `truth_file`.
+    :type index: ```Optional[LocationIndex]```
+
+    :param source: Source of the truth, if the indexed AST is unmodified since being parsed from it; to key the cache
+    :type source: ```Optional[str]```
+
+    :returns: IR of the node found within the truth
+    :rtype: ```dict```
+    """
+    parse_func, _, type_wanted = _arg2parse_emit_type()[args.truth]
     search = _get_name_from_namespace(args, args.truth).split(".")
 
-    with open(truth_file, "rt") as f:
-        true_ast = ast_parse(f.read(), filename=truth_file)
+    if index is None:
+        with open(truth_file, "rt") as f:
+            source = f.read()
+
+    def _parse():
+        """
+        Parse the truth from its source
+
+        :returns: IR of the node found by `search` within the truth
+        :rtype: ```dict```
+        """
+        original_node = (
+            LocationIndex(
+                ast_parse(source, filename=truth_file, skip_annotate=True)
+            ).get(search)
+            if index is None
+            # Copied, as the parsed truth may also be conformed and written
+            else deepcopy(index.get(search))
+        )
+        return parse_func(
+            original_node,
+            **_default_options(
+                node=original_node, search=search, type_wanted=type_wanted
+            )()
+        )
 
-    original_node = find_in_ast(search, true_ast)
-    gold_ir = parse_func(
-        original_node,
-        **_default_options(node=original_node, search=search, type_wanted=type_wanted)()
+    cache_dir = getattr(args, "cache_dir", None)
+    ir_cache = getattr(args, "ir_cache", None) or (
+        None if cache_dir is None else IRCache(cache_dir)
+    )
+    return (
+        _parse()
+        if ir_cache is None or source is None
+        else ir_cache.get_or_parse(
+            source, search, parse=_parse, parse_name=parse_func.__name__
+        )
     )
 
-    effect = OrderedDict()
+
+def _conform_tasks(args, gold_ir):
+    """
+    Make a `_conform_filename` task for every file to conform to the truth
+
+    :param args: Namespace with the values of the CLI arguments
+    :type args: ```Namespace```
+
+    :param gold_ir: IR of the truth
+    :type gold_ir: ```dict```
+
+    :returns: `_conform_filename` partially applied with all its arguments
+    :rtype: ```List[partial]```
+    """
+    cache_dir = getattr(args, "cache_dir", None)
+    hash_dir = None if cache_dir is None else path.join(cache_dir, "hashes")
+    check, diff = getattr(args, "check", False), getattr(args, "diff", False)
+    tasks = []
     # filter(lambda arg: arg != args.truth, arg2parse_emit_type.keys()):
-    for fun_name, (parse_func, emit_func, type_wanted) in arg2parse_emit_type.items():
+    for fun_name, (_, emit_func, type_wanted) in _arg2parse_emit_type().items():
         search = list(strip_split(_get_name_from_namespace(args, fun_name), "."))
 
         filenames = getattr(args, pluralise(fun_name))
@@ -102,20 +193,434 @@ def ground_truth(args, truth_file):
             filenames, (list, tuple)
         ), "Expected Union[list, tuple] got {!r}".format(type(filenames).__name__)
 
-        effect.update(
-            map(
-                lambda filename: _conform_filename(
-                    filename=filename,
+        tasks += map(
+            lambda filename: partial(
+                _conform_filename,
+                filename=filename,
+                search=search,
+                emit_func=emit_func,
+                replacement_node_ir=gold_ir,
+                type_wanted=type_wanted,
+                hash_dir=hash_dir,
+                check=check,
+                diff=diff,
+            ),
+            filenames,
+        )
+    return tasks
+
+
+def watch(args, truth_file, interval=0.5, iterations=None):
+    """
+    Conform, then poll the truth and the files for changes; conforming only the files affected by each change.
+    A changed file is conformed again. A changed truth conforms every file, unless its IR is unchanged.
+    Errors from a poll, e.g., a file saved mid-edit failing to parse, are printed to stderr and polling continues.
+
+    :param args: Namespace with the values of the CLI arguments
+    :type args: ```Namespace```
+
+    :param truth_file: contains the filename of the one true source
+    :type truth_file: ```str```
+
+    :param interval: Seconds between polls
+    :type interval: ```float```
+
+    :param iterations: Number of polls before returning. If None polls until interrupted.
+    :type iterations: ```Optional[int]```
+
+    :returns: Filenames and whether they were last changed
+    :rtype: ```OrderedDict```
+    """
+    args.ir_cache = getattr(args, "ir_cache", None) or MemoryIRCache()
+    jobs = getattr(args, "jobs", None) or 1
+    truth_file = path.realpath(path.expanduser(truth_file))
+
+    gold_ir = _parse_truth(args, truth_file)
+    # Pickled, as `_internal` holds AST nodes, which compare by identity
+    previous_gold_ir = dumps(gold_ir)
+    tasks = _conform_tasks(args, gold_ir)
+    filenames = tuple(
+        OrderedDict.fromkeys(chain((truth_file,), map(_task_filename, tasks)))
+    )
+    effect = OrderedDict(_run_tasks(tasks, jobs=jobs))
+    stats = _stat_files(filenames)
+
+    try:
+        for _ in count() if iterations is None else range(iterations):
+            sleep(interval)
+            new_stats = _stat_files(filenames)
+            changed = frozenset(
+                filename
+                for filename in filenames
+                if new_stats[filename] != stats[filename]
+            )
+            if changed:
+                # A file saved mid-edit mustn't stop the watcher; it's conformed again once next changed
+                try:
+                    gold_ir = _parse_truth(args, truth_file)
+                    truth_changed = dumps(gold_ir) != previous_gold_ir
+                    previous_gold_ir = dumps(gold_ir)
+                    effect.update(
+                        _run_tasks(
+                            list(
+                                filter(
+                                    lambda task: truth_changed
+                                    or _task_filename(task) in changed,
+                                    _conform_tasks(args, gold_ir),
+                                )
+                            ),
+                            jobs=jobs,
+                        )
+                    )
+                except Exception as e:
+                    print(
+                        "Not conformed, {}: {}".format(type(e).__name__, e),
+                        file=sys.stderr,
+                    )
+                new_stats = _stat_files(filenames)
+            stats = new_stats
+    except KeyboardInterrupt:
+        pass
+    return effect
+
+
+def load_manifest(manifest_filename):
+    """
+    Load the groups of a manifest. A manifest is a JSON (or YAML, by extension) file of the form
+        {"groups": [{"truth": "class", "classes": ["a.py"], "class_names": ["ConfigClass"],
+                     "functions": ["b.py"], "function_names": ["C.function_name"]}, ...]}
+    Each group has the same keys as the `sync` arguments; kinds without files may be omitted.
+    Filenames are relative to the manifest.
+
+    :param manifest_filename: Location of the manifest
+    :type manifest_filename: ```str```
+
+    :returns: Each group as a Namespace, like the `sync` arguments, with the filenames resolved
+    :rtype: ```List[Namespace]```
+    """
+    manifest, resolve = _read_manifest(manifest_filename)
+    return list(
+        map(
+            lambda group: Namespace(
+                **dict(
+                    group,
+                    **{
+                        pluralise(fun_name): list(
+                            map(resolve, group.get(pluralise(fun_name)) or ())
+                        )
+                        for fun_name in _arg2parse_emit_type().keys()
+                    }
+                )
+            ),
+            manifest["groups"],
+        )
+    )
+
+
+def _read_manifest(manifest_filename):
+    """
+    Read a JSON (or YAML, by extension) manifest
+
+    :param manifest_filename: Location of the manifest
+    :type manifest_filename: ```str```
+
+    :returns: The manifest, and a function resolving the filenames within it (relative to the manifest) to real paths
+    :rtype: ```Tuple[dict, Callable[[str], str]]```
+    """
+    manifest_filename = path.realpath(path.expanduser(manifest_filename))
+    with open(manifest_filename, "rt") as f:
+        if manifest_filename.endswith((".yml", ".yaml")):
+            import yaml
+
+            manifest = yaml.load(f, Loader=yaml.SafeLoader)
+        else:
+            from json import load
+
+            manifest = load(f)
+
+    manifest_join = partial(path.join, path.dirname(manifest_filename))
+    return manifest, lambda filename: path.realpath(
+        manifest_join(path.expanduser(filename))
+    )
+
+
+def ground_truth_manifest(manifest_filename, cache_dir=None, ir_cache=None):
+    """
+    Conform every group of the manifest, in one process. Each file is parsed once, however many groups it's in,
+     and written once—if modified—after all groups are conformed.
+
+    :param manifest_filename: Location of the manifest, see `load_manifest`
+    :type manifest_filename: ```str```
+
+    :param cache_dir: Directory to cache parsed truths and emitted file hashes in
+    :type cache_dir: ```Optional[str]```
+
+    :param ir_cache: Cache of parsed truths, e.g., a `MemoryIRCache`. Defaults to an `IRCache` in `cache_dir`.
+    :type ir_cache: ```Optional[IRCache]```
+
+    :returns: Filenames and whether they were changed
+    :rtype: ```OrderedDict```
+    """
+    ir_cache = ir_cache or (None if cache_dir is None else IRCache(cache_dir))
+    modules = OrderedDict()
+    effect = OrderedDict()
+    for group in load_manifest(manifest_filename):
+        group.ir_cache = ir_cache
+        _conform_group(group, modules, effect)
+    return _write_modules(
+        modules,
+        effect,
+        hash_dir=None if cache_dir is None else path.join(cache_dir, "hashes"),
+    )
+
+
+def _manifest_module(modules, filename):
+    """
+    :param modules: filename -> module, of every file seen so far
+    :type modules: ```OrderedDict```
+
+    :param filename: Location of file
+    :type filename: ```str```
+
+    :returns: The file's `source` (None if nonexistent), location `index` of its AST (None if nonexistent),
+      `appended` nodes, and the (original, replacement) pairs of the `replaced` nodes; parsing the file on
+      first use.
+    :rtype: ```dict```
+    """
+    if filename not in modules:
+        source = index = None
+        if path.isfile(filename):
+            with open(filename, "rt") as f:
+                source = f.read()
+            index = LocationIndex(
+                ast_parse(source, filename=filename, skip_annotate=True)
+            )
+        modules[filename] = {
+            "source": source,
+            "index": index,
+            "appended": [],
+            "replaced": [],
+        }
+    return modules[filename]
+
+
+def _conform_group(group, modules, effect):
+    """
+    Conform the files of one manifest group to its truth, in memory: recording the nodes to append and replace in
+     `modules`, to be written by `_write_modules`
+
+    :param group: The group, like the `sync` arguments, with the filenames resolved
+    :type group: ```Namespace```
+
+    :param modules: filename -> module (see `_manifest_module`), of every file seen so far. Updated in place.
+    :type modules: ```OrderedDict```
+
+    :param effect: Filenames, each set to False on first being seen. Updated in place.
+    :type effect: ```OrderedDict```
+    """
+    truth_file = getattr(group, pluralise(group.truth))[0]
+    truth = _manifest_module(modules, truth_file)
+    gold_ir = _parse_truth(
+        group,
+        truth_file,
+        index=truth["index"],
+        source=None if truth["appended"] or truth["replaced"] else truth["source"],
+    )
+
+    for fun_name, (_, emit_func, type_wanted) in _arg2parse_emit_type().items():
+        filenames = getattr(group, pluralise(fun_name))
+        if not filenames:
+            continue
+        search = list(strip_split(_get_name_from_namespace(group, fun_name), "."))
+
+        for filename in filenames:
+            module = _manifest_module(modules, filename)
+            effect.setdefault(filename, False)
+            if module["index"] is None:
+                module["index"] = LocationIndex(
+                    Module(
+                        body=[_emit_new(emit_func, gold_ir)],
+                        type_ignores=[],
+                        stmt=None,
+                    )
+                )
+                continue
+            appended_node, replacement = _conform_ast(
+                module["index"],
+                filename=filename,
+                search=search,
+                replacement_node=_emit_replacement(
+                    module["index"],
                     search=search,
                     emit_func=emit_func,
                     replacement_node_ir=gold_ir,
                     type_wanted=type_wanted,
+                )[1],
+                type_wanted=type_wanted,
+            )
+            if appended_node is not None:
+                module["appended"].append(appended_node)
+            if replacement is not None:
+                module["replaced"].append(replacement)
+
+
+def _write_modules(modules, effect, hash_dir):
+    """
+    Write each conformed file that was modified, once
+
+    :param modules: filename -> module (see `_manifest_module`), with the nodes to append and replace
+    :type modules: ```OrderedDict```
+
+    :param effect: Filenames to write, if modified
+    :type effect: ```OrderedDict```
+
+    :param hash_dir: Directory of the emitted file hashes, or None
+    :type hash_dir: ```Optional[str]```
+
+    :returns: Filenames and whether they were changed
+    :rtype: ```OrderedDict```
+    """
+    for filename in effect.keys():
+        module = modules[filename]
+        if module["replaced"] and module["source"] is not None:
+            _write_replaced(
+                module["index"].root,
+                filename,
+                module["source"],
+                module["replaced"],
+                appended=module["appended"],
+                hash_dir=hash_dir,
+            )
+        elif module["source"] is None:
+            emit.file(
+                module["index"].root,
+                filename,
+                mode="wt",
+                skip_black=False,
+                hash_dir=hash_dir,
+            )
+        elif module["appended"]:
+            emit.file(
+                Module(body=module["appended"], type_ignores=[], stmt=None),
+                filename,
+                mode="a",
+                skip_black=False,
+            )
+        else:
+            continue
+        effect[filename] = True
+    return effect
+
+
+def _task_filename(task):
+    """
+    :param task: `_conform_filename` partially applied with all its arguments
+    :type task: ```partial```
+
+    :returns: Real path of the file the task conforms
+    :rtype: ```str```
+    """
+    return path.realpath(path.expanduser(task.keywords["filename"]))
+
+
+def _stat_files(filenames):
+    """
+    :param filenames: Files to stat
+    :type filenames: ```Iterable[str]```
+
+    :returns: filename -> (modification time in ns, size), or None if nonexistent
+    :rtype: ```Dict[str, Optional[Tuple[int, int]]]```
+    """
+    return {
+        filename: (lambda st: None if st is None else (st.st_mtime_ns, st.st_size))(
+            _stat_or_none(filename)
+        )
+        for filename in filenames
+    }
+
+
+def _stat_or_none(filename):
+    """
+    :param filename: File to stat
+    :type filename: ```str```
+
+    :returns: stat of the file, or None if nonexistent
+    :rtype: ```Optional[os.stat_result]```
+    """
+    try:
+        return stat(filename)
+    except FileNotFoundError:
+        return None
+
+
+def _run_tasks(tasks, jobs, stop_at_modified=False):
+    """
+    Run the `_conform_filename` tasks, over a process pool when `jobs > 1`.
+    Tasks targeting the same file are run in order within one worker, so that their edits don't race.
+
+    :param tasks: `_conform_filename` partially applied with all its arguments
+    :type tasks: ```List[partial]```
+
+    :param jobs: Number of processes to use
+    :type jobs: ```int```
+
+    :param stop_at_modified: Whether to stop once a task reports its file as modified, cancelling the rest
+    :type stop_at_modified: ```bool```
+
+    :returns: Result of each task run—filename, whether the file was modified—in the order of `tasks`
+    :rtype: ```List[Tuple[str, bool]]```
+    """
+    if jobs < 2:
+        return _run_sequentially(tasks, stop_at_modified)
+
+    task_idxs_by_filename = OrderedDict()
+    for idx, task in enumerate(tasks):
+        task_idxs_by_filename.setdefault(_task_filename(task), []).append(idx)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = tuple(
+            (
+                idxs,
+                executor.submit(
+                    _run_sequentially,
+                    list(map(tasks.__getitem__, idxs)),
+                    stop_at_modified,
                 ),
-                filenames,
             )
+            for idxs in task_idxs_by_filename.values()
         )
+        for idxs, future in futures:
+            for idx, result in zip(idxs, future.result()):
+                results[idx] = result
+            if stop_at_modified and any(map(itemgetter(1), future.result())):
+                for _, pending in futures:
+                    pending.cancel()
+                break
+    return list(filter(None, results))
 
-    return effect
+
+def _run_sequentially(tasks, stop_at_modified=False):
+    """
+    Run the tasks one after another
+
+    :param tasks: `_conform_filename` partially applied with all its arguments
+    :type tasks: ```List[partial]```
+
+    :param stop_at_modified: Whether to stop once a task reports its file as modified
+    :type stop_at_modified: ```bool```
+
+    :returns: Result of each task run—filename, whether the file was modified—in order
+    :rtype: ```List[Tuple[str, bool]]```
+    """
+    results = []
+    for task in tasks:
+        results.append(task())
+        if stop_at_modified and results[-1][1]:
+            break
+    return results
 
 
 def _conform_filename(
@@ -124,9 +629,12 @@ def _conform_filename(
     emit_func,
     replacement_node_ir,
     type_wanted,
+    hash_dir=None,
+    check=False,
+    diff=False,
 ):
     """
-    Conform the given file to the `intermediate_repr`
+    Conform the given file to the `intermediate_repr`; or with `check` or `diff`, find what conforming would do
 
     :param filename: Location of file
     :type filename: ```str```
@@ -140,58 +648,251 @@ def _conform_filename(
     :param type_wanted: AST instance
     :type type_wanted: ```AST```
 
-    :returns: filename, whether the file was modified
+    :param hash_dir: Directory recording what was last emitted to each file, and the structural hash of each
+      target conformed within it; to skip no-op emits, and to skip parsing files whose targets are conformed
+    :type hash_dir: ```Optional[str]```
+
+    :param check: Don't write, just find whether the file would be modified
+    :type check: ```bool```
+
+    :param diff: Don't write, print the unified diff of the modifications instead
+    :type diff: ```bool```
+
+    :returns: filename, whether the file was (or, with `check` or `diff`, would be) modified
     :rtype: ```Tuple[str, bool]```
     """
     filename = path.realpath(path.expanduser(filename))
 
     if not path.isfile(filename):
-        emit.file(
-            emit_func(
-                replacement_node_ir,
-                emit_default_doc=False,  # emit_func.__name__ == "class_"
-            ),
-            filename=filename,
-            mode="wt",
-            skip_black=False,
-        )
+        new_node = _emit_new(emit_func, replacement_node_ir)
+        if diff:
+            print(
+                unified_diff(filename, "", formatter.format(to_code(new_node))), end=""
+            )
+        elif not check:
+            emit.file(
+                new_node,
+                filename=filename,
+                mode="wt",
+                skip_black=False,
+                hash_dir=hash_dir,
+            )
         return filename, True
 
+    file_hashes = None if hash_dir is None else FileHashes(hash_dir)
+    target = "{}:{}".format(emit_func.__name__, ".".join(search))
+    recorded = None if file_hashes is None else file_hashes.target(filename, target)
+    if recorded is not None and recorded["hash"] == ast_hash(
+        emit_func(replacement_node_ir, **recorded["options"])
+    ):
+        return filename, False
+
     with open(filename, "rt") as f:
-        parsed_ast = ast_parse(f.read(), filename=filename)
+        source = f.read()
+    parsed_ast = ast_parse(source, filename=filename, skip_annotate=True)
     assert isinstance(parsed_ast, Module)
 
-    original_node = find_in_ast(search, parsed_ast)
-    replacement_node = emit_func(
+    index = LocationIndex(parsed_ast)
+    options, replacement_node = _emit_replacement(
+        index,
+        search=search,
+        emit_func=emit_func,
+        replacement_node_ir=replacement_node_ir,
+        type_wanted=type_wanted,
+    )
+    appended_node, replacement = _conform_ast(
+        index,
+        filename=filename,
+        search=search,
+        replacement_node=replacement_node,
+        type_wanted=type_wanted,
+    )
+    if appended_node is not None:
+        if diff:
+            print(
+                unified_diff(
+                    filename,
+                    source,
+                    source + formatter.format(to_code(appended_node)),
+                ),
+                end="",
+            )
+        elif not check:
+            emit.file(appended_node, filename=filename, mode="a", skip_black=False)
+    elif replacement is not None:
+        if diff:
+            print(
+                unified_diff(
+                    filename,
+                    source,
+                    _replaced_source(parsed_ast, source, (replacement,)),
+                ),
+                end="",
+            )
+        elif not check:
+            _write_replaced(
+                parsed_ast, filename, source, (replacement,), hash_dir=hash_dir
+            )
+
+    # Once written, the target is as `replacement_node`; so the same emission needn't parse the file next time
+    if file_hashes is not None and not (check or diff):
+        file_hashes.record_target(
+            filename, target, {"options": options, "hash": ast_hash(replacement_node)}
+        )
+    return filename, appended_node is not None or replacement is not None
+
+
+def _replaced_source(parsed_ast, source, replacements):
+    """
+    The source of the module, whose nodes have been replaced, as `_write_replaced` would write it
+
+    :param parsed_ast: Parsed module, with the replacements made
+    :type parsed_ast: ```Module```
+
+    :param source: Source that `parsed_ast` was parsed from
+    :type source: ```str```
+
+    :param replacements: (original node, replacement node) pairs
+    :type replacements: ```List[Tuple[AST, AST]]```
+
+    :returns: The new source of the module
+    :rtype: ```str```
+    """
+    try:
+        return splice_source(replacements, source)
+    except ValueError:
+        return formatter.format(to_code(parsed_ast))
+
+
+def _write_replaced(
+    parsed_ast, filename, source, replacements, appended=(), hash_dir=None
+):
+    """
+    Write the module, whose nodes have been replaced, splicing the replacements into `source` (then appending
+     the `appended` nodes) where possible. Otherwise the whole module is emitted.
+
+    :param parsed_ast: Parsed module, with the replacements made
+    :type parsed_ast: ```Module```
+
+    :param filename: Location of the module's file
+    :type filename: ```str```
+
+    :param source: Source that `parsed_ast` was parsed from
+    :type source: ```str```
+
+    :param replacements: (original node, replacement node) pairs
+    :type replacements: ```List[Tuple[AST, AST]]```
+
+    :param appended: Nodes appended to the body of `parsed_ast`
+    :type appended: ```List[AST]```
+
+    :param hash_dir: Directory recording what was last emitted to each file, to skip no-op emits
+    :type hash_dir: ```Optional[str]```
+    """
+    try:
+        emit.splice(replacements, filename, source, skip_black=False)
+    except ValueError:
+        emit.file(parsed_ast, filename, mode="wt", skip_black=False, hash_dir=hash_dir)
+        return
+    if appended:
+        emit.file(
+            Module(body=list(appended), type_ignores=[], stmt=None),
+            filename,
+            mode="a",
+            skip_black=False,
+        )
+
+
+def _emit_new(emit_func, replacement_node_ir):
+    """
+    Emit the node for a file which doesn't exist yet
+
+    :param emit_func: Function which emits the node from the IR, e.g., `emit.class_`
+    :type emit_func: ```Callable[[dict, ...], AST]```
+
+    :param replacement_node_ir: IR to emit
+    :type replacement_node_ir: ```dict```
+
+    :returns: Emitted node
+    :rtype: ```AST```
+    """
+    return emit_func(
         replacement_node_ir,
-        **_default_options(node=original_node, search=search, type_wanted=type_wanted)()
+        emit_default_doc=False,  # emit_func.__name__ == "class_"
     )
+
+
+def _emit_replacement(index, search, emit_func, replacement_node_ir, type_wanted):
+    """
+    Emit the node to conform what is found in the parsed module to
+
+    :param index: Location index of the parsed module
+    :type index: ```LocationIndex```
+
+    :param search: Search query, e.g., ['node_name', 'function_name', 'arg_name']
+    :type search: ```List[str]```
+
+    :param emit_func: Function which emits the node from the IR, e.g., `emit.class_`
+    :type emit_func: ```Callable[[dict, ...], AST]```
+
+    :param replacement_node_ir: Replace what is found with the contents of this param
+    :type replacement_node_ir: ```dict```
+
+    :param type_wanted: AST instance
+    :type type_wanted: ```AST```
+
+    :returns: The options `emit_func` was called with, and the node it emitted
+    :rtype: ```Tuple[dict, AST]```
+    """
+    options = _default_options(
+        node=index.get(search), search=search, type_wanted=type_wanted
+    )()
+    return options, emit_func(replacement_node_ir, **options)
+
+
+def _conform_ast(index, filename, search, replacement_node, type_wanted):
+    """
+    Conform the parsed module to the replacement node, in-place
+
+    :param index: Location index of the parsed module, which—with the module—is modified in-place
+    :type index: ```LocationIndex```
+
+    :param filename: Location of the module's file, for output
+    :type filename: ```str```
+
+    :param search: Search query, e.g., ['node_name', 'function_name', 'arg_name']
+    :type search: ```List[str]```
+
+    :param replacement_node: Replace what is found with this, from `_emit_replacement`
+    :type replacement_node: ```AST```
+
+    :param type_wanted: AST instance
+    :type type_wanted: ```AST```
+
+    :returns: The node appended to the module's body if it wasn't found,
+      (found node, its replacement) if the found node was replaced
+    :rtype: ```Tuple[Optional[AST], Optional[Tuple[AST, AST]]]```
+    """
+    original_node = index.get(search)
     if original_node is None:
-        emit.file(replacement_node, filename=filename, mode="a", skip_black=False)
-        return filename, True
+        index.append(replacement_node)
+        return replacement_node, None
     assert len(search) > 0
 
     assert type(replacement_node) == type_wanted, "Expected {!r} got {!r}".format(
         type_wanted, type(replacement_node).__name__
     )
 
-    replaced = False
-    if not cmp_ast(original_node, replacement_node):
-        rewrite_at_query = RewriteAtQuery(
-            search=search,
-            replacement_node=replacement_node,
-        )
-        rewrite_at_query.visit(parsed_ast)
+    if ast_hash(original_node) == ast_hash(replacement_node):
+        return None, None
 
-        print(
-            "modified" if rewrite_at_query.replaced else "unchanged", filename, sep="\t"
-        )
-        if rewrite_at_query.replaced:
-            emit.file(parsed_ast, filename, mode="wt", skip_black=False)
-
-        replaced = rewrite_at_query.replaced
+    # Functions are found, but (as ever) not replaced; only their arguments are, by `sync_properties`
+    replaced = not isinstance(original_node, FunctionDef) and index.replace(
+        search, replacement_node
+    )
 
-    return filename, replaced
+    print("modified" if replaced else "unchanged", filename, sep="\t")
+    return None, (original_node, replacement_node) if replaced else None
 
 
-__all__ = ["ground_truth"]
+__all__ = ["ground_truth", "ground_truth_manifest", "load_manifest", "watch"]
@@ -0,0 +1,313 @@
+"""
+Long-running doctrans: serves `sync`, `sync_manifest`, `sync_properties`, `sync_properties_manifest`, and `gen`
+ requests over JSON-RPC, keeping imports, parsed truths, and formatted sources warm between requests
+"""
+
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from importlib import reload
+from io import StringIO
+from json import dumps, loads
+from os import path, remove, stat
+from socketserver import StreamRequestHandler, UnixStreamServer
+
+from doctrans.conformance import ground_truth, ground_truth_manifest
+from doctrans.ir_cache import MemoryIRCache
+from doctrans.pure_utils import pluralise
+from doctrans.sync_properties import sync_properties_effect, sync_properties_manifest
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND, INVALID_PARAMS, INTERNAL_ERROR = (
+    -32700,
+    -32600,
+    -32601,
+    -32602,
+    -32603,
+)
+
+METHODS = frozenset(
+    ("sync", "sync_manifest", "sync_properties", "sync_properties_manifest", "gen")
+)
+
+
+class Daemon(object):
+    """
+    Handles JSON-RPC requests, each of which runs a CLI subcommand in-process.
+    The `params` of a request are the CLI arguments of its `method`, e.g.,
+
+        {"jsonrpc": "2.0", "id": 0, "method": "sync",
+         "params": ["--class", "a.py", "--function", "b.py", "--truth", "class"]}
+
+    :ivar ir_cache: Parsed truths, keyed by content hash so that changed files are reparsed
+    :ivar module_mtimes: `gen` input modules by name, with the mtime they were imported at
+    """
+
+    def __init__(self):
+        """ Start with no parsed truths, and no `gen` input modules imported """
+        self.ir_cache = MemoryIRCache()
+        self.module_mtimes = {}
+
+    def handle(self, request):
+        """
+        Handle one JSON-RPC request
+
+        :param request: JSON-RPC request
+        :type request: ```dict```
+
+        :returns: JSON-RPC response. The result has the captured `stdout` and, for `sync*`, the `effect`:
+          `[filename, whether the file was (or, with `--check` or `--diff`, would be) modified]` pairs; and `in_sync`,
+          whether no file was (or would be) modified. Invalid arguments are an "Invalid params" error.
+        :rtype: ```dict```
+        """
+        request_id = request.get("id") if isinstance(request, dict) else None
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return _error(request_id, INVALID_REQUEST, "Invalid Request")
+        method, params = request["method"], request.get("params", [])
+        if method not in METHODS:
+            return _error(request_id, METHOD_NOT_FOUND, "Method not found", method)
+        if not isinstance(params, list) or not all(map(_is_str, params)):
+            return _error(
+                request_id, INVALID_PARAMS, "Expected `params` to be a list of str"
+            )
+
+        stdout, stderr = StringIO(), StringIO()
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                effect = getattr(self, method)(params)
+        except SystemExit:
+            return _error(
+                request_id, INVALID_PARAMS, "Invalid params", stderr.getvalue()
+            )
+        except Exception as e:
+            return _error(
+                request_id,
+                INTERNAL_ERROR,
+                "{}: {}".format(type(e).__name__, e),
+                stdout.getvalue(),
+            )
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "stdout": stdout.getvalue(),
+                "effect": None if effect is None else list(map(list, effect.items())),
+                "in_sync": None if effect is None else not any(effect.values()),
+            },
+        }
+
+    def handle_line(self, line):
+        """
+        Handle one line of JSON-RPC
+
+        :param line: JSON encoded request
+        :type line: ```str```
+
+        :returns: JSON encoded response
+        :rtype: ```str```
+        """
+        try:
+            request = loads(line)
+        except ValueError as e:
+            return dumps(_error(None, PARSE_ERROR, "Parse error", str(e)))
+        return dumps(self.handle(request))
+
+    def sync(self, argv):
+        """
+        Force argparse, classes, and/or methods to be equivalent, reusing previously parsed truths
+
+        :param argv: CLI arguments of `sync`
+        :type argv: ```List[str]```
+
+        :returns: filename -> whether the file was modified
+        :rtype: ```OrderedDict```
+        """
+        from doctrans.__main__ import main
+
+        args = main(["sync"] + argv, return_args=True)
+        args.ir_cache = self.ir_cache
+        return ground_truth(
+            args,
+            path.realpath(path.expanduser(getattr(args, pluralise(args.truth))[0])),
+        )
+
+    def sync_manifest(self, argv):
+        """
+        Force many groups of argparse, classes, and/or methods to be equivalent, reusing previously parsed truths
+
+        :param argv: CLI arguments of `sync_manifest`
+        :type argv: ```List[str]```
+
+        :returns: filename -> whether the file was modified
+        :rtype: ```OrderedDict```
+        """
+        from doctrans.__main__ import main
+
+        args = main(["sync_manifest"] + argv, return_args=True)
+        return ground_truth_manifest(
+            args.manifest, cache_dir=args.cache_dir, ir_cache=self.ir_cache
+        )
+
+    def sync_properties(self, argv):
+        """
+        Synchronise one or more properties between input and output Python files
+
+        :param argv: CLI arguments of `sync_properties`
+        :type argv: ```List[str]```
+
+        :returns: output filename -> whether the file was (or, with `--check` or `--diff`, would be) modified
+        :rtype: ```OrderedDict```
+        """
+        from doctrans.__main__ import _command_kwargs, main
+
+        args = main(["sync_properties"] + argv, return_args=True)
+        return sync_properties_effect(**_command_kwargs(args))
+
+    def sync_properties_manifest(self, argv):
+        """
+        Synchronise many properties between input and output Python files
+
+        :param argv: CLI arguments of `sync_properties_manifest`
+        :type argv: ```List[str]```
+
+        :returns: output filename -> whether the file was (or, with `--check` or `--diff`, would be) modified
+        :rtype: ```OrderedDict```
+        """
+        from doctrans.__main__ import _command_kwargs, main
+
+        args = main(["sync_properties_manifest"] + argv, return_args=True)
+        return sync_properties_manifest(**_command_kwargs(args))
+
+    def gen(self, argv):
+        """
+        Generate classes, functions, and/or argparse functions from the input mapping,
+         first reloading the input module if its file changed since it was imported
+
+        :param argv: CLI arguments of `gen`
+        :type argv: ```List[str]```
+        """
+        from doctrans.__main__ import _build_parser, main
+
+        input_mapping = _build_parser().parse_args(["gen"] + argv).input_mapping
+        self.reload_if_modified(input_mapping.rpartition(".")[0])
+        main(["gen"] + argv)
+
+    def reload_if_modified(self, module_name):
+        """
+        Reload the module if its file was modified since it was (re)loaded by the daemon
+
+        :param module_name: Name of the module, e.g., `doctrans.tests.mocks.eval`
+        :type module_name: ```str```
+        """
+        module = sys.modules.get(module_name)
+        filename = getattr(module, "__file__", None)
+        if filename is None or not path.isfile(filename):
+            return
+        mtime = stat(filename).st_mtime_ns
+        if self.module_mtimes.setdefault(module_name, mtime) != mtime:
+            reload(module)
+            self.module_mtimes[module_name] = mtime
+
+
+def _is_str(obj):
+    """
+    :param obj: Any object
+    :type obj: ```Any```
+
+    :returns: Whether `obj` is a str
+    :rtype: ```bool```
+    """
+    return isinstance(obj, str)
+
+
+def _error(request_id, code, message, data=None):
+    """
+    :param request_id: Id of the request, or None if it couldn't be read
+    :type request_id: ```Optional[Union[int, str]]```
+
+    :param code: JSON-RPC error code
+    :type code: ```int```
+
+    :param message: Short description of the error
+    :type message: ```str```
+
+    :param data: Detail, e.g., the CLI error output
+    :type data: ```Optional[str]```
+
+    :returns: JSON-RPC error response
+    :rtype: ```dict```
+    """
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def serve_stdio(daemon=None, stdin=None, stdout=None):
+    """
+    Serve JSON-RPC over stdio: one request per line in, one response per line out
+
+    :param daemon: Request handler, defaults to a new `Daemon`
+    :type daemon: ```Optional[Daemon]```
+
+    :param stdin: Stream of requests, defaults to `sys.stdin`
+    :type stdin: ```Optional[TextIO]```
+
+    :param stdout: Stream of responses, defaults to `sys.stdout`
+    :type stdout: ```Optional[TextIO]```
+    """
+    daemon = daemon or Daemon()
+    stdin, stdout = stdin or sys.stdin, stdout or sys.stdout
+    for line in filter(str.strip, stdin):
+        print(daemon.handle_line(line), file=stdout, flush=True)
+
+
+def serve_socket(socket_path, daemon=None):
+    """
+    Serve JSON-RPC over a Unix socket: one request per line in, one response per line out.
+    Connections are served one at a time, as requests run in-process.
+
+    :param socket_path: Filename of the Unix socket, created (replacing a stale one) on start and removed on exit
+    :type socket_path: ```str```
+
+    :param daemon: Request handler, defaults to a new `Daemon`
+    :type daemon: ```Optional[Daemon]```
+    """
+    daemon = daemon or Daemon()
+
+    class Handler(StreamRequestHandler):
+        """ Handle each line of the connection as a JSON-RPC request """
+
+        def handle(self):
+            """ Respond to each request line until the client disconnects """
+            for line in filter(bytes.strip, self.rfile):
+                self.wfile.write(
+                    "{}\n".format(daemon.handle_line(line.decode("utf8"))).encode(
+                        "utf8"
+                    )
+                )
+                self.wfile.flush()
+
+    if path.exists(socket_path):
+        remove(socket_path)
+    try:
+        with UnixStreamServer(socket_path, Handler) as server:
+            server.serve_forever()
+    finally:
+        if path.exists(socket_path):
+            remove(socket_path)
+
+
+def serve(socket=None):
+    """
+    Serve JSON-RPC requests until stdin closes, or forever on a Unix socket
+
+    :param socket: Filename of a Unix socket to listen on. If None uses stdio.
+    :type socket: ```Optional[str]```
+    """
+    if socket is None:
+        serve_stdio()
+    else:
+        serve_socket(socket)
+
+
+__all__ = ["Daemon", "METHODS", "serve", "serve_socket", "serve_stdio"]
@@ -18,25 +18,11 @@ from doctrans.pure_utils import (
     quote,
     simple_types,
 )
+from doctrans.type_utils import mentions_str
 
 NoneStr = "```(None)```" if PY_GTE_3_9 else "```None```"
 
 
-def ast_parse_fix(s):
-    """
-    Hack to resolve unbalanced parentheses SyntaxError acquired from PyTorch parsing
-    TODO: remove
-
-    :param s: String to parse
-    :type s: ```str```
-
-    :returns: Value
-    """
-    # return ast.parse(s).body[0].value
-    balanced = (s.count("[") + s.count("]")) & 1 == 0
-    return ast.parse(s if balanced else "{}]".format(s)).body[0].value
-
-
 def needs_quoting(typ):
     """
     Figures out whether values with this type need quoting
@@ -54,21 +40,7 @@ def needs_quoting(typ):
     elif typ == "Optional[str]":
         return True
 
-    typ = typ.replace("\n", "").strip()
-    parsed_typ_ast = ast_parse_fix(typ)
-    if isinstance(parsed_typ_ast, ast.Name):
-        return parsed_typ_ast.id == "str"
-
-    return any(
-        filter(
-            lambda node: isinstance(node, ast.Str)
-            or isinstance(node, ast.Constant)
-            and type(node.value).__name__ == "str"
-            or isinstance(node, ast.Name)
-            and node.id == "str",
-            ast.walk(parsed_typ_ast),
-        )
-    )
+    return mentions_str(typ.replace("\n", "").strip())
 
 
 def extract_default(
@@ -348,6 +320,7 @@ def set_default_doc(param, emit_default_doc=True):
     # if param is None: param = {"doc": "", "typ": "Any"}
     if _param is None or "doc" not in _param:
         return name, _param
+    _param = dict(_param)
     has_defaults = "Defaults" in _param["doc"] or "defaults" in _param["doc"]
 
     if has_defaults and not emit_default_doc:
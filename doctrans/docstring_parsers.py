@@ -9,11 +9,12 @@ Translates from the [numpydoc docstring format](https://numpydoc.readthedocs.io/
 Translates from [Google's docstring format](https://google.github.io/styleguide/pyguide.html)
 """
 import ast
+import re
 from ast import AST
 from collections import OrderedDict
 from copy import deepcopy
 from enum import Enum
-from functools import partial
+from functools import lru_cache, partial
 from itertools import takewhile
 from operator import attrgetter, contains, eq, le
 from typing import Dict, List, Tuple
@@ -339,10 +340,26 @@ def _return_parse_phase_numpydoc_and_google(return_tokens, scanned, stacker, sty
     return stacker
 
 
+@lru_cache(maxsize=8)
+def _tokens_regex(tokens):
+    """
+    Compile a regex which matches any of the given tokens
+
+    :param tokens: Valid tokens like `(":param", ":rtype")`
+    :type tokens: ```Tuple[str]```
+
+    :returns: Compiled alternation of the escaped tokens
+    :rtype: ```re.Pattern```
+    """
+    return re.compile("|".join(map(re.escape, tokens)))
+
+
 def _scan_phase_rest(docstring, arg_tokens, return_tokens):
     """
     Scanner phase. Lexical analysis; to some degree…
 
+    Single pass over the docstring, splitting just before every occurrence of a token.
+
     :param docstring: the docstring
     :type docstring: ```str```
 
@@ -355,29 +372,19 @@ def _scan_phase_rest(docstring, arg_tokens, return_tokens):
     :returns: List with each element a tuple of (whether value is a token, value)
     :rtype: ```List[Tuple[bool, str]]```
     """
-
-    rev_known_tokens_t = tuple(map(tuple, map(reversed, arg_tokens + return_tokens)))
+    known_tokens = arg_tokens + return_tokens
     scanned: List[Tuple[bool, str]] = []
-    stack: List[str] = []
-
-    for ch in docstring:
-        stack.append(ch)
-
-        stack_rev = stack[::-1]
+    start = 0
 
-        for token in rev_known_tokens_t:
-            token_len = len(token)
-            if tuple(stack_rev[:token_len]) == token:
-                scanned.append((bool(len(scanned)), "".join(stack[:-token_len])))
-                stack = stack[len(scanned[-1][1]) :][:token_len]
-                continue
+    for match in _tokens_regex(known_tokens).finditer(docstring):
+        scanned.append((bool(scanned), docstring[start : match.start()]))
+        start = match.start()
 
-    if stack:
-        final = "".join(stack)
+    if start < len(docstring):
+        final = docstring[start:]
         scanned.append(
             (
-                bool(scanned and scanned[-1][0])
-                or any(map(final.startswith, arg_tokens + return_tokens)),
+                bool(scanned and scanned[-1][0]) or final.startswith(known_tokens),
                 final,
             )
         )
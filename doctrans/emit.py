@@ -19,12 +19,14 @@ from ast import (
     keyword,
 )
 from collections import OrderedDict
+from contextlib import contextmanager
 from functools import partial
 from itertools import chain
+from os import chmod, close, path, remove, replace, umask
+from shutil import copyfile, copymode
+from tempfile import mkstemp
 from textwrap import indent
 
-from black import Mode, format_str
-
 from doctrans.ast_utils import (
     get_value,
     maybe_type_comment,
@@ -43,6 +45,8 @@ from doctrans.emitter_utils import (
     param_to_sqlalchemy_column_call,
     to_docstring,
 )
+from doctrans.file_hashes import FileHashes, source_digest
+from doctrans.formatter import formatter
 from doctrans.pure_utils import (
     PY3_8,
     code_quoted,
@@ -54,7 +58,61 @@ from doctrans.pure_utils import (
     simple_types,
     tab,
 )
-from doctrans.source_transformer import to_code
+from doctrans.source_transformer import splice_source, to_code
+
+# Targets of `all_targets`, in the order they are emitted by default
+TARGETS = "class_", "function", "argparse_function", "json_schema", "sqlalchemy"
+
+# The process's umask, which can only be read by setting it, so read once here rather than racing on every write
+_umask = umask(0)
+umask(_umask)
+
+
+def all_targets(intermediate_repr, targets=TARGETS, **target_kwargs):
+    """
+    Emit the IR to each of the targets, in order. A convenience over calling each `emit` function in turn:
+     nothing is derived here once for all targets, the IR is simply read (unchanged and uncopied) by every emitter.
+
+    :param intermediate_repr: a dictionary of form
+        {  "name": Optional[str],
+           "type": Optional[str],
+           "doc": Optional[str],
+           "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+           "returns": Optional[OrderedDict[Literal['return_type'],
+                                           {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+    :type intermediate_repr: ```Union[dict, IR]```
+
+    :param targets: Names of the `emit` functions to emit with
+    :type targets: ```Iterable[Literal['argparse_function', 'class_', 'docstring', 'function', 'json_schema',
+                                       'sqlalchemy_table', 'sqlalchemy']]```
+
+    :param target_kwargs: Keyword arguments for the `emit` function of each target, e.g., `class_={"emit_call": True}`
+    :type target_kwargs: ```**dict```
+
+    :returns: target -> what its `emit` function returned
+    :rtype: ```OrderedDict```
+    """
+    emitters = {
+        "argparse_function": argparse_function,
+        "class_": class_,
+        "docstring": docstring,
+        "function": partial(function, function_name=None, function_type=None),
+        "json_schema": json_schema,
+        "sqlalchemy_table": sqlalchemy_table,
+        "sqlalchemy": sqlalchemy,
+    }
+    unknown = frozenset(targets) - frozenset(emitters)
+    if unknown:
+        raise ValueError("Unknown targets: {}".format(", ".join(sorted(unknown))))
+    return OrderedDict(
+        map(
+            lambda target: (
+                target,
+                emitters[target](intermediate_repr, **target_kwargs.get(target, {})),
+            ),
+            targets,
+        )
+    )
 
 
 def argparse_function(
@@ -76,7 +134,7 @@ def argparse_function(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
 
     :param emit_default_doc: Whether help/docstring should include 'With default' text
     :type emit_default_doc: ```bool```
@@ -323,7 +381,7 @@ def class_(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
 
     :param emit_call: Whether to emit a `__call__` method from the `_internal` IR subdict
     :type emit_call: ```bool```
@@ -360,7 +418,12 @@ def class_(
 
     param_names = frozenset(intermediate_repr["params"].keys())
     if returns:
-        intermediate_repr["params"].update(returns)
+        intermediate_repr = dict(
+            intermediate_repr,
+            params=OrderedDict(
+                chain(intermediate_repr["params"].items(), returns.items())
+            ),
+        )
         del intermediate_repr["returns"]
 
     internal_body = intermediate_repr.get("_internal", {}).get("body", [])
@@ -466,7 +529,7 @@ def docstring(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
 
     :param docstring_format: Format of docstring
     :type docstring_format: ```Literal['rest', 'numpydoc', 'google']```
@@ -534,7 +597,7 @@ def docstring(
     )
 
 
-def file(node, filename, mode="a", skip_black=False):
+def file(node, filename, mode="a", skip_black=False, hash_dir=None):
     """
     Convert AST to a file
 
@@ -550,26 +613,111 @@ def file(node, filename, mode="a", skip_black=False):
     :param skip_black: Whether to skip formatting with black
     :type skip_black: ```bool```
 
+    :param hash_dir: Directory recording what was last emitted to each file. When given, and not appending,
+      formatting and writing are skipped if this exact source was last emitted to the unchanged `filename`.
+    :type hash_dir: ```Optional[str]```
+
     :returns: None
     :rtype: ```NoneType```
     """
     if not isinstance(node, Module):
         node = Module(body=[node], type_ignores=[], stmt=None)
     src = to_code(node)
+    file_hashes = (
+        None if hash_dir is None or mode.startswith("a") else FileHashes(hash_dir)
+    )
+    if file_hashes is not None:
+        src_digest = source_digest(src, skip_black)
+        if file_hashes.unchanged(filename, src_digest):
+            return
     if not skip_black:
-        src = format_str(
-            src,
-            mode=Mode(
-                target_versions=set(),
-                line_length=119,
-                is_pyi=False,
-                string_normalization=False,
-            ),
-        )
-    with open(filename, mode) as f:
+        src = formatter.format(src)
+    _write_atomically(filename, src, mode)
+    if file_hashes is not None:
+        file_hashes.record(filename, src_digest)
+
+
+def splice(replacements, filename, source, skip_black=False):
+    """
+    Replace just the source text of each node in the file—the whole lines it spans, decorators included—by the
+     source of its replacement; leaving the rest of the file as written. See `splice_source`.
+
+    :param replacements: (node parsed from `source`, node to replace it with) pairs. Each node must start a line
+      and end one, which is unknown before Python 3.8.
+    :type replacements: ```Iterable[Tuple[AST, AST]]```
+
+    :param filename: emit to this file
+    :type filename: ```str```
+
+    :param source: The source of `filename`, which the nodes were parsed from
+    :type source: ```str```
+
+    :param skip_black: Whether to skip formatting the replacements with black
+    :type skip_black: ```bool```
+
+    :raises ValueError: If any node can't be spliced: it has no position, shares a line with other code,
+      is indented, or overlaps another. Then nothing is written.
+
+    :returns: None
+    :rtype: ```NoneType```
+    """
+    _write_atomically(
+        filename, splice_source(replacements, source, skip_black=skip_black), "wt"
+    )
+
+
+def _write_atomically(filename, src, mode):
+    """
+    Write to a temporary file in the same directory then rename it over `filename`,
+     so concurrent readers never see a partially written file
+
+    :param filename: emit to this file
+    :type filename: ```str```
+
+    :param src: Contents to write
+    :type src: ```str```
+
+    :param mode: Mode to open the file in, e.g., 'wt' to overwrite or 'a' to append
+    :type mode: ```str```
+    """
+    with _atomic_open(filename, mode) as f:
         f.write(src)
 
 
+@contextmanager
+def _atomic_open(filename, mode):
+    """
+    Open a temporary file in the same directory, which is renamed over `filename` once closed without error,
+     so concurrent readers never see a partially written file. A symlinked `filename` is resolved, so the link's
+     target is replaced rather than the link.
+
+    :param filename: emit to this file
+    :type filename: ```str```
+
+    :param mode: Mode to open the file in, e.g., 'wt' to overwrite or 'a' to append
+    :type mode: ```str```
+
+    :returns: The open temporary file
+    :rtype: ```TextIO```
+    """
+    filename = path.realpath(filename)
+    fd, tmp = mkstemp(dir=path.dirname(filename), suffix=".tmp")
+    close(fd)
+    try:
+        if path.isfile(filename):
+            if mode.startswith("a"):
+                copyfile(filename, tmp)
+            copymode(filename, tmp)
+        else:
+            chmod(tmp, 0o666 & ~_umask)
+        with open(tmp, mode) as f:
+            yield f
+        replace(tmp, filename)
+    except BaseException:
+        remove(tmp)
+        raise
+
+
 def function(
     intermediate_repr,
     function_name,
@@ -592,7 +740,7 @@ def function(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
 
     :param function_name: name of function_def
     :type function_name: ```Optional[str]```
@@ -765,7 +913,7 @@ def json_schema(intermediate_repr):
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
     """
     required = []
     _param2json_schema_property = partial(param2json_schema_property, required=required)
@@ -812,7 +960,7 @@ def sqlalchemy_table(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
 
     :param name: name of binding + table
     :type name: ```str```
@@ -907,7 +1055,7 @@ def sqlalchemy(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :type intermediate_repr: ```dict```
+    :type intermediate_repr: ```Union[dict, IR]```
 
     :param emit_repr: Whether to generate a `__repr__` method
     :type emit_repr: ```bool```
@@ -1017,11 +1165,14 @@ def sqlalchemy(
 
 
 __all__ = [
+    "TARGETS",
+    "all_targets",
     "argparse_function",
     "class_",
     "docstring",
     "file",
     "function",
+    "splice",
     "sqlalchemy_table",
     "sqlalchemy",
 ]
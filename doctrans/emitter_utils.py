@@ -14,7 +14,10 @@ from ast import (
     arguments,
     keyword,
 )
-from functools import partial
+from collections.abc import Mapping
+from copy import copy
+from functools import lru_cache, partial
+from operator import is_not
 from textwrap import indent
 from typing import Any
 
@@ -43,6 +46,7 @@ from doctrans.pure_utils import (
     update_d,
 )
 from doctrans.source_transformer import to_code
+from doctrans.type_utils import TYPE_CACHE_SIZE, literal_values, unwrap_optional
 from doctrans.tests.mocks.docstrings import (
     docstring_repr_google_str,
     docstring_repr_str,
@@ -407,7 +411,7 @@ def to_docstring(
     :returns: docstring
     :rtype: ```str```
     """
-    assert isinstance(intermediate_repr, dict), "Expected 'dict' got `{!r}`".format(
+    assert isinstance(intermediate_repr, Mapping), "Expected 'dict' got `{!r}`".format(
         type(intermediate_repr).__name__
     )
     if docstring_format != "rest":
@@ -458,7 +462,7 @@ def to_docstring(
         assert isinstance(param, tuple), "Expected 'tuple' got `{!r}`".format(
             type(param).__name__
         )
-        name, _param = param
+        name, _param = param[0], dict(param[1])
         del param
         if "doc" in _param:
             doc, default = extract_default(
@@ -590,7 +594,8 @@ def to_docstring(
 class RewriteName(ast.NodeTransformer):
     """
     A :class:`NodeTransformer` subclass that walks the abstract syntax tree and
-    allows modification of nodes. Here it modifies parameter names to be `self.param_name`
+    allows modification of nodes. Here it modifies parameter names to be `self.param_name`.
+    Copy-on-write: the input is left unchanged, with only the nodes above a rename copied, so it may be shared.
     """
 
     def __init__(self, node_ids):
@@ -616,9 +621,43 @@ class RewriteName(ast.NodeTransformer):
         return (
             Attribute(Name("self", Load()), node.id, Load())
             if not self.node_ids or node.id in self.node_ids
-            else ast.NodeTransformer.generic_visit(self, node)
+            else self.generic_visit(node)
         )
 
+    def generic_visit(self, node):
+        """
+        Visit the children of the node, copying it iff any child changed
+
+        :param node: The AST node
+        :type node: ```AST```
+
+        :returns: `node` if no child changed else a shallow copy of it with the changed children
+        :rtype: ```AST```
+        """
+        changed = {}
+        for field, old_value in ast.iter_fields(node):
+            if isinstance(old_value, list):
+                new_value = list(
+                    map(
+                        lambda value: self.visit(value)
+                        if isinstance(value, ast.AST)
+                        else value,
+                        old_value,
+                    )
+                )
+                if any(map(is_not, new_value, old_value)):
+                    changed[field] = new_value
+            elif isinstance(old_value, ast.AST):
+                new_value = self.visit(old_value)
+                if new_value is not old_value:
+                    changed[field] = new_value
+        if not changed:
+            return node
+        node = copy(node)
+        for field, new_value in changed.items():
+            setattr(node, field, new_value)
+        return node
+
 
 def _make_call_meth(body, return_type, param_names, docstring_format, word_wrap):
     """
@@ -653,7 +692,7 @@ def _make_call_meth(body, return_type, param_names, docstring_format, word_wrap)
     #     else None
     # )
     if body_len:
-        if isinstance(body, dict):
+        if isinstance(body, Mapping):
             body = list(
                 filter(
                     None,
@@ -765,34 +804,72 @@ def param2json_schema_property(param, required):
     :returns: JSON schema property. Also may push to `required`.
     :rtype: ```dict```
     """
-    name, _param = param
+    name, _param = param[0], dict(param[1])
     del param
 
     if _param.get("doc"):
         _param["description"] = _param.pop("doc")
     if _param.get("typ", ast) is not ast:
-        _param["type"] = _param.pop("typ")
-        if _param["type"].startswith("Optional["):
-            _param["type"] = _param["type"][len("Optional[") : -1]
-        else:
+        json_type, enum, optional = typ2json_schema(_param.pop("typ"))
+        if not optional:
             required.append(name)
-
-        if _param["type"].startswith("Literal["):
-            parsed_typ = get_value(ast.parse(_param["type"]).body[0])
-            assert (
-                parsed_typ.value.id == "Literal"
-            ), "Only basic Literal support is implemented, not {}".format(
-                parsed_typ.value.id
-            )
-            _param["enum"] = list(map(get_value, get_value(parsed_typ.slice).elts))
-            _param["type"] = typ2json_type[type(_param["enum"][0]).__name__]
-        else:
-            _param["type"] = typ2json_type[_param["type"]]
+        if enum is not None:
+            _param["enum"] = list(enum)
+        _param["type"] = json_type
     if _param.get("default", False) in none_types:
         del _param["default"]  # Will be inferred as `null` from the type
     return name, _param
 
 
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def typ2json_schema(typ):
+    """
+    Map the type to its JSON schema type
+
+    :param typ: The type, e.g., `Optional[Literal['a', 'b']]`
+    :type typ: ```str```
+
+    :returns: JSON schema type, the values of the enum (if a `Literal`), whether the type is `Optional`
+    :rtype: ```Tuple[str, Optional[tuple], bool]```
+    """
+    typ, optional = unwrap_optional(typ)
+    if typ.startswith("Literal["):
+        enum = _literal_values(typ)
+        return typ2json_type[type(enum[0]).__name__], enum, optional
+    return typ2json_type[typ], None, optional
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def typ2column(typ):
+    """
+    Map the (non-`Optional`) type to its SQLalchemy column type
+
+    :param typ: The type, e.g., `Literal['a', 'b']`
+    :type typ: ```str```
+
+    :returns: Name of the column type (None if an enum), the values of the enum (if a `Literal`)
+    :rtype: ```Tuple[Optional[str], Optional[tuple]]```
+    """
+    if "Literal[" in typ:
+        return None, _literal_values(typ)
+    return typ2column_type[typ], None
+
+
+def _literal_values(typ):
+    """
+    :param typ: The type, e.g., `Literal['a', 'b']`
+    :type typ: ```str```
+
+    :returns: The values of the `Literal`
+    :rtype: ```tuple```
+    """
+    values = literal_values(typ)
+    assert (
+        values is not None
+    ), "Only basic Literal support is implemented, not {}".format(typ)
+    return values
+
+
 def param_to_sqlalchemy_column_call(param, include_name):
     """
     Turn a param into a `Column(…)`
@@ -807,29 +884,24 @@ def param_to_sqlalchemy_column_call(param, include_name):
     :rtype: ```Call```
     """
     print("param_to_sqlalchemy_column_call::include_name:", include_name, ";")
-    name, _param = param
+    name, _param = param[0], dict(param[1])
     del param
 
     args, keywords, nullable = [], [], None
 
-    if _param["typ"].startswith("Optional["):
-        _param["typ"] = _param["typ"][len("Optional[") : -1]
+    _param["typ"], optional = unwrap_optional(_param["typ"])
+    if optional:
         nullable = True
 
     if include_name:
         args.append(set_value(name))
 
-    if "Literal[" in _param["typ"]:
-        parsed_typ = get_value(ast.parse(_param["typ"]).body[0])
-        assert (
-            parsed_typ.value.id == "Literal"
-        ), "Only basic Literal support is implemented, not {}".format(
-            parsed_typ.value.id
-        )
+    column_type, enum = typ2column(_param["typ"])
+    if enum is not None:
         args.append(
             Call(
                 func=Name("Enum", Load()),
-                args=get_value(parsed_typ.slice).elts,
+                args=list(map(set_value, enum)),
                 keywords=[keyword(arg="name", value=set_value(name), identifier=None)],
                 expr=None,
                 expr_func=None,
@@ -837,7 +909,7 @@ def param_to_sqlalchemy_column_call(param, include_name):
         )
 
     else:
-        args.append(Name(typ2column_type[_param["typ"]], Load()))
+        args.append(Name(column_type, Load()))
 
     has_default = _param.get("default", ast) is not ast
     pk = _param.get("doc", "").startswith("[PK]")
@@ -976,4 +1048,6 @@ __all__ = [
     "parse_out_param",
     "param_to_sqlalchemy_column_call",
     "to_docstring",
+    "typ2column",
+    "typ2json_schema",
 ]
@@ -0,0 +1,189 @@
+"""
+Record of what was last emitted to each destination, so that no-op emits skip formatting and writing
+"""
+
+from hashlib import sha256
+from json import dump, load
+from os import makedirs, path, replace
+from tempfile import mkstemp
+
+from doctrans import __version__
+
+
+def source_digest(src, skip_black):
+    """
+    Digest of the unformatted source to emit, along with everything else that determines the emitted file
+
+    :param src: Python source, before formatting
+    :type src: ```str```
+
+    :param skip_black: Whether formatting with black is skipped
+    :type skip_black: ```bool```
+
+    :returns: Hex digest which is only equal for equal source and formatting
+    :rtype: ```str```
+    """
+    return sha256(
+        "\0".join((__version__, str(skip_black), src)).encode("utf8")
+    ).hexdigest()
+
+
+def file_digest(filename):
+    """
+    :param filename: Location of file
+    :type filename: ```str```
+
+    :returns: Hex digest of the file's contents, or None if it cannot be read
+    :rtype: ```Optional[str]```
+    """
+    try:
+        with open(filename, "rb") as f:
+            return sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class FileHashes(object):
+    """
+    Per-destination record of the source digest last emitted, and of the file digest it produced;
+     along with records of targets within the file, which are valid while the file is unchanged.
+    One JSON file per destination, named by the digest of its real path, so concurrent emitters don't contend.
+
+    :ivar hash_dir: Directory holding the records
+    """
+
+    def __init__(self, hash_dir):
+        """
+        :param hash_dir: Directory holding the records. Created if nonexistent.
+        :type hash_dir: ```str```
+        """
+        self.hash_dir = path.realpath(path.expanduser(hash_dir))
+        makedirs(self.hash_dir, exist_ok=True)
+
+    def _entry(self, filename):
+        """
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :returns: Filename of the record
+        :rtype: ```str```
+        """
+        return path.join(
+            self.hash_dir,
+            "{digest}.json".format(
+                digest=sha256(
+                    path.realpath(path.expanduser(filename)).encode("utf8")
+                ).hexdigest()
+            ),
+        )
+
+    def _load(self, filename):
+        """
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :returns: The record of the destination, or an empty one if nonexistent or unreadable
+        :rtype: ```dict```
+        """
+        try:
+            with open(self._entry(filename), "rt") as f:
+                return load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _dump(self, filename, record):
+        """
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :param record: The record of the destination
+        :type record: ```dict```
+        """
+        fd, tmp = mkstemp(dir=self.hash_dir, suffix=".tmp")
+        with open(fd, "wt") as f:
+            dump(record, f)
+        replace(tmp, self._entry(filename))
+
+    def unchanged(self, filename, src_digest):
+        """
+        Whether emitting the source would leave the destination as it is
+
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :param src_digest: Digest of the source to emit, from `source_digest`
+        :type src_digest: ```str```
+
+        :returns: Whether `src_digest` was last emitted to `filename`, and the file hasn't changed since
+        :rtype: ```bool```
+        """
+        record = self._load(filename)
+        return record.get("source") == src_digest and record.get("file") == file_digest(
+            filename
+        )
+
+    def record(self, filename, src_digest):
+        """
+        Record that the source was emitted to the destination, along with the digest of the emitted file.
+        The targets recorded stay, if the file is as it was.
+
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :param src_digest: Digest of the emitted source, from `source_digest`
+        :type src_digest: ```str```
+        """
+        record, digest = self._load(filename), file_digest(filename)
+        self._dump(
+            filename,
+            {
+                "source": src_digest,
+                "file": digest,
+                "targets": record.get("targets", {})
+                if record.get("file") == digest
+                else {},
+            },
+        )
+
+    def target(self, filename, target):
+        """
+        The record of a target within the destination, e.g., a class conformed to its truth
+
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :param target: Name of the target, e.g., `"class_:ConfigClass"`
+        :type target: ```str```
+
+        :returns: What was recorded of the target, if the file hasn't changed since; else None
+        :rtype: ```Optional[dict]```
+        """
+        record = self._load(filename)
+        return (
+            record.get("targets", {}).get(target)
+            if record.get("file") == file_digest(filename)
+            else None
+        )
+
+    def record_target(self, filename, target, target_record):
+        """
+        Record a target within the destination, along with the digest of the file. The other targets recorded
+         stay, if the file is as it was.
+
+        :param filename: Destination file
+        :type filename: ```str```
+
+        :param target: Name of the target, e.g., `"class_:ConfigClass"`
+        :type target: ```str```
+
+        :param target_record: JSON serialisable record of the target
+        :type target_record: ```dict```
+        """
+        record, digest = self._load(filename), file_digest(filename)
+        if record.get("file") != digest:
+            record = {"file": digest}
+        record.setdefault("targets", {})[target] = target_record
+        self._dump(filename, record)
+
+
+__all__ = ["FileHashes", "file_digest", "source_digest"]
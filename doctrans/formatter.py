@@ -0,0 +1,181 @@
+"""
+Formatting service: keeps black loaded, and memoizes its output
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+
+DEFAULT_MAX_SIZE = 256
+
+_black = None
+
+
+def get_black():
+    """
+    Import black once, on first use
+
+    :returns: The black module
+    :rtype: ```Module```
+    """
+    global _black
+    if _black is None:
+        import black
+
+        _black = black
+    return _black
+
+
+def default_mode():
+    """
+    :returns: The black mode used throughout doctrans
+    :rtype: ```black.Mode```
+    """
+    return get_black().Mode(
+        target_versions=set(),
+        line_length=119,
+        is_pyi=False,
+        string_normalization=False,
+    )
+
+
+def _format_str(src, mode):
+    """
+    Format the source with black. Top-level so that it can be run in worker processes.
+
+    :param src: Python source
+    :type src: ```str```
+
+    :param mode: black mode
+    :type mode: ```black.Mode```
+
+    :returns: Formatted Python source
+    :rtype: ```str```
+    """
+    return get_black().format_str(src, mode=mode)
+
+
+class Formatter(object):
+    """
+    Memoizes black's output by (source hash, mode), evicting the least recently used beyond `max_size` results
+
+    :ivar max_size: Maximum number of formatted sources to keep
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param max_size: Maximum number of formatted sources to keep
+        :type max_size: ```int```
+        """
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(src, mode):
+        """
+        :param src: Python source
+        :type src: ```str```
+
+        :param mode: black mode
+        :type mode: ```black.Mode```
+
+        :returns: Key which is only equal for equal source and mode
+        :rtype: ```Tuple[str, str]```
+        """
+        return sha256(src.encode("utf8")).hexdigest(), mode.get_cache_key()
+
+    def _get(self, key):
+        """
+        :param key: Key from `_key`
+        :type key: ```Tuple[str, str]```
+
+        :returns: Formatted source if memoized else None
+        :rtype: ```Optional[str]```
+        """
+        with self._lock:
+            formatted = self._cache.get(key)
+            if formatted is not None:
+                self._cache.move_to_end(key)
+            return formatted
+
+    def _set(self, key, formatted):
+        """
+        :param key: Key from `_key`
+        :type key: ```Tuple[str, str]```
+
+        :param formatted: Formatted source
+        :type formatted: ```str```
+        """
+        with self._lock:
+            self._cache[key] = formatted
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def format(self, src, mode=None):
+        """
+        Format the source with black, memoized
+
+        :param src: Python source
+        :type src: ```str```
+
+        :param mode: black mode, defaults to `default_mode()`
+        :type mode: ```Optional[black.Mode]```
+
+        :returns: Formatted Python source
+        :rtype: ```str```
+        """
+        mode = mode or default_mode()
+        key = self._key(src, mode)
+        formatted = self._get(key)
+        if formatted is None:
+            formatted = _format_str(src, mode)
+            self._set(key, formatted)
+        return formatted
+
+    def format_many(self, sources, mode=None, jobs=1):
+        """
+        Format many sources with black, memoized, formatting the distinct uncached ones over a process pool
+
+        :param sources: Python sources
+        :type sources: ```Iterable[str]```
+
+        :param mode: black mode, defaults to `default_mode()`
+        :type mode: ```Optional[black.Mode]```
+
+        :param jobs: Number of processes to format with
+        :type jobs: ```int```
+
+        :returns: Formatted Python sources, in the order of `sources`
+        :rtype: ```List[str]```
+        """
+        mode = mode or default_mode()
+        sources = list(sources)
+        keys = list(map(lambda src: self._key(src, mode), sources))
+        formatted = dict(
+            filter(
+                lambda key_fmt: key_fmt[1] is not None, zip(keys, map(self._get, keys))
+            )
+        )
+        misses = OrderedDict(
+            (key, src) for key, src in zip(keys, sources) if key not in formatted
+        )
+        if jobs > 1 and len(misses) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(
+                    executor.map(_format_str, misses.values(), (mode,) * len(misses))
+                )
+        else:
+            results = list(map(lambda src: _format_str(src, mode), misses.values()))
+        for key, result in zip(misses.keys(), results):
+            self._set(key, result)
+            formatted[key] = result
+        return list(map(formatted.__getitem__, keys))
+
+
+formatter = Formatter()
+
+__all__ = ["DEFAULT_MAX_SIZE", "Formatter", "default_mode", "formatter", "get_black"]
@@ -3,14 +3,35 @@ Functionality to generate classes, functions, and/or argparse functions from the
 """
 
 import ast
-from ast import Assign, FunctionDef, Import, ImportFrom, Module, Name, Store
-from inspect import getfile, isfunction
+from ast import (
+    Assign,
+    Import,
+    ImportFrom,
+    List,
+    Load,
+    Module,
+    Name,
+    Store,
+)
+from contextlib import ExitStack
+from functools import partial
+from inspect import getfile, ismodule
 from itertools import chain
 from operator import itemgetter
 from os import path
+from shutil import copyfileobj
+from tempfile import TemporaryFile
 
 from doctrans import emit, parse
-from doctrans.ast_utils import get_at_root, maybe_type_comment, set_value
+from doctrans.ast_utils import (
+    get_at_root,
+    maybe_type_comment,
+    names_used,
+    prune_unused_imports,
+    set_value,
+)
+from doctrans.emit import _atomic_open
+from doctrans.formatter import formatter
 from doctrans.pure_utils import get_module
 from doctrans.source_transformer import to_code
 
@@ -25,6 +46,8 @@ def gen(
     emit_call=False,
     emit_default_doc=True,
     decorator_list=None,
+    jobs=1,
+    prune_imports=False,
 ):
     """
     Generate classes, functions, and/or argparse functions from the input mapping
@@ -32,7 +55,8 @@ def gen(
     :param name_tpl: Template for the name, e.g., `{name}Config`.
     :type name_tpl: ```str```
 
-    :param input_mapping: Import location of dictionary/mapping/2-tuple collection.
+    :param input_mapping: Import location of dictionary/mapping/2-tuple collection; or of a module, to generate
+      from its public classes and functions.
     :type input_mapping: ```str```
 
     :param type_: What type to generate.
@@ -56,177 +80,309 @@ def gen(
 
     :param decorator_list: List of decorators
     :type decorator_list: ```Optional[Union[List[Str], List[]]]```
+
+    :param jobs: Number of processes to generate with. When above 1 each entry is parsed, emitted, and formatted
+      in its own process, with the results streamed to `output_filename` in order, rather than held in memory.
+    :type jobs: ```int```
+
+    :param prune_imports: Whether to drop the imports (from `prepend` and `imports_from_file`) of names that the
+      generated module doesn't use, akin to `autoflake --remove-all-unused-imports`
+    :type prune_imports: ```bool```
     """
-    extra_symbols = {}
-    if imports_from_file is None:
-        imports = ""
-    else:
+    extra_symbols, imports = {}, []
+    if imports_from_file is not None:
         if prepend:
-            prepend_imports = get_at_root(
-                ast.parse(prepend.strip()), (Import, ImportFrom)
-            )
-
-            # def rewrite_typings(node):
-            #     """
-            #     Python < 3.8 must use `typings_extensions` for `Literal`
-            #
-            #     :param node: import node
-            #     :type node: ```Union[Import, ImportFrom]```
-            #
-            #     :returns: The import potentially rewritten or None
-            #     :rtype: ```Optional[Union[Import, ImportFrom]]```
-            #     """
-            #     if isinstance(node, ImportFrom) and node.module == "typing":
-            #         len_names = len(node.names)
-            #         if len_names == 1 and node.names[0].name == "Literal":
-            #             rewrite_typings.found_literal = True
-            #             return None
-            #         else:
-            #             node.names = list(
-            #                 filter(
-            #                     None,
-            #                     map(
-            #                         lambda _alias: None
-            #                         if _alias.name == "Literal"
-            #                         else _alias,
-            #                         node.names,
-            #                     ),
-            #                 )
-            #             )
-            #             if len(node.names) != len_names:
-            #                 rewrite_typings.found_literal = True
-            #     return node
-            #
-            # rewrite_typings.found_literal = False
-            # prepend_imports = list(filter(None, map(rewrite_typings, prepend_imports)))
-            # if rewrite_typings.found_literal:
-            #     prepend_imports.append(
-            #         ImportFrom(
-            #             level=0,
-            #             module="typing_extensions"
-            #             if sys.version_info[:2] < (3, 8)
-            #             else "typing",
-            #             names=[alias(asname=None, name="Literal")],
-            #             lineno=None,
-            #             col_offset=None,
-            #         )
-            #     )
-
-            eval(
-                compile(
-                    to_code(
-                        ast.fix_missing_locations(
-                            Module(body=prepend_imports, stmt=None, type_ignores=[])
-                        )
-                    ),
-                    filename="<string>",
-                    mode="exec",
-                ),
-                extra_symbols,
-            )
-            # This leaks to the global scope
-            globals().update(extra_symbols)
+            extra_symbols = _prepend_symbols(prepend)
         with open(
             imports_from_file
             if path.isfile(imports_from_file)
             else getfile(get_module(imports_from_file, extra_symbols=extra_symbols)),
             "rt",
         ) as f:
-            imports = "".join(
-                map(to_code, get_at_root(ast.parse(f.read()), (Import, ImportFrom)))
-            )
+            imports = get_at_root(ast.parse(f.read()), (Import, ImportFrom))
+    header = (ast.parse(prepend).body if prepend else []) + imports
 
-    module_path, _, symbol_name = input_mapping.rpartition(".")
-    input_mapping = getattr(
-        get_module(module_path, extra_symbols=extra_symbols), symbol_name
-    )
-    input_mapping_it = (
-        input_mapping.items() if hasattr(input_mapping, "items") else input_mapping
-    )
+    input_mapping_it = _load_input_mapping(input_mapping, extra_symbols)
 
-    global__all__ = []
-    content = "{prepend}{imports}\n{functions_and_classes}\n{__all}".format(
-        prepend="" if prepend is None else prepend,
-        imports=imports,  # TODO: Optimize imports programmatically (akin to `autoflake --remove-all-unused-imports`)
-        functions_and_classes="\n\n".join(
-            print("Generating: {!r}".format(name))
-            or global__all__.append(name_tpl.format(name=name))
-            or to_code(
-                getattr(
-                    emit,
-                    type_.replace("class", "class_").replace(
-                        "argparse", "argparse_function"
+    if jobs > 1:
+        return _gen_in_parallel(
+            name_tpl,
+            input_mapping,
+            tuple(map(itemgetter(0), input_mapping_it)),
+            type_,
+            output_filename,
+            header,
+            # As above, `prepend` is only evaluated to resolve the input mapping alongside `imports_from_file`
+            prepend if imports_from_file is not None and prepend else None,
+            jobs,
+            prune_imports,
+            emit_call=emit_call,
+            emit_default_doc=emit_default_doc,
+            decorator_list=decorator_list,
+        )
+
+    # Assembled as AST, so that it's only unparsed once: when written
+    module = Module(
+        body=list(
+            chain(
+                header,
+                map(
+                    lambda name_ir: print("Generating: {!r}".format(name_ir[0]))
+                    or _emit_entry(
+                        *name_ir,
+                        name_tpl=name_tpl,
+                        type_=type_,
+                        emit_call=emit_call,
+                        emit_default_doc=emit_default_doc,
+                        decorator_list=decorator_list
                     ),
-                )(
-                    (
-                        lambda is_func: getattr(
-                            parse,
-                            "function" if is_func else "class_",
-                        )(
-                            obj,
-                            **{} if is_func else {"merge_inner_function": "__init__"}
-                        )
-                    )(
-                        isinstance(obj, FunctionDef) or isfunction(obj)
-                    ),  # TODO: Figure out if it's a function or argparse function
-                    emit_default_doc=emit_default_doc,
-                    **(
-                        lambda _name: {
-                            "class": {
-                                "class_name": _name,
-                                "decorator_list": decorator_list,
-                                "emit_call": emit_call,
-                            },
-                            "function": {
-                                "function_name": _name,
-                            },
-                            "argparse": {"function_name": _name},
-                        }[type_]
-                    )(name_tpl.format(name=name))
-                )
-            )
-            for name, obj in input_mapping_it
-        ),
-        __all=to_code(
-            Assign(
-                targets=[Name("__all__", Store())],
-                value=ast.parse(  # `TypeError: Type List cannot be instantiated; use list() instead`
-                    str(
+                    zip(
+                        map(itemgetter(0), input_mapping_it),
+                        _parse_entries(map(itemgetter(1), input_mapping_it)),
+                    ),
+                ),
+                (
+                    _all_assign(
                         list(
                             map(
-                                lambda s: s.rstrip("\n").strip("'").strip('"'),
-                                map(to_code, map(set_value, global__all__)),
+                                lambda name_obj: name_tpl.format(name=name_obj[0]),
+                                input_mapping_it,
                             )
                         )
-                    )
-                )
-                .body[0]
-                .value,
-                expr=None,
-                lineno=None,
-                **maybe_type_comment
+                    ),
+                ),
             )
         ),
+        type_ignores=[],
+        stmt=None,
+    )
+    module.body = _imports_first(module)
+    if prune_imports:
+        module.body = prune_unused_imports(module.body, names_used(module))
+
+    emit.file(module, output_filename, mode="a", skip_black=False)
+
+
+def _prepend_symbols(prepend):
+    """
+    Evaluate the imports of `prepend`, so that the input mapping may be resolved with them
+
+    :param prepend: Prepend file with this. Use '\n' for newlines.
+    :type prepend: ```str```
+
+    :returns: The symbols imported
+    :rtype: ```dict```
+    """
+    extra_symbols = {}
+    prepend_imports = get_at_root(ast.parse(prepend.strip()), (Import, ImportFrom))
+
+    # def rewrite_typings(node):
+    #     """
+    #     Python < 3.8 must use `typings_extensions` for `Literal`
+    #
+    #     :param node: import node
+    #     :type node: ```Union[Import, ImportFrom]```
+    #
+    #     :returns: The import potentially rewritten or None
+    #     :rtype: ```Optional[Union[Import, ImportFrom]]```
+    #     """
+    #     if isinstance(node, ImportFrom) and node.module == "typing":
+    #         len_names = len(node.names)
+    #         if len_names == 1 and node.names[0].name == "Literal":
+    #             rewrite_typings.found_literal = True
+    #             return None
+    #         else:
+    #             node.names = list(
+    #                 filter(
+    #                     None,
+    #                     map(
+    #                         lambda _alias: None
+    #                         if _alias.name == "Literal"
+    #                         else _alias,
+    #                         node.names,
+    #                     ),
+    #                 )
+    #             )
+    #             if len(node.names) != len_names:
+    #                 rewrite_typings.found_literal = True
+    #     return node
+    #
+    # rewrite_typings.found_literal = False
+    # prepend_imports = list(filter(None, map(rewrite_typings, prepend_imports)))
+    # if rewrite_typings.found_literal:
+    #     prepend_imports.append(
+    #         ImportFrom(
+    #             level=0,
+    #             module="typing_extensions"
+    #             if sys.version_info[:2] < (3, 8)
+    #             else "typing",
+    #             names=[alias(asname=None, name="Literal")],
+    #             lineno=None,
+    #             col_offset=None,
+    #         )
+    #     )
+
+    eval(
+        compile(
+            to_code(
+                ast.fix_missing_locations(
+                    Module(body=prepend_imports, stmt=None, type_ignores=[])
+                )
+            ),
+            filename="<string>",
+            mode="exec",
+        ),
+        extra_symbols,
+    )
+    # This leaks to the global scope
+    globals().update(extra_symbols)
+    return extra_symbols
+
+
+def _load_input_mapping(input_mapping, extra_symbols):
+    """
+    Import the input mapping
+
+    :param input_mapping: Import location of dictionary/mapping/2-tuple collection; or of a module, to map
+      the names of its public classes and functions to them.
+    :type input_mapping: ```str```
+
+    :param extra_symbols: Symbols to resolve the import location with
+    :type extra_symbols: ```dict```
+
+    :returns: The (name, object) pairs of the input mapping
+    :rtype: ```Tuple[Tuple[str, Any]]```
+    """
+    module_path, _, symbol_name = input_mapping.rpartition(".")
+    input_mapping = getattr(
+        get_module(module_path, extra_symbols=extra_symbols), symbol_name
+    )
+    if ismodule(input_mapping):
+        return tuple(
+            map(
+                lambda name: (name, getattr(input_mapping, name)),
+                parse.public_symbols(input_mapping),
+            )
+        )
+    return tuple(
+        input_mapping.items() if hasattr(input_mapping, "items") else input_mapping
+    )
+
+
+def _parse_entries(objs):
+    """
+    Parse the entries of the input mapping, reading and parsing each module they're defined in once
+
+    :param objs: The classes and functions to parse
+    :type objs: ```Iterable[Union[type, FunctionType, FunctionDef]]```
+
+    :returns: IR of each entry, in order
+    :rtype: ```Iterator[dict]```
+    """
+    return parse.objects(objs, merge_inner_function="__init__")
+
+
+def _emit_entry(
+    name,
+    intermediate_repr,
+    name_tpl,
+    type_,
+    emit_call,
+    emit_default_doc,
+    decorator_list,
+):
+    """
+    Emit one entry of the input mapping
+
+    :param name: Name of the entry
+    :type name: ```str```
+
+    :param intermediate_repr: IR of the entry, from `_parse_entries`
+    :type intermediate_repr: ```dict```
+
+    :param name_tpl: Template for the name, e.g., `{name}Config`.
+    :type name_tpl: ```str```
+
+    :param type_: What type to generate.
+    :type type_: ```Literal["argparse", "class", "function"]```
+
+    :param emit_call: Whether to emit a `__call__` method from the `_internal` IR subdict
+    :type emit_call: ```bool```
+
+    :param emit_default_doc: Whether help/docstring should include 'With default' text
+    :type emit_default_doc: ```bool```
+
+    :param decorator_list: List of decorators
+    :type decorator_list: ```Optional[Union[List[Str], List[]]]```
+
+    :returns: The generated class or function
+    :rtype: ```Union[ClassDef, FunctionDef]```
+    """
+    return getattr(
+        emit,
+        type_.replace("class", "class_").replace("argparse", "argparse_function"),
+    )(
+        intermediate_repr,  # TODO: Figure out if it's a function or argparse function
+        emit_default_doc=emit_default_doc,
+        **(
+            lambda _name: {
+                "class": {
+                    "class_name": _name,
+                    "decorator_list": decorator_list,
+                    "emit_call": emit_call,
+                },
+                "function": {
+                    "function_name": _name,
+                },
+                "argparse": {"function_name": _name},
+            }[type_]
+        )(name_tpl.format(name=name))
     )
 
-    parsed_ast = ast.parse(content)
+
+def _all_assign(names):
+    """
+    :param names: Names to export
+    :type names: ```List[str]```
+
+    :returns: `__all__ = [names]`
+    :rtype: ```Assign```
+    """
+    return Assign(
+        targets=[Name("__all__", Store())],
+        value=List(ctx=Load(), elts=list(map(set_value, names)), expr=None),
+        expr=None,
+        lineno=None,
+        **maybe_type_comment
+    )
+
+
+def _imports_first(module):
+    """
+    Reorder the module so that its docstring is first, then its imports (`__future__` first), then everything else
+
+    :param module: The module
+    :type module: ```Module```
+
+    :returns: Body of the module, reordered
+    :rtype: ```List[AST]```
+    """
     # TODO: Shebang line first, then docstring, then imports
-    doc_str = ast.get_docstring(parsed_ast)
+    doc_str = ast.get_docstring(module)
     whole = tuple(
         map(
             lambda node: (node, None)
             if isinstance(node, (Import, ImportFrom))
             else (None, node),
-            parsed_ast.body,
+            module.body,
         )
     )
-
-    parsed_ast.body = list(
+    return list(
         filter(
             None,
             chain.from_iterable(
                 (
-                    parsed_ast.body[:1] if doc_str else iter(()),
+                    module.body[:1] if doc_str else iter(()),
                     sorted(
                         map(itemgetter(0), whole),
                         key=lambda import_from: getattr(import_from, "module", None)
@@ -239,8 +395,152 @@ def gen(
         )
     )
 
-    with open(output_filename, "a") as f:
-        f.write(to_code(parsed_ast))
+
+def _gen_in_parallel(
+    name_tpl,
+    input_mapping,
+    names,
+    type_,
+    output_filename,
+    header,
+    prepend_to_eval,
+    jobs,
+    prune_imports,
+    **emit_kwargs
+):
+    """
+    Generate each entry of the input mapping in a process pool, streaming the results to the file in order
+
+    :param name_tpl: Template for the name, e.g., `{name}Config`.
+    :type name_tpl: ```str```
+
+    :param input_mapping: Import location of dictionary/mapping/2-tuple collection.
+    :type input_mapping: ```str```
+
+    :param names: Name of each entry of the input mapping
+    :type names: ```Tuple[str]```
+
+    :param type_: What type to generate.
+    :type type_: ```Literal["argparse", "class", "function"]```
+
+    :param output_filename: Output file to write to
+    :type output_filename: ```str```
+
+    :param header: The prepended statements and imports, to write before the generated classes or functions
+    :type header: ```List[AST]```
+
+    :param prepend_to_eval: Prepend to evaluate the imports of, to resolve the input mapping with, or None
+    :type prepend_to_eval: ```Optional[str]```
+
+    :param jobs: Number of processes
+    :type jobs: ```int```
+
+    :param prune_imports: Whether to drop the imports of names unused. The generated classes or functions are then
+      streamed to a temporary file, as the header can only be written once they are all generated.
+    :type prune_imports: ```bool```
+
+    :param emit_kwargs: `emit_call`, `emit_default_doc`, and `decorator_list`
+    :type emit_kwargs: ```**Any```
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    header = Module(body=header, type_ignores=[], stmt=None)
+    header.body = _imports_first(header)
+
+    def write_header(f, used):
+        """
+        :param f: The output file
+        :type f: ```TextIO```
+
+        :param used: Names used by the module, to prune the imports of; or None to not prune
+        :type used: ```Optional[FrozenSet[str]]```
+        """
+        if used is not None:
+            header.body = prune_unused_imports(header.body, used | names_used(header))
+        if header.body:
+            f.write(formatter.format(to_code(header)))
+            f.write("\n\n")
+
+    used = frozenset()
+    with _atomic_open(output_filename, "a") as f, ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(input_mapping, prepend_to_eval),
+    ) as executor, ExitStack() as stack:
+        body = stack.enter_context(TemporaryFile("w+t")) if prune_imports else f
+        if not prune_imports:
+            write_header(f, None)
+        for name, (src, entry_used) in zip(
+            names,
+            executor.map(
+                partial(_gen_entry, name_tpl=name_tpl, type_=type_, **emit_kwargs),
+                range(len(names)),
+                chunksize=max(1, len(names) // (jobs * 4)),
+            ),
+        ):
+            print("Generating: {!r}".format(name))
+            used |= entry_used
+            body.write(src)
+            body.write("\n\n")
+        if prune_imports:
+            write_header(f, used)
+            body.seek(0)
+            copyfileobj(body, f)
+        f.write(
+            formatter.format(
+                to_code(
+                    _all_assign(
+                        list(map(lambda name: name_tpl.format(name=name), names))
+                    )
+                )
+            )
+        )
+
+
+# The input mapping, as loaded by each process of `_gen_in_parallel`
+_worker_input_mapping = None
+
+
+def _init_worker(input_mapping, prepend):
+    """
+    Load the input mapping in this process of `_gen_in_parallel`
+
+    :param input_mapping: Import location of dictionary/mapping/2-tuple collection.
+    :type input_mapping: ```str```
+
+    :param prepend: Prepend to evaluate the imports of, or None
+    :type prepend: ```Optional[str]```
+    """
+    global _worker_input_mapping
+    _worker_input_mapping = _load_input_mapping(
+        input_mapping, {} if prepend is None else _prepend_symbols(prepend)
+    )
+
+
+def _gen_entry(index, name_tpl, type_, **emit_kwargs):
+    """
+    Generate one entry of the input mapping loaded by `_init_worker`
+
+    :param index: Index of the entry
+    :type index: ```int```
+
+    :param name_tpl: Template for the name, e.g., `{name}Config`.
+    :type name_tpl: ```str```
+
+    :param type_: What type to generate.
+    :type type_: ```Literal["argparse", "class", "function"]```
+
+    :param emit_kwargs: `emit_call`, `emit_default_doc`, and `decorator_list`
+    :type emit_kwargs: ```**Any```
+
+    :returns: Formatted source of the generated class or function, and the names it uses
+    :rtype: ```Tuple[str, FrozenSet[str]]```
+    """
+    name, obj = _worker_input_mapping[index]
+    node = _emit_entry(
+        name, next(_parse_entries((obj,))), name_tpl, type_, **emit_kwargs
+    )
+    return formatter.format(to_code(node)), names_used(node)
 
 
 __all__ = ["gen"]
@@ -0,0 +1,151 @@
+"""
+Memoized introspection of objects in memory: the docstring, signature, source, and parsed source of each object
+ (and the location index of each module) are looked up once, and reused until the file of its module changes
+"""
+
+import ast
+import inspect
+from collections import OrderedDict
+from os import stat
+
+from doctrans.ast_utils import LocationIndex
+
+# Maximum number of objects to keep the introspection of
+INTROSPECT_CACHE_SIZE = 1024
+
+# id(obj) -> {"obj", "mtime", and whichever of "doc", "signature", "source", "parsed", "index" were looked up},
+#  least recently used first. Holding the object keeps its id from being reused.
+_entries = OrderedDict()
+
+
+def getdoc(obj):
+    """
+    Memoized `inspect.getdoc`
+
+    :param obj: Class, function, or module
+    :type obj: ```Any```
+
+    :returns: The docstring of the object, cleaned up; or None
+    :rtype: ```Optional[str]```
+    """
+    return _lookup(obj, "doc", inspect.getdoc)
+
+
+def signature(obj):
+    """
+    Memoized `inspect.signature`
+
+    :param obj: Class or function
+    :type obj: ```Any```
+
+    :returns: The signature of the object
+    :rtype: ```inspect.Signature```
+    """
+    return _lookup(obj, "signature", inspect.signature)
+
+
+def getsource(obj):
+    """
+    Memoized `inspect.getsource`
+
+    :param obj: Class, function, or module
+    :type obj: ```Any```
+
+    :returns: The source of the object
+    :rtype: ```str```
+    """
+    return _lookup(obj, "source", inspect.getsource)
+
+
+def parse_source(obj):
+    """
+    Parse the source of the object, memoized. The result is shared between callers, so must not be modified.
+
+    :param obj: Class or function
+    :type obj: ```Any```
+
+    :returns: AST of the object's source
+    :rtype: ```Union[ClassDef, FunctionDef]```
+    """
+    return _lookup(
+        obj, "parsed", lambda _obj: ast.parse(getsource(_obj).lstrip()).body[0]
+    )
+
+
+def location_index(module):
+    """
+    Location index of the module's parsed source, memoized; so each module is parsed once per process, however many
+     of its objects are looked up in it. The result is shared between callers, so must not be modified.
+
+    :param module: Module
+    :type module: ```ModuleType```
+
+    :returns: Location index of the module's AST
+    :rtype: ```LocationIndex```
+    """
+    return _lookup(
+        module, "index", lambda _module: LocationIndex(ast.parse(getsource(_module)))
+    )
+
+
+def _lookup(obj, field, look_up):
+    """
+    :param obj: Class, function, or module
+    :type obj: ```Any```
+
+    :param field: Name of what's looked up, e.g., `"source"`
+    :type field: ```str```
+
+    :param look_up: Looks up the field of the object, if it isn't cached
+    :type look_up: ```Callable[[Any], Any]```
+
+    :returns: The field of the object
+    :rtype: ```Any```
+    """
+    entry = _entry(obj)
+    if field not in entry:
+        entry[field] = look_up(obj)
+    return entry[field]
+
+
+def _entry(obj):
+    """
+    :param obj: Class, function, or module
+    :type obj: ```Any```
+
+    :returns: The cache entry of the object; a new one if it wasn't cached, or its module's file changed since
+    :rtype: ```dict```
+    """
+    key, mtime = id(obj), _module_mtime(obj)
+    entry = _entries.get(key)
+    if entry is None or entry["mtime"] != mtime:
+        entry = _entries[key] = {"obj": obj, "mtime": mtime}
+        while len(_entries) > INTROSPECT_CACHE_SIZE:
+            _entries.popitem(last=False)
+    else:
+        _entries.move_to_end(key)
+    return entry
+
+
+def _module_mtime(obj):
+    """
+    :param obj: Class, function, or module
+    :type obj: ```Any```
+
+    :returns: The mtime of the file of the object's module, or None if it has none
+    :rtype: ```Optional[int]```
+    """
+    try:
+        return stat(getattr(inspect.getmodule(obj), "__file__", None)).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+__all__ = [
+    "INTROSPECT_CACHE_SIZE",
+    "getdoc",
+    "getsource",
+    "location_index",
+    "parse_source",
+    "signature",
+]
@@ -0,0 +1,443 @@
+"""
+Compact intermediate_repr: immutable `__slots__` classes with interned names and types, which are also `Mapping`s
+ of the dict form, so code reading the dict form can read them as-is. Updates are made with `evolve`, which shares
+ everything unchanged, so an IR needn't be copied before use.
+
+The dict form:
+        {  "name": Optional[str],
+           "type": Optional[str],
+           "doc": Optional[str],
+           "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+           "returns": Optional[OrderedDict[Literal['return_type'],
+                                           {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import chain
+from sys import intern
+from types import MappingProxyType
+
+
+def _intern(s):
+    """
+    :param s: Any object, usually a str or None
+    :type s: ```Any```
+
+    :returns: `s`, interned if it's a str
+    :rtype: ```Any```
+    """
+    return intern(s) if type(s) is str else s
+
+
+# Each distinct order of keys, so that objects with the same keys share one tuple of them
+_key_orders = {}
+
+
+class _Slotted(Mapping):
+    """
+    An immutable `Mapping` over the slots that have been set, followed by any other keys (kept in `_extra`).
+    An unset slot is an absent key, which is distinct from a key whose value is None.
+    As it's immutable, the order of its keys is found once, on construction.
+    """
+
+    __slots__ = ("_extra", "_key_order")
+    _keys = ()
+
+    def __init__(self, mapping=None, **kwargs):
+        """
+        :param mapping: Keys of the dict form, with their values
+        :type mapping: ```Optional[Union[Mapping, Iterable[Tuple[str, Any]]]]```
+
+        :param kwargs: Further keys of the dict form, with their values
+        :type kwargs: ```**Any```
+        """
+        object.__setattr__(self, "_extra", None)
+        for key, value in _chain_items(mapping, kwargs):
+            self._set(key, value)
+        key_order = tuple(filter(self._has_slot, self._keys)) + (
+            () if self._extra is None else tuple(self._extra)
+        )
+        object.__setattr__(
+            self, "_key_order", _key_orders.setdefault(key_order, key_order)
+        )
+
+    def __setattr__(self, key, value):
+        """
+        :param key: Name of the attribute
+        :type key: ```str```
+
+        :param value: Value of the attribute
+        :type value: ```Any```
+        """
+        raise AttributeError(
+            "{} is immutable, use `evolve`".format(type(self).__name__)
+        )
+
+    def __delattr__(self, key):
+        """
+        :param key: Name of the attribute
+        :type key: ```str```
+        """
+        self.__setattr__(key, None)
+
+    def __reduce__(self):
+        """
+        :returns: The type and the stored values, to rebuild this object on unpickling
+        :rtype: ```Tuple[type, Tuple[OrderedDict]]```
+        """
+        return type(self), (self._stored(),)
+
+    def _stored(self):
+        """
+        :returns: The values as stored, e.g., `params` as pairs rather than as an `OrderedDict`
+        :rtype: ```OrderedDict```
+        """
+        return OrderedDict(
+            chain(
+                map(
+                    lambda key: (key, getattr(self, key)),
+                    filter(self._has_slot, self._keys),
+                ),
+                () if self._extra is None else self._extra.items(),
+            )
+        )
+
+    def evolve(self, **changes):
+        """
+        Update without copying: the new object shares all unchanged values (including unchanged params) with this one
+
+        :param changes: Keys of the dict form, with their new values
+        :type changes: ```**Any```
+
+        :returns: A new object with the changes
+        :rtype: ```_Slotted```
+        """
+        return type(self)(self._stored(), **changes)
+
+    def _set(self, key, value):
+        """
+        :param key: Key of the dict form
+        :type key: ```str```
+
+        :param value: Value of the dict form
+        :type value: ```Any```
+        """
+        if key in self._keys:
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                object.__setattr__(self, "_extra", OrderedDict())
+            self._extra[key] = value
+
+    def __getitem__(self, key):
+        """
+        :param key: Key of the dict form
+        :type key: ```str```
+
+        :returns: The value of the key
+        :rtype: ```Any```
+        """
+        if key in self._keys:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __iter__(self):
+        """
+        :returns: An iterator over the keys, in order
+        :rtype: ```Iterator[str]```
+        """
+        return iter(self._key_order)
+
+    def __len__(self):
+        """
+        :returns: The number of keys
+        :rtype: ```int```
+        """
+        return len(self._key_order)
+
+    def __contains__(self, key):
+        """
+        :param key: Key of the dict form
+        :type key: ```str```
+
+        :returns: Whether the key is present
+        :rtype: ```bool```
+        """
+        return key in self._key_order
+
+    def get(self, key, default=None):
+        """
+        :param key: Key of the dict form
+        :type key: ```str```
+
+        :param default: Value to return if the key is absent
+        :type default: ```Any```
+
+        :returns: The value of the key if present, else `default`
+        :rtype: ```Any```
+        """
+        return self[key] if key in self._key_order else default
+
+    def keys(self):
+        """
+        :returns: The keys, in order
+        :rtype: ```Tuple[str]```
+        """
+        return self._key_order
+
+    def values(self):
+        """
+        :returns: The values, in order
+        :rtype: ```Tuple[Any]```
+        """
+        return tuple(map(self.__getitem__, self._key_order))
+
+    def items(self):
+        """
+        :returns: The (key, value) pairs, in order
+        :rtype: ```Tuple[Tuple[str, Any]]```
+        """
+        return tuple(zip(self._key_order, map(self.__getitem__, self._key_order)))
+
+    def _has_slot(self, key):
+        """
+        :param key: Name of a slot
+        :type key: ```str```
+
+        :returns: Whether the slot is set
+        :rtype: ```bool```
+        """
+        return hasattr(self, key)
+
+    def __repr__(self):
+        """
+        :returns: The constructor call, with the dict form
+        :rtype: ```str```
+        """
+        return "{}({!r})".format(type(self).__name__, dict(self.items()))
+
+
+class Param(_Slotted):
+    """
+    A parameter: `{'typ': str, 'doc': Optional[str], 'default': Any}`, with `typ` interned
+    """
+
+    __slots__ = ("typ", "doc", "default")
+    _keys = __slots__
+
+    def _set(self, key, value):
+        """
+        :param key: Key of the dict form
+        :type key: ```str```
+
+        :param value: Value of the dict form
+        :type value: ```Any```
+        """
+        super(Param, self)._set(key, _intern(value) if key == "typ" else value)
+
+    def to_dict(self):
+        """
+        :returns: The dict form, a new object
+        :rtype: ```dict```
+        """
+        return dict(self.items())
+
+
+class Returns(Param):
+    """
+    The return value: `{'typ': str, 'doc': Optional[str], 'default': Any}`, with `typ` interned
+    """
+
+    __slots__ = ()
+
+
+class IR(_Slotted):
+    """
+    The intermediate_repr, with `name` and `type` interned. `params` and `returns` are read-only ordered mappings
+     of `Param`s and `Returns` respectively, built once and shared by every read (and by `evolve`d IRs).
+    """
+
+    __slots__ = ("name", "type", "doc", "params", "returns", "_internal")
+    _keys = __slots__
+
+    def _set(self, key, value):
+        """
+        :param key: Key of the dict form
+        :type key: ```str```
+
+        :param value: Value of the dict form
+        :type value: ```Any```
+        """
+        if key in ("name", "type"):
+            value = _intern(value)
+        elif key == "params":
+            value = _pairs(value, Param)
+        elif key == "returns" and value is not None:
+            value = _pairs(value, Returns)
+        super(IR, self)._set(key, value)
+
+    def __reduce__(self):
+        """
+        :returns: The type and the stored values, with `params` and `returns` as pairs, to rebuild on unpickling
+        :rtype: ```Tuple[type, Tuple[OrderedDict]]```
+        """
+        return (
+            type(self),
+            (
+                OrderedDict(
+                    map(
+                        lambda item: (
+                            item[0],
+                            tuple(item[1].items())
+                            if isinstance(item[1], MappingProxyType)
+                            else item[1],
+                        ),
+                        self._stored().items(),
+                    )
+                ),
+            ),
+        )
+
+    @classmethod
+    def from_dict(cls, intermediate_repr):
+        """
+        :param intermediate_repr: a dictionary of form
+            {  "name": Optional[str],
+               "type": Optional[str],
+               "doc": Optional[str],
+               "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+               "returns": Optional[OrderedDict[Literal['return_type'],
+                                               {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+        :type intermediate_repr: ```Union[dict, IR]```
+
+        :returns: The compact IR. `intermediate_repr` itself if already compact.
+        :rtype: ```IR```
+        """
+        return (
+            intermediate_repr
+            if isinstance(intermediate_repr, cls)
+            else cls(intermediate_repr)
+        )
+
+    def to_dict(self):
+        """
+        :returns: The dict form, all new objects (other than the `_internal` values), so is safe to modify
+        :rtype: ```dict```
+        """
+        return dict(
+            map(
+                lambda key: (
+                    key,
+                    _dict_pairs(self[key])
+                    if key == "params" or key == "returns"
+                    else dict(self[key])
+                    if key == "_internal" and self[key] is not None
+                    else self[key],
+                ),
+                self,
+            )
+        )
+
+
+def _chain_items(mapping, kwargs):
+    """
+    :param mapping: Mapping or None
+    :type mapping: ```Optional[Mapping]```
+
+    :param kwargs: Keyword arguments
+    :type kwargs: ```dict```
+
+    :returns: The items of `mapping` then of `kwargs`
+    :rtype: ```Iterator[Tuple[str, Any]]```
+    """
+    yield from () if mapping is None else mapping.items()
+    yield from kwargs.items()
+
+
+def _pairs(mapping, param_cls):
+    """
+    :param mapping: name -> param (in dict form or compact), or an iterable of (name, param) pairs
+    :type mapping: ```Union[Mapping[str, dict], Iterable[Tuple[str, Union[dict, Param]]]]```
+
+    :param param_cls: Param or Returns
+    :type param_cls: ```type```
+
+    :returns: Read-only interned name -> compact param. `mapping` itself if it already is one.
+    :rtype: ```MappingProxyType```
+    """
+    if isinstance(mapping, MappingProxyType) and all(
+        map(lambda param: isinstance(param, param_cls), mapping.values())
+    ):
+        return mapping
+    return MappingProxyType(
+        OrderedDict(
+            map(
+                lambda name_param: (
+                    _intern(name_param[0]),
+                    name_param[1]
+                    if isinstance(name_param[1], param_cls)
+                    else param_cls(name_param[1]),
+                ),
+                mapping.items() if isinstance(mapping, Mapping) else mapping,
+            )
+        )
+    )
+
+
+def _dict_pairs(mapping):
+    """
+    :param mapping: name -> compact param, or None
+    :type mapping: ```Optional[OrderedDict[str, Param]]```
+
+    :returns: name -> param in dict form, or None
+    :rtype: ```Optional[OrderedDict[str, dict]]```
+    """
+    return (
+        None
+        if mapping is None
+        else OrderedDict(
+            map(
+                lambda name_param: (name_param[0], name_param[1].to_dict()),
+                mapping.items(),
+            )
+        )
+    )
+
+
+def as_dict(intermediate_repr):
+    """
+    Adapt the IR for code that modifies it, e.g., `ir_merge`
+
+    :param intermediate_repr: The IR in dict form or compact
+    :type intermediate_repr: ```Union[dict, IR]```
+
+    :returns: `intermediate_repr` if it's a dict, else the dict form of it
+    :rtype: ```dict```
+    """
+    return (
+        intermediate_repr.to_dict()
+        if isinstance(intermediate_repr, IR)
+        else intermediate_repr
+    )
+
+
+def compact(intermediate_repr):
+    """
+    Convert the IR to its compact form
+
+    :param intermediate_repr: The IR in dict form or compact
+    :type intermediate_repr: ```Union[dict, IR]```
+
+    :returns: The compact IR
+    :rtype: ```IR```
+    """
+    return IR.from_dict(intermediate_repr)
+
+
+__all__ = ["IR", "Param", "Returns", "as_dict", "compact"]
@@ -0,0 +1,260 @@
+"""
+Content-addressed on-disk cache of the intermediate_repr, so that unchanged sources skip parsing entirely
+"""
+
+import pickle
+import zlib
+from collections import OrderedDict
+from hashlib import sha256
+from os import listdir, makedirs, path, remove, replace, stat, utime
+from tempfile import mkstemp
+
+from doctrans import __version__
+from doctrans.ir import compact
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 256
+
+
+def ir_cache_key(source, search, parse_name, **options):
+    """
+    Derive the cache key from everything that determines the parsed IR
+
+    :param source: Python source of the whole file
+    :type source: ```str```
+
+    :param search: Location within the source of the node, e.g., `['C', 'function_name']`
+    :type search: ```List[str]```
+
+    :param parse_name: Name of the `parse.*` function, e.g., `'class_'`
+    :type parse_name: ```str```
+
+    :param options: Parse options, e.g., `infer_type`, `word_wrap`, `merge_inner_function`
+    :type options: ```**options```
+
+    :returns: Hex digest which is only equal for equal source, location, parser, and options
+    :rtype: ```str```
+    """
+    return sha256(
+        "\0".join(
+            (
+                __version__,
+                sha256(source.encode("utf8")).hexdigest(),
+                ".".join(search),
+                parse_name,
+                repr(sorted(options.items())),
+            )
+        ).encode("utf8")
+    ).hexdigest()
+
+
+class IRCache(object):
+    """
+    Size-bounded on-disk cache of intermediate_repr, evicting the least recently used entries.
+    Entries are pickled then zlib compressed; one file per entry, named by its key.
+
+    :ivar cache_dir: Directory holding the cache entries
+    :ivar max_size: Maximum total size—in bytes—of the entries before eviction
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param cache_dir: Directory holding the cache entries. Created if nonexistent.
+        :type cache_dir: ```str```
+
+        :param max_size: Maximum total size—in bytes—of the entries before eviction
+        :type max_size: ```int```
+        """
+        self.cache_dir = path.realpath(path.expanduser(cache_dir))
+        self.max_size = max_size
+        makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        """
+        :param key: Cache key, from `ir_cache_key`
+        :type key: ```str```
+
+        :returns: Filename of the entry
+        :rtype: ```str```
+        """
+        return path.join(self.cache_dir, "{key}.ir".format(key=key))
+
+    def get(self, key):
+        """
+        Get the IR stored at key, marking it as recently used
+
+        :param key: Cache key, from `ir_cache_key`
+        :type key: ```str```
+
+        :returns: The intermediate_repr if cached else None
+        :rtype: ```Optional[dict]```
+        """
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                intermediate_repr = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            return None
+        utime(entry)
+        return intermediate_repr
+
+    def set(self, key, intermediate_repr):
+        """
+        Store the IR at key, then evict least recently used entries until within `max_size`
+
+        :param key: Cache key, from `ir_cache_key`
+        :type key: ```str```
+
+        :param intermediate_repr: a dictionary of form
+            {  "name": Optional[str],
+               "type": Optional[str],
+               "doc": Optional[str],
+               "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+               "returns": Optional[OrderedDict[Literal['return_type'],
+                                               {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+        :type intermediate_repr: ```dict```
+
+        :returns: `intermediate_repr`
+        :rtype: ```dict```
+        """
+        fd, tmp = mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with open(fd, "wb") as f:
+            f.write(
+                zlib.compress(
+                    pickle.dumps(intermediate_repr, protocol=pickle.HIGHEST_PROTOCOL)
+                )
+            )
+        replace(tmp, self._entry(key))
+        self.evict()
+        return intermediate_repr
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the total size is within `max_size`
+        """
+        entries = sorted(
+            (
+                (st.st_mtime_ns, st.st_size, entry)
+                for entry, st in (
+                    (entry, stat(entry))
+                    for entry in map(
+                        lambda name: path.join(self.cache_dir, name),
+                        filter(
+                            lambda name: name.endswith(".ir"), listdir(self.cache_dir)
+                        ),
+                    )
+                )
+            )
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_size:
+                break
+            remove(entry)
+            total -= size
+
+    def get_or_parse(self, source, search, parse, parse_name, **options):
+        """
+        Get the IR from the cache, or parse it (and cache it) when absent
+
+        :param source: Python source of the whole file
+        :type source: ```str```
+
+        :param search: Location within the source of the node, e.g., `['C', 'function_name']`
+        :type search: ```List[str]```
+
+        :param parse: Nullary function which parses the source into the IR
+        :type parse: ```Callable[[], dict]```
+
+        :param parse_name: Name of the `parse.*` function, e.g., `'class_'`
+        :type parse_name: ```str```
+
+        :param options: Parse options, e.g., `infer_type`, `word_wrap`, `merge_inner_function`
+        :type options: ```**options```
+
+        :returns: a dictionary of form
+            {  "name": Optional[str],
+               "type": Optional[str],
+               "doc": Optional[str],
+               "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+               "returns": Optional[OrderedDict[Literal['return_type'],
+                                               {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+        :rtype: ```Union[dict, IR]```
+        """
+        key = ir_cache_key(source, search, parse_name, **options)
+        intermediate_repr = self.get(key)
+        return (
+            self.set(key, parse()) if intermediate_repr is None else intermediate_repr
+        )
+
+
+class MemoryIRCache(IRCache):
+    """
+    In-memory IRCache, for long-running processes, keeping the `max_size` most recently used entries.
+    Entries are stored as the immutable compact IR, so are handed out without copying.
+
+    :ivar max_size: Maximum number of entries before eviction
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_ENTRIES):
+        """
+        :param max_size: Maximum number of entries before eviction
+        :type max_size: ```int```
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Get the IR stored at key, marking it as recently used
+
+        :param key: Cache key, from `ir_cache_key`
+        :type key: ```str```
+
+        :returns: The compact intermediate_repr if cached else None
+        :rtype: ```Optional[IR]```
+        """
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key, intermediate_repr):
+        """
+        Store the compact IR at key, then evict least recently used entries until within `max_size`
+
+        :param key: Cache key, from `ir_cache_key`
+        :type key: ```str```
+
+        :param intermediate_repr: a dictionary of form
+            {  "name": Optional[str],
+               "type": Optional[str],
+               "doc": Optional[str],
+               "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+               "returns": Optional[OrderedDict[Literal['return_type'],
+                                               {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+        :type intermediate_repr: ```Union[dict, IR]```
+
+        :returns: The compact IR, as stored
+        :rtype: ```IR```
+        """
+        self._entries[key] = compact(intermediate_repr)
+        self._entries.move_to_end(key)
+        self.evict()
+        return self._entries[key]
+
+    def evict(self):
+        """
+        Remove the least recently used entries until there are at most `max_size`
+        """
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+__all__ = [
+    "DEFAULT_MAX_ENTRIES",
+    "DEFAULT_MAX_SIZE",
+    "IRCache",
+    "MemoryIRCache",
+    "ir_cache_key",
+]
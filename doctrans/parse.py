@@ -24,9 +24,9 @@ from ast import (
     keyword,
 )
 from collections import OrderedDict, deque
-from copy import deepcopy
+from copy import copy, deepcopy
 from functools import partial
-from inspect import getdoc, getsource, isfunction, signature
+from inspect import getmodule, isclass, isfunction
 from itertools import chain, cycle, filterfalse, islice
 from operator import attrgetter, eq, setitem
 from types import FunctionType
@@ -46,6 +46,14 @@ from doctrans.ast_utils import (
 from doctrans.defaults_utils import extract_default
 from doctrans.docstring_parsers import _set_name_and_type, parse_docstring
 from doctrans.emitter_utils import _parse_return, parse_out_param
+from doctrans.introspect import (
+    getdoc,
+    location_index,
+    parse_source,
+    signature,
+)
+from doctrans.ir import IR
+from doctrans.ir import compact as compact_ir
 from doctrans.parser_utils import (
     _inspect_process_ir_param,
     _interpolate_return,
@@ -53,7 +61,7 @@ from doctrans.parser_utils import (
     ir_merge,
     json_schema_property_to_param,
 )
-from doctrans.pure_utils import assert_equal, rpartial, simple_types
+from doctrans.pure_utils import assert_equal, get_module, rpartial, simple_types
 from doctrans.source_transformer import to_code
 
 logger = get_logger("doctrans.parse")
@@ -65,6 +73,7 @@ def class_(
     merge_inner_function=None,
     infer_type=False,
     word_wrap=True,
+    compact=False,
 ):
     """
     Converts an AST to our IR
@@ -84,6 +93,9 @@ def class_(
     :param word_wrap: Whether to word-wrap. Set `DOCTRANS_LINE_LENGTH` to configure length.
     :type word_wrap: ```bool```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: a dictionary of form
         {  "name": Optional[str],
            "type": Optional[str],
@@ -91,46 +103,19 @@ def class_(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :rtype: ```dict```
+    :rtype: ```Union[dict, IR]```
     """
     assert not isinstance(class_def, FunctionDef)
     is_supported_ast_node = isinstance(class_def, (Module, ClassDef))
     if not is_supported_ast_node and isinstance(class_def, type):
-        ir = _inspect(class_def, class_name, word_wrap)
-        parsed_body = ast.parse(getsource(class_def).lstrip()).body[0]
-        parsed_body.body = (
-            parsed_body.body
-            if ast.get_docstring(parsed_body) is None
-            else parsed_body.body[1:]
-        )
-
-        if merge_inner_function is not None:
-            _merge_inner_function(
-                parsed_body,
-                infer_type=infer_type,
-                intermediate_repr=ir,
-                merge_inner_function=merge_inner_function,
-            )
-            return ir
-
-        ir["_internal"] = {
-            "body": list(
-                filterfalse(
-                    rpartial(isinstance, AnnAssign),
-                    parsed_body.body,
-                )
-            ),
-            "from_name": class_name,
-            "from_type": "cls",
-        }
-        body_ir = class_(
-            class_def=parsed_body,
+        return _class_from_memory(
+            class_def,
             class_name=class_name,
             merge_inner_function=merge_inner_function,
+            infer_type=infer_type,
+            word_wrap=word_wrap,
+            compact=compact,
         )
-        ir_merge(ir, body_ir)
-
-        return ir
 
     assert (
         is_supported_ast_node
@@ -211,39 +196,112 @@ def class_(
                     maxlen=0,
                 )
 
-    intermediate_repr.update(
-        {
-            "params": OrderedDict(
-                map(
-                    partial(
-                        _set_name_and_type, infer_type=infer_type, word_wrap=word_wrap
-                    ),
-                    intermediate_repr["params"].items(),
-                )
-            ),
-            "_internal": {
-                "body": list(
-                    filterfalse(rpartial(isinstance, (AnnAssign, Assign)), body)
-                ),
-                "from_name": class_def.name,
-                "from_type": "cls",
-            },
-        }
+    intermediate_repr["_internal"] = {
+        "body": list(filterfalse(rpartial(isinstance, (AnnAssign, Assign)), body)),
+        "from_name": class_def.name,
+        "from_type": "cls",
+    }
+    params = map(
+        partial(_set_name_and_type, infer_type=infer_type, word_wrap=word_wrap),
+        intermediate_repr["params"].items(),
     )
 
     if merge_inner_function is not None:
         assert isinstance(class_def, ClassDef)
 
+        intermediate_repr["params"] = OrderedDict(params)
         _merge_inner_function(
             class_def,
             infer_type=infer_type,
             intermediate_repr=intermediate_repr,
             merge_inner_function=merge_inner_function,
         )
+        return compact_ir(intermediate_repr) if compact else intermediate_repr
 
     # intermediate_repr['_internal']["body"]= list(filterfalse(rpartial(isinstance,(AnnAssign,Assign)),class_def.body))
 
-    return intermediate_repr
+    return _set_params(intermediate_repr, compact, params=params)
+
+
+def _class_from_memory(
+    class_def,
+    class_name,
+    merge_inner_function,
+    infer_type,
+    word_wrap,
+    compact,
+    parsed_body=None,
+):
+    """
+    Converts a class—in memory—to our IR
+
+    :param class_def: The class
+    :type class_def: ```type```
+
+    :param class_name: Name of `class`. If None, uses its `__qualname__`.
+    :type class_name: ```Optional[str]```
+
+    :param merge_inner_function: Name of inner function to merge. If None, merge nothing.
+    :type merge_inner_function: ```Optional[str]```
+
+    :param infer_type: Whether to try inferring the typ (from the default)
+    :type infer_type: ```bool```
+
+    :param word_wrap: Whether to word-wrap. Set `DOCTRANS_LINE_LENGTH` to configure length.
+    :type word_wrap: ```bool```
+
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
+    :param parsed_body: AST of the class's source, e.g., from the already parsed module. If None, it's parsed
+      from the (memoized) source. Left unmodified.
+    :type parsed_body: ```Optional[ClassDef]```
+
+    :returns: a dictionary of form
+        {  "name": Optional[str],
+           "type": Optional[str],
+           "doc": Optional[str],
+           "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+           "returns": Optional[OrderedDict[Literal['return_type'],
+                                           {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+    :rtype: ```Union[dict, IR]```
+    """
+    ir = _inspect(class_def, class_name, word_wrap, parsed_body=parsed_body)
+    # Copied, as the parsed source is shared, and its body is replaced below
+    parsed_body = copy(parse_source(class_def) if parsed_body is None else parsed_body)
+    parsed_body.body = (
+        parsed_body.body
+        if ast.get_docstring(parsed_body) is None
+        else parsed_body.body[1:]
+    )
+
+    if merge_inner_function is not None:
+        _merge_inner_function(
+            parsed_body,
+            infer_type=infer_type,
+            intermediate_repr=ir,
+            merge_inner_function=merge_inner_function,
+        )
+        return compact_ir(ir) if compact else ir
+
+    ir["_internal"] = {
+        "body": list(
+            filterfalse(
+                rpartial(isinstance, AnnAssign),
+                parsed_body.body,
+            )
+        ),
+        "from_name": class_name,
+        "from_type": "cls",
+    }
+    body_ir = class_(
+        class_def=parsed_body,
+        class_name=class_name,
+        merge_inner_function=merge_inner_function,
+    )
+    ir_merge(ir, body_ir)
+
+    return compact_ir(ir) if compact else ir
 
 
 def _merge_inner_function(
@@ -302,7 +360,7 @@ def _merge_inner_function(
     return intermediate_repr
 
 
-def _inspect(obj, name, word_wrap):
+def _inspect(obj, name, word_wrap, parsed_body=None):
     """
     Uses the `inspect` module to figure out the IR from the input
 
@@ -315,6 +373,9 @@ def _inspect(obj, name, word_wrap):
     :param word_wrap: Whether to word-wrap. Set `DOCTRANS_LINE_LENGTH` to configure length.
     :type word_wrap: ```bool```
 
+    :param parsed_body: AST of the object's source. If None, it's parsed from the (memoized) source.
+    :type parsed_body: ```Optional[Union[ClassDef, FunctionDef]]```
+
     :returns: a dictionary of form
         {  "name": Optional[str],
            "type": Optional[str],
@@ -351,7 +412,8 @@ def _inspect(obj, name, word_wrap):
         }
     )
 
-    parsed_body = ast.parse(getsource(obj).lstrip()).body[0]
+    if parsed_body is None:
+        parsed_body = parse_source(obj)
 
     if is_function:
         ir["type"] = {"self": "self", "cls": "cls"}.get(
@@ -401,6 +463,7 @@ def function(
     word_wrap=True,
     function_type=None,
     function_name=None,
+    compact=False,
 ):
     """
     Converts a method to our IR
@@ -420,6 +483,9 @@ def function(
     :param function_name: name of function_def
     :type function_name: ```str```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: a dictionary of form
         {  "name": Optional[str],
            "type": Optional[str],
@@ -427,23 +493,16 @@ def function(
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :rtype: ```dict```
+    :rtype: ```Union[dict, IR]```
     """
     if isinstance(function_def, FunctionType):
         # Dynamic function, i.e., this isn't source code; and is in your memory
-        ir = _inspect(function_def, function_name, word_wrap)
-        parsed_source = ast.parse(getsource(function_def).lstrip()).body[0]
-        body = (
-            parsed_source.body
-            if ast.get_docstring(parsed_source) is None
-            else parsed_source.body[1:]
+        return _function_from_memory(
+            function_def,
+            function_name=function_name,
+            word_wrap=word_wrap,
+            compact=compact,
         )
-        ir["_internal"] = {
-            "body": list(filterfalse(rpartial(isinstance, AnnAssign), body)),
-            "from_name": parsed_source.name,
-            "from_type": "cls",
-        }
-        return ir
 
     assert isinstance(
         function_def, FunctionDef
@@ -546,27 +605,255 @@ def function(
     )
 
     intermediate_repr["params"].update(params_to_append)
-    intermediate_repr["params"] = OrderedDict(
-        map(
-            partial(_set_name_and_type, infer_type=infer_type, word_wrap=word_wrap),
-            intermediate_repr["params"].items(),
-        )
-    )
 
     # Convention - the final top-level `return` is the default
     intermediate_repr = _interpolate_return(function_def, intermediate_repr)
+
+    set_name_and_type = partial(
+        _set_name_and_type, infer_type=infer_type, word_wrap=word_wrap
+    )
+    final = {"params": map(set_name_and_type, intermediate_repr["params"].items())}
     if "return_type" in (intermediate_repr.get("returns") or iter(())):
-        intermediate_repr["returns"] = OrderedDict(
-            map(
-                partial(_set_name_and_type, infer_type=infer_type, word_wrap=word_wrap),
-                intermediate_repr["returns"].items(),
+        final["returns"] = map(set_name_and_type, intermediate_repr["returns"].items())
+
+    return _set_params(intermediate_repr, compact, **final)
+
+
+def _set_params(intermediate_repr, compact, **pairs):
+    """
+    Set the final params and/or returns of the IR. The compact IR is built directly from the pairs, each param
+     becoming a `Param` as it's produced, rather than from a dict form of them.
+
+    :param intermediate_repr: The IR in dict form, with its params and returns before being finalised
+    :type intermediate_repr: ```dict```
+
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
+    :param pairs: "params" and/or "returns" -> (name, param in dict form) pairs
+    :type pairs: ```**Iterable[Tuple[str, dict]]```
+
+    :returns: The IR with its final params and returns
+    :rtype: ```Union[dict, IR]```
+    """
+    if compact:
+        return IR(
+            OrderedDict(
+                filter(lambda item: item[0] not in pairs, intermediate_repr.items())
+            ),
+            **pairs
+        )
+    intermediate_repr.update(
+        map(lambda item: (item[0], OrderedDict(item[1])), pairs.items())
+    )
+    return intermediate_repr
+
+
+def _function_from_memory(
+    function_def, function_name, word_wrap, compact, parsed_source=None
+):
+    """
+    Converts a function—in memory—to our IR
+
+    :param function_def: The function
+    :type function_def: ```FunctionType```
+
+    :param function_name: name of function_def. If None, uses its `__qualname__`.
+    :type function_name: ```Optional[str]```
+
+    :param word_wrap: Whether to word-wrap. Set `DOCTRANS_LINE_LENGTH` to configure length.
+    :type word_wrap: ```bool```
+
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
+    :param parsed_source: AST of the function's source, e.g., from the already parsed module. If None, it's
+      parsed from the (memoized) source.
+    :type parsed_source: ```Optional[FunctionDef]```
+
+    :returns: a dictionary of form
+        {  "name": Optional[str],
+           "type": Optional[str],
+           "doc": Optional[str],
+           "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
+           "returns": Optional[OrderedDict[Literal['return_type'],
+                                           {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
+    :rtype: ```Union[dict, IR]```
+    """
+    ir = _inspect(function_def, function_name, word_wrap, parsed_body=parsed_source)
+    if parsed_source is None:
+        parsed_source = parse_source(function_def)
+    body = (
+        parsed_source.body
+        if ast.get_docstring(parsed_source) is None
+        else parsed_source.body[1:]
+    )
+    ir["_internal"] = {
+        "body": list(filterfalse(rpartial(isinstance, AnnAssign), body)),
+        "from_name": parsed_source.name,
+        "from_type": "cls",
+    }
+    return compact_ir(ir) if compact else ir
+
+
+def module(
+    obj_or_name,
+    names=None,
+    merge_inner_function=None,
+    infer_type=False,
+    word_wrap=True,
+    compact=False,
+):
+    """
+    Converts the public classes and functions of a module—in memory—to our IR, see `objects`
+
+    :param obj_or_name: Module, or its import location, e.g., `"tf.keras.losses"`
+    :type obj_or_name: ```Union[ModuleType, str]```
+
+    :param names: Names of the classes and functions to convert.
+      If None, those of `__all__`, else every public class and function defined in the module.
+    :type names: ```Optional[Iterable[str]]```
+
+    :param merge_inner_function: Name of inner function to merge into each class's IR. If None, merge nothing.
+    :type merge_inner_function: ```Optional[str]```
+
+    :param infer_type: Whether to try inferring the typ (from the default)
+    :type infer_type: ```bool```
+
+    :param word_wrap: Whether to word-wrap. Set `DOCTRANS_LINE_LENGTH` to configure length.
+    :type word_wrap: ```bool```
+
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
+    :returns: name -> IR
+    :rtype: ```OrderedDict[str, Union[dict, IR]]```
+    """
+    mod = (
+        get_module(obj_or_name, extra_symbols={})
+        if isinstance(obj_or_name, str)
+        else obj_or_name
+    )
+    names = tuple(public_symbols(mod) if names is None else names)
+    return OrderedDict(
+        zip(
+            names,
+            objects(
+                map(partial(getattr, mod), names),
+                merge_inner_function=merge_inner_function,
+                infer_type=infer_type,
+                word_wrap=word_wrap,
+                compact=compact,
+            ),
+        )
+    )
+
+
+def objects(
+    objs, merge_inner_function=None, infer_type=False, word_wrap=True, compact=False
+):
+    """
+    Converts classes and functions—in memory—to our IR, reading and parsing the source of each module they're
+     defined in once per process (see `doctrans.introspect.location_index`); rather than once per object, as
+     `class_` and `function` do.
+    Objects whose source isn't found in their module's AST—e.g., local to a function—are converted one by one,
+     as are AST nodes.
+
+    :param objs: Classes and functions, or their AST
+    :type objs: ```Iterable[Union[type, FunctionType, ClassDef, FunctionDef]]```
+
+    :param merge_inner_function: Name of inner function to merge into each class's IR. If None, merge nothing.
+    :type merge_inner_function: ```Optional[str]```
+
+    :param infer_type: Whether to try inferring the typ (from the default)
+    :type infer_type: ```bool```
+
+    :param word_wrap: Whether to word-wrap. Set `DOCTRANS_LINE_LENGTH` to configure length.
+    :type word_wrap: ```bool```
+
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
+    :returns: IR of each object, in order
+    :rtype: ```Iterator[Union[dict, IR]]```
+    """
+
+    def _parsed(obj):
+        """
+        :param obj: Class or function
+        :type obj: ```Union[type, FunctionType]```
+
+        :returns: AST of the object's source within its module, or None if not found
+        :rtype: ```Optional[Union[ClassDef, FunctionDef]]```
+        """
+        obj_module = getmodule(obj)
+        if obj_module is None or "<locals>" in obj.__qualname__:
+            return None
+        try:
+            index = location_index(obj_module)
+        except (OSError, TypeError):
+            return None
+        node = index.get(obj.__qualname__.split("."))
+        return node if isinstance(node, (ClassDef, FunctionDef)) else None
+
+    for obj in objs:
+        yield (
+            function(obj, infer_type=infer_type, word_wrap=word_wrap, compact=compact)
+            if isinstance(obj, FunctionDef)
+            else class_(
+                obj,
+                merge_inner_function=merge_inner_function,
+                infer_type=infer_type,
+                word_wrap=word_wrap,
+                compact=compact,
+            )
+            if isinstance(obj, ClassDef)
+            else _function_from_memory(
+                obj,
+                function_name=None,
+                word_wrap=word_wrap,
+                compact=compact,
+                parsed_source=_parsed(obj),
+            )
+            if isfunction(obj)
+            else _class_from_memory(
+                obj,
+                class_name=None,
+                merge_inner_function=merge_inner_function,
+                infer_type=infer_type,
+                word_wrap=word_wrap,
+                compact=compact,
+                parsed_body=_parsed(obj),
             )
         )
 
-    return intermediate_repr
+
+def public_symbols(mod):
+    """
+    The public classes and functions of a module
+
+    :param mod: Module
+    :type mod: ```ModuleType```
+
+    :returns: Names of those in `__all__` if defined, else of every public one defined in the module, in order
+    :rtype: ```Tuple[str]```
+    """
+    return tuple(
+        filter(
+            lambda name: (
+                lambda obj: (isclass(obj) or isfunction(obj))
+                and (
+                    hasattr(mod, "__all__")
+                    or not name.startswith("_")
+                    and getattr(obj, "__module__", None) == mod.__name__
+                )
+            )(getattr(mod, name, None)),
+            getattr(mod, "__all__", None) or vars(mod),
+        )
+    )
 
 
-def argparse_ast(function_def, function_type=None, function_name=None):
+def argparse_ast(function_def, function_type=None, function_name=None, compact=False):
     """
     Converts an argparse AST to our IR
 
@@ -579,6 +866,9 @@ def argparse_ast(function_def, function_type=None, function_name=None):
     :param function_name: name of function_def
     :type function_name: ```str```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: a dictionary of form
         {  "name": Optional[str],
            "type": Optional[str],
@@ -586,7 +876,7 @@ def argparse_ast(function_def, function_type=None, function_name=None):
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :rtype: ```dict```
+    :rtype: ```Union[dict, IR]```
     """
     assert isinstance(
         function_def, FunctionDef
@@ -651,7 +941,7 @@ def argparse_ast(function_def, function_type=None, function_name=None):
     #         interpolate_defaults(intermediate_repr["returns"]["return_type"])
     #     )
 
-    return intermediate_repr
+    return compact_ir(intermediate_repr) if compact else intermediate_repr
 
 
 def docstring(
@@ -660,6 +950,7 @@ def docstring(
     return_tuple=False,
     emit_default_prop=True,
     emit_default_doc=True,
+    compact=False,
 ):
     """
     Converts a docstring to an AST
@@ -679,8 +970,11 @@ def docstring(
     :param emit_default_doc: Whether help/docstring should include 'With default' text
     :type emit_default_doc: ```bool```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: intermediate_repr, whether it returns or not
-    :rtype: ```Optional[Union[dict, Tuple[dict, bool]]]```
+    :rtype: ```Optional[Union[dict, IR, Tuple[Union[dict, IR], bool]]]```
     """
     assert isinstance(doc_string, str), "Expected 'str' got {!r}".format(
         type(doc_string).__name__
@@ -696,6 +990,9 @@ def docstring(
         )
     )
 
+    if compact:
+        parsed = compact_ir(parsed)
+
     if return_tuple:
         return parsed, (
             "returns" in parsed
@@ -706,15 +1003,18 @@ def docstring(
     return parsed
 
 
-def json_schema(json_schema_dict):
+def json_schema(json_schema_dict, compact=False):
     """
     Parse a JSON schema into the IR
 
     :param json_schema_dict: A valid JSON schema as a Python dict
     :type json_schema_dict: ```dict```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: IR representation of the given JSON schema
-    :rtype: ```dict```
+    :rtype: ```Union[dict, IR]```
     """
     # I suppose a JSON-schema validation routine could be executed here
     schema = deepcopy(json_schema_dict)
@@ -728,16 +1028,19 @@ def json_schema(json_schema_dict):
     ir["params"] = OrderedDict(
         map(_json_schema_property_to_param, schema["properties"].items())
     )
-    return ir
+    return compact_ir(ir) if compact else ir
 
 
-def sqlalchemy_table(call_or_name):
+def sqlalchemy_table(call_or_name, compact=False):
     """
     Parse out a `sqlalchemy.Table`, or a `name = sqlalchemy.Table`, into the IR
 
     :param call_or_name: The call to `sqlalchemy.Table` or an assignment followed by the call
     :type call_or_name: ```Union[AnnAssign, Assign, Call]```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: a dictionary of form
         {  "name": Optional[str],
            "type": Optional[str],
@@ -745,7 +1048,7 @@ def sqlalchemy_table(call_or_name):
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :rtype: ```dict```
+    :rtype: ```Union[dict, IR]```
     """
     if isinstance(call_or_name, Assign):
         name, call_or_name = call_or_name.targets[0].id, call_or_name.value
@@ -790,10 +1093,10 @@ def sqlalchemy_table(call_or_name):
             intermediate_repr["returns"]["return_type"]["doc"], emit_default_doc=False
         )[0]
 
-    return intermediate_repr
+    return compact_ir(intermediate_repr) if compact else intermediate_repr
 
 
-def sqlalchemy(class_def):
+def sqlalchemy(class_def, compact=False):
     """
     Parse out a `class C(Base): __tablename__=  'tbl'; dataset_name = Column(String, doc="p", primary_key=True)`,
         as constructed on an SQLalchemy declarative `Base`.
@@ -801,6 +1104,9 @@ def sqlalchemy(class_def):
     :param class_def: A class inheriting from declarative `Base`, where `Base = sqlalchemy.orm.declarative_base()`
     :type class_def: ```Union[ClassDef]```
 
+    :param compact: Whether to return the compact IR (`doctrans.ir.IR`) rather than the dict form
+    :type compact: ```bool```
+
     :returns: a dictionary of form
         {  "name": Optional[str],
            "type": Optional[str],
@@ -808,7 +1114,7 @@ def sqlalchemy(class_def):
            "params": OrderedDict[str, {'typ': str, 'doc': Optional[str], 'default': Any}]
            "returns": Optional[OrderedDict[Literal['return_type'],
                                            {'typ': str, 'doc': Optional[str], 'default': Any}),)]] }
-    :rtype: ```dict```
+    :rtype: ```Union[dict, IR]```
     """
     assert isinstance(class_def, ClassDef)
 
@@ -872,7 +1178,8 @@ def sqlalchemy(class_def):
             else [keyword(arg="comment", value=set_value(doc_string), identifier=None)],
             expr=None,
             expr_func=None,
-        )
+        ),
+        compact=compact,
     )
 
 
@@ -881,6 +1188,9 @@ __all__ = [
     "class_",
     "docstring",
     "function",
+    "module",
+    "objects",
+    "public_symbols",
     "sqlalchemy_table",
     "sqlalchemy",
 ]
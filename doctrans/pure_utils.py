@@ -562,6 +562,34 @@ def paren_wrap_code(code):
     )
 
 
+def unified_diff(filename, source, new_source):
+    """
+    Unified diff, as from `diff -u`, of the changes to the file
+
+    :param filename: Location of the file, for the diff's header
+    :type filename: ```str```
+
+    :param source: Current contents of the file
+    :type source: ```str```
+
+    :param new_source: New contents of the file
+    :type new_source: ```str```
+
+    :returns: The unified diff, empty if there are no changes
+    :rtype: ```str```
+    """
+    from difflib import unified_diff as _unified_diff
+
+    return "".join(
+        _unified_diff(
+            source.splitlines(True),
+            new_source.splitlines(True),
+            fromfile=filename,
+            tofile=filename,
+        )
+    )
+
+
 __all__ = [
     "BUILTIN_TYPES",
     "PY3_8",
@@ -587,6 +615,7 @@ __all__ = [
     "simple_types",
     "strip_split",
     "tab",
+    "unified_diff",
     "unquote",
     "update_d",
     "code_quoted",
@@ -3,10 +3,11 @@ Source transformer module. Uses astor on Python < 3.9
 """
 
 from ast import AsyncFunctionDef, ClassDef, FunctionDef, Module, get_docstring, parse
-from importlib import import_module
-from sys import version_info
+from itertools import chain
+from operator import attrgetter, itemgetter
 
-from doctrans.ast_utils import annotate_ancestry
+from doctrans.ast_utils import _unparser, annotate_ancestry
+from doctrans.formatter import formatter
 from doctrans.pure_utils import reindent, tab
 
 
@@ -20,12 +21,7 @@ def to_code(node):
     :returns: Python source
     :rtype: ```str```
     """
-
-    return (
-        getattr(import_module("astor"), "to_source")
-        if version_info[:2] < (3, 9)
-        else getattr(import_module("ast"), "unparse")
-    )(node)
+    return _unparser()(node)
 
 
 def ast_parse(
@@ -74,4 +70,87 @@ def ast_parse(
     return parsed_ast
 
 
-__all__ = ["ast_parse", "to_code"]
+def splice_source(replacements, source, skip_black=False):
+    """
+    Replace just the source text of each node—the whole lines it spans, decorators included—by the source of its
+     replacement; leaving the rest as written. Only the replacements are unparsed and formatted, so the cost is
+     proportional to them rather than to the source.
+
+    :param replacements: (node parsed from `source`, node to replace it with) pairs. Each node must start a line
+      and end one, which is unknown before Python 3.8.
+    :type replacements: ```Iterable[Tuple[AST, AST]]```
+
+    :param source: Python source, which the nodes were parsed from
+    :type source: ```str```
+
+    :param skip_black: Whether to skip formatting the replacements with black
+    :type skip_black: ```bool```
+
+    :raises ValueError: If any node can't be spliced: it has no position, shares a line with other code,
+      is indented, or overlaps another
+
+    :returns: The source with the replacements spliced in
+    :rtype: ```str```
+    """
+    lines = source.splitlines(True)
+    spans = sorted(
+        map(
+            lambda original_replacement: _splice_span(original_replacement[0], lines)
+            + (original_replacement[1],),
+            replacements,
+        ),
+        key=itemgetter(0),
+    )
+    if any(map(lambda span, next_span: span[1] >= next_span[0], spans, spans[1:])):
+        raise ValueError("Overlapping nodes can't be spliced")
+
+    out, line_no = [], 0
+    for start, end, replacement_node in spans:
+        out += lines[line_no:start]
+        out.append(
+            to_code(replacement_node)
+            if skip_black
+            else formatter.format(to_code(replacement_node))
+        )
+        line_no = end + 1
+    out += lines[line_no:]
+    return "".join(out)
+
+
+def _splice_span(node, lines):
+    """
+    :param node: AST node, parsed from `lines`
+    :type node: ```AST```
+
+    :param lines: Lines of the source, with their line endings
+    :type lines: ```List[str]```
+
+    :raises ValueError: If the node doesn't span whole lines (or its position is unknown)
+
+    :returns: Indices of the first and last line the node spans, decorators included
+    :rtype: ```Tuple[int, int]```
+    """
+    if (
+        getattr(node, "end_lineno", None) is None
+        or node.col_offset != 0
+        # Offsets are of UTF-8 bytes
+        or lines[node.end_lineno - 1].encode("utf8")[node.end_col_offset :].strip()
+    ):
+        raise ValueError(
+            "{} that is indented, shares a line, or lacks its position can't be spliced".format(
+                type(node).__name__
+            )
+        )
+    return (
+        min(
+            chain(
+                (node.lineno,),
+                map(attrgetter("lineno"), getattr(node, "decorator_list", ())),
+            )
+        )
+        - 1,
+        node.end_lineno - 1,
+    )
+
+
+__all__ = ["ast_parse", "splice_source", "to_code"]
@@ -3,18 +3,25 @@ Functionality to synchronise properties
 """
 
 import ast
+from collections import OrderedDict
+from copy import deepcopy
+from functools import reduce
+from hashlib import sha256
 from os import path
 
 from doctrans import emit
-from doctrans.ast_utils import (
-    RewriteAtQuery,
-    annotate_ancestry,
-    find_in_ast,
-    it2literal,
-)
-from doctrans.pure_utils import strip_split
+from doctrans.ast_utils import LocationIndex, ast_hash, it2literal
+from doctrans.conformance import _read_manifest
+from doctrans.formatter import formatter
+from doctrans.pure_utils import strip_split, unified_diff
 from doctrans.source_transformer import ast_parse, to_code
 
+# Maximum number of evaluated input files to keep the namespaces of, for `input_eval`
+EVAL_CACHE_SIZE = 32
+
+# (real filename, digest of source) -> namespace, least recently used first
+_namespaces = OrderedDict()
+
 
 def sync_properties(
     input_eval,
@@ -23,9 +30,77 @@ def sync_properties(
     output_filename,
     output_params,
     output_param_wrap=None,
+    cache_dir=None,
+    check=False,
+    diff=False,
+):
+    """
+    Sync one property, inline to a file; or with `check` or `diff`, find what syncing would do
+
+    :param input_eval: Whether to evaluate the `param`, or just leave it
+    :type input_eval: ```bool```
+
+    :param input_filename: Filename to find `param` from
+    :type input_filename: ```str```
+
+    :param input_params: Locations within file of properties.
+       Can be top level like `['a']` for `a=5` or with the `.` syntax as in `output_params`.
+    :type input_params: ```List[str]```
+
+    :param output_filename: Filename that will be edited in place, the property within this file (to update)
+     is selected by `output_param`
+    :type output_filename: ```str```
+
+    :param output_params: Parameters to update. E.g., `['A.F']` for `class A: F = None`, `['f.g']` for `def f(g): pass`
+    :type output_params: ```List[str]```
+
+    :param output_param_wrap: Wrap all input_str params with this. E.g., `Optional[Union[{output_param}, str]]`
+    :param output_param_wrap: ```Optional[str]```
+
+    :param cache_dir: Directory to record emitted file hashes in, so that no-op syncs skip formatting and writing
+    :type cache_dir: ```Optional[str]```
+
+    :param check: Don't write, just find whether any property is out of sync; stopping at the first (unless `diff`)
+    :type check: ```bool```
+
+    :param diff: Don't write, print the unified diff of the output file instead
+    :type diff: ```bool```
+
+    :returns: With `check`, whether any property is out of sync. With just `diff`, whether the file would change.
+      Else None.
+    :rtype: ```Optional[bool]```
+    """
+    effect = sync_properties_effect(
+        input_eval=input_eval,
+        input_filename=input_filename,
+        input_params=input_params,
+        output_filename=output_filename,
+        output_params=output_params,
+        output_param_wrap=output_param_wrap,
+        cache_dir=cache_dir,
+        check=check,
+        diff=diff,
+    )
+    if check:
+        return any(effect.values())
+    elif diff:
+        return effect[output_filename]
+
+
+def sync_properties_effect(
+    input_eval,
+    input_filename,
+    input_params,
+    output_filename,
+    output_params,
+    output_param_wrap=None,
+    cache_dir=None,
+    check=False,
+    diff=False,
 ):
     """
-    Sync one property, inline to a file
+    Sync one property, inline to a file; or with `check` or `diff`, find what syncing would do.
+    Takes the same arguments as `sync_properties`, but returns the effect on the output file.
 
     :param input_eval: Whether to evaluate the `param`, or just leave it
     :type input_eval: ```bool```
@@ -46,26 +121,266 @@ def sync_properties(
 
     :param output_param_wrap: Wrap all input_str params with this. E.g., `Optional[Union[{output_param}, str]]`
     :param output_param_wrap: ```Optional[str]```
+
+    :param cache_dir: Directory to record emitted file hashes in, so that no-op syncs skip formatting and writing
+    :type cache_dir: ```Optional[str]```
+
+    :param check: Don't write, just find whether any property is out of sync; stopping at the first (unless `diff`)
+    :type check: ```bool```
+
+    :param diff: Don't write, print the unified diff of the output file instead
+    :type diff: ```bool```
+
+    :returns: The output filename and whether it was (or, with `check` or `diff`, would be) changed.
+      With `check`, whether any of its properties is out of sync.
+    :rtype: ```OrderedDict```
+    """
+    return _sync_groups(
+        (
+            {
+                "input_eval": input_eval,
+                "input_filename": input_filename,
+                "input_params": input_params,
+                "output_filename": output_filename,
+                "output_params": output_params,
+                "output_param_wrap": output_param_wrap,
+            },
+        ),
+        cache_dir=cache_dir,
+        check=check,
+        diff=diff,
+    )
+
+
+def load_properties_manifest(manifest_filename):
+    """
+    Load the groups of a properties manifest. A properties manifest is a JSON (or YAML, by extension) file of the form
+        {"groups": [{"input_filename": "a.py", "input_params": ["Foo.g.f"], "input_eval": false,
+                     "output_filename": "b.py", "output_params": ["f.h"], "output_param_wrap": null}, ...]}
+    Each group has the same keys as the `sync_properties` arguments; `input_eval` and `output_param_wrap` may be
+     omitted. Filenames are relative to the manifest.
+
+    :param manifest_filename: Location of the manifest
+    :type manifest_filename: ```str```
+
+    :returns: Each group, with the filenames resolved
+    :rtype: ```List[dict]```
+    """
+    manifest, resolve = _read_manifest(manifest_filename)
+    return list(
+        map(
+            lambda group: dict(
+                group,
+                input_eval=group.get("input_eval", False),
+                input_filename=resolve(group["input_filename"]),
+                output_filename=resolve(group["output_filename"]),
+                output_param_wrap=group.get("output_param_wrap"),
+            ),
+            manifest["groups"],
+        )
+    )
+
+
+def sync_properties_manifest(
+    manifest_filename, cache_dir=None, check=False, diff=False
+):
+    """
+    Sync every group of the properties manifest, in one process. Each input file is parsed—and, with `input_eval`,
+     evaluated—once; each output file is parsed once, and written once—if modified—after all its properties are
+     synced.
+
+    :param manifest_filename: Location of the manifest, see `load_properties_manifest`
+    :type manifest_filename: ```str```
+
+    :param cache_dir: Directory to record emitted file hashes in, so that no-op syncs skip formatting and writing
+    :type cache_dir: ```Optional[str]```
+
+    :param check: Don't write, just find whether any property is out of sync; stopping at the first (unless `diff`)
+    :type check: ```bool```
+
+    :param diff: Don't write, print the unified diff of each output file instead
+    :type diff: ```bool```
+
+    :returns: Output filenames and whether they were (or, with `check` or `diff`, would be) changed.
+      With `check`, whether any of their properties is out of sync.
+    :rtype: ```OrderedDict```
+    """
+    return _sync_groups(
+        load_properties_manifest(manifest_filename),
+        cache_dir=cache_dir,
+        check=check,
+        diff=diff,
+    )
+
+
+def _sync_groups(groups, cache_dir=None, check=False, diff=False):
+    """
+    Sync the properties of every group, parsing (and evaluating) each input file once, and parsing then writing
+     each output file once
+
+    :param groups: Arguments of `sync_properties`, without `cache_dir`, `check` and `diff`
+    :type groups: ```Iterable[dict]```
+
+    :param cache_dir: Directory to record emitted file hashes in, so that no-op syncs skip formatting and writing
+    :type cache_dir: ```Optional[str]```
+
+    :param check: Don't write, just find whether any property is out of sync; stopping at the first (unless `diff`)
+    :type check: ```bool```
+
+    :param diff: Don't write, print the unified diff of each output file instead
+    :type diff: ```bool```
+
+    :returns: Output filenames and whether they were (or, with `check` or `diff`, would be) changed.
+      With `check`, whether any of their properties is out of sync.
+    :rtype: ```OrderedDict```
+    """
+    inputs, outputs = {}, OrderedDict()
+    for group in groups:
+        if _sync_group(group, inputs, outputs, check=check, diff=diff) and not diff:
+            return OrderedDict(
+                map(
+                    lambda filename_output: (
+                        filename_output[0],
+                        filename_output[1]["out_of_sync"],
+                    ),
+                    outputs.items(),
+                )
+            )
+
+    hash_dir = None if cache_dir is None else path.join(cache_dir, "hashes")
+    effect = OrderedDict()
+    for filename, output in outputs.items():
+        if diff:
+            new_source = formatter.format(to_code(output["index"].root))
+            print(unified_diff(filename, output["source"], new_source), end="")
+            effect[filename] = (
+                output["out_of_sync"] if check else new_source != output["source"]
+            )
+        elif check:
+            effect[filename] = output["out_of_sync"]
+        else:
+            real_filename = path.realpath(path.expanduser(filename))
+            emit.file(
+                output["index"].root,
+                real_filename,
+                mode="wt",
+                skip_black=False,
+                hash_dir=hash_dir,
+            )
+            with open(real_filename, "rt") as f:
+                effect[filename] = f.read() != output["source"]
+    return effect
+
+
+def _input_file(inputs, filename):
+    """
+    :param inputs: filename -> input file, of every input file seen so far. Updated in place.
+    :type inputs: ```dict```
+
+    :param filename: Location of the input file
+    :type filename: ```str```
+
+    :returns: The input file's `source`, and location `index` of its AST; parsing it on first use
+    :rtype: ```dict```
+    """
+    if filename not in inputs:
+        with open(path.realpath(path.expanduser(filename)), "rt") as f:
+            source = f.read()
+        inputs[filename] = {
+            "source": source,
+            "index": LocationIndex(
+                ast_parse(source, filename=filename, skip_annotate=True)
+            ),
+        }
+    return inputs[filename]
+
+
+def _output_file(outputs, filename, check):
+    """
+    :param outputs: filename -> output file, of every output file seen so far. Updated in place.
+    :type outputs: ```OrderedDict```
+
+    :param filename: Location of the output file
+    :type filename: ```str```
+
+    :param check: Whether to keep the AST as parsed, to compare against
+    :type check: ```bool```
+
+    :returns: The output file's `source`, location `index` of its AST, the `original` index (with `check`,
+      to compare against), and whether it is `out_of_sync`; parsing the file on first use.
+    :rtype: ```dict```
+    """
+    if filename not in outputs:
+        with open(path.realpath(path.expanduser(filename)), "rt") as f:
+            source = f.read()
+        outputs[filename] = {
+            "source": source,
+            "index": LocationIndex(
+                ast_parse(source, filename=filename, skip_annotate=True)
+            ),
+            # Kept as parsed, to compare against
+            "original": LocationIndex(
+                ast_parse(source, filename=filename, skip_annotate=True)
+            )
+            if check
+            else None,
+            "out_of_sync": False,
+        }
+    return outputs[filename]
+
+
+def _sync_group(group, inputs, outputs, check, diff):
     """
-    with open(path.realpath(path.expanduser(input_filename)), "rt") as f:
-        input_ast = ast_parse(f.read(), filename=input_filename)
+    Sync the properties of one group, in memory
+
+    :param group: Arguments of `sync_properties`, without `cache_dir`, `check` and `diff`
+    :type group: ```dict```
+
+    :param inputs: filename -> input file (see `_input_file`). Updated in place.
+    :type inputs: ```dict```
+
+    :param outputs: filename -> output file (see `_output_file`). Updated in place.
+    :type outputs: ```OrderedDict```
 
-    with open(path.realpath(path.expanduser(output_filename)), "rt") as f:
-        output_ast = ast_parse(f.read(), filename=output_filename)
+    :param check: Whether to find if the output file is out of sync
+    :type check: ```bool```
 
-    assert len(input_params) == len(output_params)
-    for (input_param, output_param) in zip(input_params, output_params):
-        output_ast = sync_property(
+    :param diff: Whether to sync every property, rather than stopping—with `check`—at the first out of sync
+    :type diff: ```bool```
+
+    :returns: Whether—with `check`—the output file is out of sync
+    :rtype: ```bool```
+    """
+    input_eval, input_filename = group["input_eval"], group["input_filename"]
+    input_file = _input_file(inputs, input_filename)
+    output = _output_file(outputs, group["output_filename"], check)
+    assert len(group["input_params"]) == len(group["output_params"])
+    for (input_param, output_param) in zip(
+        group["input_params"], group["output_params"]
+    ):
+        sync_property(
             input_eval,
             input_param,
-            input_ast,
+            input_file["index"],
             input_filename,
             output_param,
-            output_param_wrap,
-            output_ast,
+            group.get("output_param_wrap"),
+            output["index"],
+            input_namespace=_cached_namespace(
+                input_filename, input_file["source"], input_file["index"].root
+            )
+            if input_eval
+            else None,
         )
-
-    emit.file(output_ast, output_filename, mode="wt", skip_black=False)
+        if check and not output["out_of_sync"]:
+            output["out_of_sync"] = _changed_at(
+                output["original"],
+                output["index"],
+                tuple(strip_split(output_param, "."))[:-1],
+            )
+            if output["out_of_sync"] and not diff:
+                break
+    return output["out_of_sync"]
 
 
 def sync_property(
@@ -76,6 +391,7 @@ def sync_property(
     output_param,
     output_param_wrap,
     output_ast,
+    input_namespace=None,
 ):
     """
     Sync a single property
@@ -84,11 +400,12 @@ def sync_property(
     :type input_eval: ```bool```
 
     :param input_param: Location within file of property.
-       Can be top level like `'a'` for `a=5` or with the `.` syntax as in `output_params`.
+       Can be top level like `'a'` for `a=5` or with the `.` syntax as in `output_params`; with `input_eval` the
+       `.` syntax resolves attributes of the evaluated value, e.g., `'A.F'` for `A.F`.
     :type input_param: ```List[str]```
 
-    :param input_ast: AST of the input file
-    :type input_ast: ```AST```
+    :param input_ast: AST of the input file, or its `LocationIndex` (to reuse over many properties)
+    :type input_ast: ```Union[AST, LocationIndex]```
 
     :param input_filename: Filename of the input (used in `eval`)
     :type input_filename: ```str```
@@ -99,22 +416,27 @@ def sync_property(
     :param output_param_wrap: Wrap all input_str params with this. E.g., `Optional[Union[{output_param}, str]]`
     :param output_param_wrap: ```Optional[str]```
 
-    :param output_ast: AST of the input file
-    :type output_ast: ```AST```
+    :param output_ast: AST of the output file, or its `LocationIndex` (to reuse over many properties).
+      Modified in-place.
+    :type output_ast: ```Union[AST, LocationIndex]```
+
+    :param input_namespace: Namespace of the evaluated input file (to reuse over many properties).
+      Evaluated from the input AST if None, and `input_eval`.
+    :type input_namespace: ```Optional[dict]```
 
     :returns: New AST derived from `output_ast`
     :rtype: ```AST```
     """
+    input_index, output_index = map(_location_index, (input_ast, output_ast))
     search = list(strip_split(output_param, "."))
     if input_eval:
-        if input_param.count(".") != 0:
-            raise NotImplementedError("Anything not on the top-level of the module")
-
-        local = {}
-        output = eval(compile(input_ast, filename=input_filename, mode="exec"), local)
-        assert output is None
+        if input_namespace is None:
+            input_namespace = _evaluate(input_index.root, input_filename)
+        input_names = tuple(strip_split(input_param, "."))
         replacement_node = ast.AnnAssign(
-            annotation=it2literal(local[input_param]),
+            annotation=it2literal(
+                reduce(getattr, input_names[1:], input_namespace[input_names[0]])
+            ),
             simple=1,
             target=ast.Name(
                 # input_param
@@ -127,9 +449,11 @@ def sync_property(
             expr_target=None,
         )
     else:
-        assert isinstance(input_ast, ast.Module)
-        annotate_ancestry(input_ast)
-        replacement_node = find_in_ast(list(strip_split(input_param, ".")), input_ast)
+        assert isinstance(input_index.root, ast.Module)
+        # Copied, as the input may be synced to many outputs, and is modified by `output_param_wrap`
+        replacement_node = deepcopy(
+            input_index.get(list(strip_split(input_param, ".")))
+        )
 
     assert replacement_node is not None
     if output_param_wrap is not None:
@@ -147,17 +471,96 @@ def sync_property(
         else:
             raise NotImplementedError(type(replacement_node).__name__)
 
-    rewrite_at_query = RewriteAtQuery(
-        search=search,
-        replacement_node=replacement_node,
+    assert output_index.replace(
+        search, replacement_node
+    ), "Failed to update with {!r}".format(to_code(replacement_node))
+    return output_index.root
+
+
+def _cached_namespace(filename, source, module):
+    """
+    Evaluate the input file, reusing the namespace of its last evaluation if its source is unchanged.
+    The namespace is shared between callers, so must not be modified.
+
+    :param filename: Filename of the input
+    :type filename: ```str```
+
+    :param source: Python source of the input file
+    :type source: ```str```
+
+    :param module: AST of the input file, parsed from `source`
+    :type module: ```Module```
+
+    :returns: Namespace of the evaluated module
+    :rtype: ```dict```
+    """
+    key = (
+        path.realpath(path.expanduser(filename)),
+        sha256(source.encode("utf8")).hexdigest(),
     )
+    namespace = _namespaces.get(key)
+    if namespace is None:
+        namespace = _namespaces[key] = _evaluate(module, filename)
+        while len(_namespaces) > EVAL_CACHE_SIZE:
+            _namespaces.popitem(last=False)
+    else:
+        _namespaces.move_to_end(key)
+    return namespace
 
-    gen_ast = rewrite_at_query.visit(output_ast)
 
-    assert rewrite_at_query.replaced is True, "Failed to update with {!r}".format(
-        to_code(replacement_node)
+def _evaluate(module, filename):
+    """
+    :param module: AST of the input file
+    :type module: ```Module```
+
+    :param filename: Filename of the input (used in `eval`)
+    :type filename: ```str```
+
+    :returns: Namespace of the evaluated module
+    :rtype: ```dict```
+    """
+    namespace = {}
+    output = eval(compile(module, filename=filename, mode="exec"), namespace)
+    assert output is None
+    return namespace
+
+
+def _changed_at(original_index, index, location):
+    """
+    :param original_index: Location index of the AST as parsed
+    :type original_index: ```LocationIndex```
+
+    :param index: Location index of the AST, as modified
+    :type index: ```LocationIndex```
+
+    :param location: Location within both, e.g., `('A',)` for `class A`
+    :type location: ```Tuple[str, ...]```
+
+    :returns: Whether the node at the location has changed
+    :rtype: ```bool```
+    """
+    # The modified AST may be modified further, by later properties, so its digests aren't memoized
+    return ast_hash(original_index.get(location)) != ast_hash(
+        index.get(location), memoize=False
     )
-    return gen_ast
 
 
-__all__ = ["sync_property", "sync_properties"]
+def _location_index(node):
+    """
+    :param node: AST node, or its `LocationIndex`
+    :type node: ```Union[AST, LocationIndex]```
+
+    :returns: Location index of the node
+    :rtype: ```LocationIndex```
+    """
+    return node if isinstance(node, LocationIndex) else LocationIndex(node)
+
+
+__all__ = [
+    "EVAL_CACHE_SIZE",
+    "load_properties_manifest",
+    "sync_properties",
+    "sync_properties_effect",
+    "sync_properties_manifest",
+    "sync_property",
+]
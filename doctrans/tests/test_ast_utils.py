@@ -33,10 +33,12 @@ from unittest import TestCase
 from meta.asttools import cmp_ast
 
 from doctrans.ast_utils import (
+    LocationIndex,
     NoneStr,
     RewriteAtQuery,
     _parse_default_from_ast,
     annotate_ancestry,
+    ast_hash,
     emit_ann_assign,
     emit_arg,
     find_ast_type,
@@ -46,15 +48,17 @@ from doctrans.ast_utils import (
     get_value,
     infer_type_and_default,
     maybe_type_comment,
+    names_used,
     param2argparse_param,
     param2ast,
     parse_to_scalar,
+    prune_unused_imports,
     set_arg,
     set_slice,
     set_value,
 )
 from doctrans.pure_utils import PY3_8, PY_GTE_3_8, tab
-from doctrans.source_transformer import ast_parse
+from doctrans.source_transformer import ast_parse, to_code
 from doctrans.tests.mocks.classes import class_ast, class_str
 from doctrans.tests.mocks.methods import (
     class_with_method_and_body_types_ast,
@@ -106,6 +110,31 @@ class TestAstUtils(TestCase):
         self.assertEqual(node.body[0]._location, ["dataset_name"])
         self.assertEqual(node.body[1]._location, ["epochs"])
 
+    def test_ast_hash(self) -> None:
+        """ Tests that the hash is of the structure alone: not the positions, formatting, or annotations """
+        node = ast_parse(class_str, skip_annotate=True).body[0]
+        reformatted = ast_parse(
+            "# A comment\n\n\n{}".format(class_str.replace(":\n", ":  # ...\n")),
+            skip_annotate=False,
+        ).body[0]
+        self.assertNotEqual(node.lineno, reformatted.lineno)
+        self.assertEqual(ast_hash(node), ast_hash(reformatted))
+        self.assertEqual(ast_hash(node), ast_hash(class_ast))
+
+        renamed = ast_parse(class_str, skip_annotate=True).body[0]
+        renamed.name = "Renamed"
+        self.assertNotEqual(ast_hash(renamed), ast_hash(class_ast))
+        self.assertNotEqual(ast_hash(ast.Constant(5)), ast_hash(ast.Constant("5")))
+        self.assertNotEqual(
+            ast_hash(ast.arg(arg="a", annotation=None)), ast_hash(ast.arg(arg="a"))
+        )
+
+        # Unmemoized, a node modified after being hashed is hashed anew
+        modified = ast_parse(class_str, skip_annotate=True).body[0]
+        self.assertEqual(ast_hash(modified, memoize=False), ast_hash(class_ast))
+        modified.body[1].target.id = "renamed"
+        self.assertNotEqual(ast_hash(modified, memoize=False), ast_hash(class_ast))
+
     def test_emit_ann_assign(self) -> None:
         """ Tests that AnnAssign is emitted from `emit_ann_assign` """
         self.assertIsInstance(class_ast.body[1], AnnAssign)
@@ -292,6 +321,35 @@ class TestAstUtils(TestCase):
             )
         )
 
+    def test_prune_unused_imports(self) -> None:
+        """ Tests that `prune_unused_imports` drops just the imported names which aren't used """
+        module = ast.parse(
+            "from __future__ import annotations\n"
+            "import os.path, sys as system\n"
+            "from collections import OrderedDict, deque\n"
+            "from typing import *\n"
+            "import json\n"
+            "a: OrderedDict = os.path.join(system.argv[0])\n"
+        )
+        self.assertSetEqual(names_used(module), {"a", "OrderedDict", "os", "system"})
+        original_names = list(map(lambda node: len(node.names), module.body[:-1]))
+        self.assertEqual(
+            "".join(
+                map(
+                    to_code,
+                    prune_unused_imports(module.body, names_used(module)),
+                )
+            ),
+            "from __future__ import annotations\n"
+            "import os.path, sys as system\n"
+            "from collections import OrderedDict\n"
+            "from typing import *\n"
+            "a: OrderedDict = os.path.join(system.argv[0])\n",
+        )
+        self.assertListEqual(
+            list(map(lambda node: len(node.names), module.body[:-1])), original_names
+        )
+
     def test_replace_in_ast_with_val(self) -> None:
         """
         Tests that `RewriteAtQuery` can actually replace a node at given location
@@ -352,6 +410,57 @@ class TestAstUtils(TestCase):
             ),
         )
 
+    def test_location_index(self) -> None:
+        """
+        Tests that `LocationIndex` finds, and replaces, the same nodes as `find_in_ast` and `RewriteAtQuery`
+        """
+        parsed_ast = ast_parse(class_with_method_and_body_types_str, skip_annotate=True)
+        index = LocationIndex(parsed_ast)
+        search = "C.function_name.dataset_name".split(".")
+        self.assertIs(index.get(["C"]), parsed_ast.body[0])
+        self.assertIs(index.get([]), parsed_ast)
+        self.assertIsNone(index.get(["John Galt"]))
+        self.assertIn(search, index)
+        run_ast_test(
+            self,
+            index.get(search),
+            set_arg(annotation=Name("str", Load()), arg="dataset_name"),
+        )
+
+        self.assertTrue(
+            index.replace(
+                search,
+                AnnAssign(
+                    annotation=Name("int", Load()),
+                    simple=1,
+                    target=Name("dataset_name", Store()),
+                    value=set_value(15),
+                    expr=None,
+                    expr_annotation=None,
+                    expr_target=None,
+                ),
+            )
+        )
+        self.assertFalse(index.replace(["John Galt"], parsed_ast))
+        run_ast_test(
+            self,
+            parsed_ast,
+            ast.parse(
+                class_with_method_and_body_types_str.replace(
+                    'dataset_name: str = "mnist"', "dataset_name: int = 15"
+                )
+            ),
+        )
+
+        # Replacing a node reindexes within it, by its new name
+        index.replace(["C"], ast.parse("class D:\n    a = 5").body[0])
+        self.assertIsNone(index.get(search))
+        self.assertIsNone(index.get(["C"]))
+        self.assertEqual(get_value(index.get(["D", "a"]).value), 5)
+        index.append(ast.parse("b = c = 6").body[0])
+        self.assertIs(index.get(["b"]), index.get(["c"]))
+        self.assertIs(index.get(["c"]), parsed_ast.body[-1])
+
     def test_get_function_type(self) -> None:
         """ Test get_function_type returns the right type """
         self.assertEqual(
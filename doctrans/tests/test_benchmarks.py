@@ -0,0 +1,83 @@
+"""
+Tests which benchmark performance characteristics, e.g., how run time scales with input size
+"""
+
+from subprocess import check_output
+from sys import executable
+from timeit import repeat
+from unittest import TestCase
+
+from doctrans.docstring_parsers import _scan_phase_rest
+from doctrans.docstring_utils import ARG_TOKENS, RETURN_TOKENS
+from doctrans.tests.mocks.docstrings import docstring_str
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+def best_time(stmt, number=5, repetitions=5):
+    """
+    Best wall-clock time of running `stmt`, to reduce noise from other processes
+
+    :param stmt: Nullary function to time
+    :type stmt: ```Callable[[], Any]```
+
+    :param number: Number of executions per repetition
+    :type number: ```int```
+
+    :param repetitions: Number of repetitions to take the minimum of
+    :type repetitions: ```int```
+
+    :returns: Fastest time in seconds for `number` executions of `stmt`
+    :rtype: ```float```
+    """
+    return min(repeat(stmt, number=number, repeat=repetitions))
+
+
+class TestBenchmarks(TestCase):
+    """
+    Benchmarks, asserting loose bounds so that they are stable on loaded CI machines
+    """
+
+    def test_scan_phase_rest_scales_linearly(self) -> None:
+        """ Tests that scanning a ReST docstring 16x the size takes ~16x the time (not ~256x) """
+
+        def scan_time(repetitions):
+            """
+            :param repetitions: How many times to repeat `docstring_str` within the docstring
+            :type repetitions: ```int```
+
+            :returns: Best time to scan the docstring
+            :rtype: ```float```
+            """
+            docstring = docstring_str * repetitions
+            return best_time(
+                lambda: _scan_phase_rest(
+                    docstring,
+                    arg_tokens=ARG_TOKENS.rest,
+                    return_tokens=RETURN_TOKENS.rest,
+                )
+            )
+
+        small, large = scan_time(8), scan_time(8 * 16)
+        self.assertLess(large / small, 16 * 4)
+
+    def test_import_time(self) -> None:
+        """
+        Tests that importing doctrans, and its CLI, loads no heavy dependency
+        """
+        heavy = "black", "meta.asttools", "astor", "yaml"
+        self.assertEqual(
+            check_output(
+                (
+                    executable,
+                    "-c",
+                    "import doctrans, doctrans.__main__, sys;"
+                    "print(*sorted(frozenset({heavy!r}) & frozenset(sys.modules)))".format(
+                        heavy=heavy
+                    ),
+                )
+            ).strip(),
+            b"",
+        )
+
+
+unittest_main()
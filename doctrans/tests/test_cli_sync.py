@@ -107,6 +107,11 @@ class TestCliSync(TestCase):
                     "set_cli_args",
                     "--truth",
                     "function",
+                    "--cache-dir",
+                    tempdir,
+                    "--jobs",
+                    "2",
+                    "--watch",
                 ],
                 exit_code=None,
                 output=None,
@@ -120,6 +125,37 @@ class TestCliSync(TestCase):
             self.assertListEqual(args.class_names, ["ConfigClass"])
 
             self.assertEqual(args.truth, "function")
+            self.assertEqual(args.cache_dir, tempdir)
+            self.assertEqual(args.jobs, 2)
+            self.assertTrue(args.watch)
+
+    def test_watch_with_check_fails(self) -> None:
+        """ Tests that `--watch`, which writes, can't be used with `--check` """
+
+        with TemporaryDirectory() as tempdir:
+            class_filename = os.path.join(tempdir, "class_.py")
+            method_filename = os.path.join(tempdir, "method.py")
+            with open(class_filename, "wt") as f:
+                f.write(class_str)
+            with open(method_filename, "wt") as f:
+                f.write(class_with_method_types_str)
+
+            run_cli_test(
+                self,
+                [
+                    "sync",
+                    "--class",
+                    class_filename,
+                    "--function",
+                    method_filename,
+                    "--truth",
+                    "class",
+                    "--watch",
+                    "--check",
+                ],
+                exit_code=2,
+                output="--watch writes, so can't be used with --check or --diff\n",
+            )
 
     def test_non_existent_file_fails(self) -> None:
         """ Tests nonexistent file throws the right error """
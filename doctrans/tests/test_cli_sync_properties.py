@@ -78,14 +78,14 @@ class TestCliSyncProperties(TestCase):
             )
 
     def test_sync_properties(self) -> None:
-        """ Tests CLI interface gets all the way to the sync_properties call without error """
+        """ Tests CLI interface gets all the way to the sync_properties_effect call without error """
         with TemporaryDirectory() as tempdir:
             input_filename = os.path.join(tempdir, "class_.py")
             output_filename = os.path.join(tempdir, "method.py")
             open(input_filename, "wt").close()
             open(output_filename, "wt").close()
 
-            with patch("doctrans.__main__.sync_properties", mock_function):
+            with patch("doctrans.__main__.sync_properties_effect", mock_function):
                 self.assertTrue(
                     run_cli_test(
                         self,
@@ -105,5 +105,35 @@ class TestCliSyncProperties(TestCase):
                     ),
                 )
 
+    def test_sync_properties_check(self) -> None:
+        """ Tests that `--check` exits with status 1 when the property is out of sync """
+        with TemporaryDirectory() as tempdir:
+            input_filename = os.path.join(tempdir, "class_.py")
+            output_filename = os.path.join(tempdir, "method.py")
+            with open(input_filename, "wt") as f:
+                f.write("class Foo(object):\n    def g(f: int): pass\n")
+            with open(output_filename, "wt") as f:
+                f.write("def f(h: str): pass\n")
+
+            run_cli_test(
+                self,
+                [
+                    "sync_properties",
+                    "--input-file",
+                    input_filename,
+                    "--input-param",
+                    "Foo.g.f",
+                    "--output-file",
+                    output_filename,
+                    "--output-param",
+                    "f.h",
+                    "--check",
+                ],
+                exit_code=1,
+                output=None,
+            )
+            with open(output_filename, "rt") as f:
+                self.assertEqual(f.read(), "def f(h: str): pass\n")
+
 
 unittest_main()
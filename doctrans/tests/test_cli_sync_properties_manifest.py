@@ -0,0 +1,53 @@
+""" Tests for CLI sync_properties_manifest subparser (__main__.py) """
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from doctrans.tests.utils_for_tests import run_cli_test, unittest_main
+
+
+class TestCliSyncPropertiesManifest(TestCase):
+    """ Test class for __main__.py """
+
+    def test_args(self) -> None:
+        """ Tests CLI interface sets namespace correctly """
+        with TemporaryDirectory() as tempdir:
+            manifest = os.path.join(tempdir, "manifest.json")
+            with open(manifest, "wt") as f:
+                f.write('{"groups": []}')
+
+            _, args = run_cli_test(
+                self,
+                [
+                    "sync_properties_manifest",
+                    "--manifest",
+                    manifest,
+                    "--cache-dir",
+                    tempdir,
+                    "--check",
+                ],
+                exit_code=None,
+                output=None,
+                return_args=True,
+            )
+            self.assertEqual(args.manifest, manifest)
+            self.assertEqual(args.cache_dir, tempdir)
+            self.assertTrue(args.check)
+            self.assertFalse(args.diff)
+
+    def test_non_existent_manifest_fails(self) -> None:
+        """ Tests nonexistent manifest throws the right error """
+        with TemporaryDirectory() as tempdir:
+            manifest = os.path.join(tempdir, "manifest.json")
+            run_cli_test(
+                self,
+                ["sync_properties_manifest", "--manifest", manifest],
+                exit_code=2,
+                output="--manifest must be an existent file. Got: {!r}\n".format(
+                    manifest
+                ),
+            )
+
+
+unittest_main()
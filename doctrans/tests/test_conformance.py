@@ -1,12 +1,15 @@
 """
 Tests for reeducation
 """
+import json
 import os
 from argparse import Namespace
-from ast import FunctionDef
+from ast import ClassDef, FunctionDef
+from collections import OrderedDict
 from copy import deepcopy
 from functools import partial
 from io import StringIO
+from itertools import count
 from os import path
 from tempfile import TemporaryDirectory
 from unittest import TestCase
@@ -17,15 +20,19 @@ from doctrans.conformance import (
     _conform_filename,
     _get_name_from_namespace,
     ground_truth,
+    ground_truth_manifest,
+    watch,
 )
 from doctrans.tests.mocks.argparse import argparse_func_ast
-from doctrans.tests.mocks.classes import class_ast_no_default_doc
+from doctrans.tests.mocks.classes import class_ast, class_ast_no_default_doc
 from doctrans.tests.mocks.ir import intermediate_repr
 from doctrans.tests.mocks.methods import (
     class_with_method_ast,
     class_with_method_types_ast,
 )
-from doctrans.tests.utils_for_tests import unittest_main
+from doctrans.pure_utils import pluralise
+from doctrans.source_transformer import ast_parse
+from doctrans.tests.utils_for_tests import run_ast_test, unittest_main
 
 """
 # type: Final[bool]
@@ -59,6 +66,19 @@ class TestConformance(TestCase):
 
     def test_ground_truths(self) -> None:
         """ My truth is being tested. """
+        self.ground_truths_tester(jobs=1)
+
+    def test_ground_truths_parallel(self) -> None:
+        """ My truth is being tested, across processes. """
+        self.ground_truths_tester(jobs=2)
+
+    def ground_truths_tester(self, jobs):
+        """
+        Conform many files to the truth, checking what was modified
+
+        :param jobs: Number of processes to conform files with
+        :type jobs: ```int```
+        """
 
         with TemporaryDirectory() as tempdir:
             tempdir_join = partial(path.join, tempdir)
@@ -95,6 +115,7 @@ class TestConformance(TestCase):
                     "functions": (function,),
                     "function_names": ("C.function_name",),
                     "truth": "argparse_function",
+                    "jobs": jobs,
                 }
             )
             with patch("sys.stdout", new_callable=StringIO), patch(
@@ -156,12 +177,268 @@ class TestConformance(TestCase):
                 (("argparse.py", False), ("classes.py", True), ("methods.py", False)),
             )
 
+    def test_ground_truth_check(self) -> None:
+        """ Tests that `check` stops at the first file out of sync, and that `check` and `diff` don't write """
+        ir = deepcopy(intermediate_repr)
+        ir["returns"]["return_type"]["typ"] = "Tuple[np.ndarray, np.ndarray]"
+        _class_ast = emit.class_(ir, emit_default_doc=False)
+
+        with TemporaryDirectory() as tempdir:
+            class_filename = os.path.join(tempdir, "classes.py")
+            effect, _ = self.ground_truth_tester(
+                tempdir=tempdir, _class_ast=_class_ast, check=True
+            )
+            self.assertTupleEqual(
+                tuple(map(os.path.basename, effect.keys())),
+                ("argparse.py", "classes.py"),
+            )
+            self.assertTrue(effect[os.path.realpath(class_filename)])
+            with open(class_filename, "rt") as f:
+                class_source = f.read()
+
+            with patch("sys.stdout", new_callable=StringIO) as out:
+                self.assertTupleEqual(
+                    _conform_filename(
+                        filename=class_filename,
+                        search=["ConfigClass"],
+                        emit_func=emit.class_,
+                        replacement_node_ir=deepcopy(intermediate_repr),
+                        type_wanted=ClassDef,
+                        diff=True,
+                    ),
+                    (os.path.realpath(class_filename), True),
+                )
+            self.assertIn(
+                "\n--- {filename}\n+++ {filename}\n".format(
+                    filename=os.path.realpath(class_filename)
+                ),
+                out.getvalue(),
+            )
+            self.assertIn(
+                "\n-    return_type: Tuple[np.ndarray, np.ndarray] = (np.empty(0), np.empty(0))\n",
+                out.getvalue(),
+            )
+            with open(class_filename, "rt") as f:
+                self.assertEqual(f.read(), class_source)
+
+    def test_ground_truth_cached(self) -> None:
+        """
+        Tests that a cached truth gives the same results as a freshly parsed one,
+         and that once cached, conformed targets are skipped without parsing
+        """
+
+        with TemporaryDirectory() as tempdir:
+            cache_dir = os.path.join(tempdir, "cache")
+            for run in range(2):
+                with patch(
+                    "doctrans.conformance.ast_parse", wraps=ast_parse
+                ) as parse_calls:
+                    self.assertTupleEqual(
+                        tuple(
+                            map(
+                                lambda filename_unmodified: (
+                                    os.path.basename(filename_unmodified[0]),
+                                    filename_unmodified[1],
+                                ),
+                                self.ground_truth_tester(
+                                    tempdir=tempdir, cache_dir=cache_dir
+                                )[0].items(),
+                            )
+                        ),
+                        (
+                            ("argparse.py", False),
+                            ("classes.py", False),
+                            ("methods.py", False),
+                        ),
+                    )
+                self.assertEqual(parse_calls.called, run == 0)
+            self.assertIn("hashes", os.listdir(cache_dir))
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def test_watch(self) -> None:
+        """ Tests that watching conforms only the files affected by each change """
+
+        with TemporaryDirectory() as tempdir:
+            _, args = self.ground_truth_tester(tempdir=tempdir)
+            argparse_function, class_ = args.argparse_functions[0], args.classes[0]
+
+            def edit(iteration):
+                """
+                Edit the files between polls
+
+                :param iteration: Which poll this is
+                :type iteration: ```int```
+                """
+                if iteration == 0:
+                    emit.file(class_ast, class_, mode="wt")
+                elif iteration == 2:
+                    with open(argparse_function, "at") as f:
+                        f.write("\n\n_unrelated = 5\n")
+
+            iterations = count()
+            with patch(
+                "doctrans.conformance.sleep",
+                side_effect=lambda interval: edit(next(iterations)),
+            ), patch(
+                "doctrans.conformance._conform_filename", wraps=_conform_filename
+            ) as conform_filename, patch(
+                "sys.stdout", new_callable=StringIO
+            ):
+                effect = watch(args, argparse_function, interval=0, iterations=3)
+
+            self.assertListEqual(
+                list(
+                    map(
+                        lambda call: os.path.basename(call[1]["filename"]),
+                        conform_filename.call_args_list,
+                    )
+                ),
+                [
+                    "argparse.py",
+                    "classes.py",
+                    "methods.py",
+                    # the class was edited
+                    "classes.py",
+                    # the truth was edited, outside of the truth node
+                    "argparse.py",
+                ],
+            )
+            self.assertTrue(effect[os.path.realpath(class_)])
+
+    def test_watch_syntax_error(self) -> None:
+        """ Tests that a file saved mid-edit, failing to parse, is reported and doesn't stop the watcher """
+
+        with TemporaryDirectory() as tempdir:
+            _, args = self.ground_truth_tester(tempdir=tempdir)
+            argparse_function, class_ = args.argparse_functions[0], args.classes[0]
+
+            def edit(iteration):
+                """
+                Break the class, then fix it
+
+                :param iteration: Which poll this is
+                :type iteration: ```int```
+                """
+                if iteration == 0:
+                    with open(class_, "wt") as f:
+                        f.write("class ConfigClass(object:\n")
+                elif iteration == 1:
+                    emit.file(class_ast, class_, mode="wt")
+
+            iterations = count()
+            with patch(
+                "doctrans.conformance.sleep",
+                side_effect=lambda interval: edit(next(iterations)),
+            ), patch("sys.stdout", new_callable=StringIO), patch(
+                "sys.stderr", new_callable=StringIO
+            ) as e:
+                effect = watch(args, argparse_function, interval=0, iterations=2)
+
+            self.assertIn("SyntaxError", e.getvalue())
+            self.assertTrue(effect[os.path.realpath(class_)])
+
+    def test_ground_truth_manifest(self) -> None:
+        """
+        Tests that a manifest conforms as syncing its groups one after another would,
+         parsing and writing each file once
+        """
+        groups = [
+            {
+                "truth": "argparse_function",
+                "argparse_functions": ["argparse.py"],
+                "argparse_function_names": ["set_cli_args"],
+                "classes": ["classes.py"],
+                "class_names": ["ConfigClass"],
+                "functions": ["methods.py"],
+                "function_names": ["C.function_name"],
+            },
+            {
+                "truth": "class",
+                "classes": ["classes.py"],
+                "class_names": ["ConfigClass"],
+                "argparse_functions": ["argparse.py", "argparse_new.py"],
+                "argparse_function_names": ["set_cli_args"],
+                "functions": [],
+                "function_names": ["C.function_name"],
+            },
+        ]
+
+        def read_files(effect):
+            """
+            :param effect: Filenames and whether they were changed
+            :type effect: ```OrderedDict```
+
+            :returns: basename -> (whether it was changed, contents)
+            :rtype: ```dict```
+            """
+            files = {}
+            for filename, changed in effect.items():
+                with open(filename, "rt") as f:
+                    files[path.basename(filename)] = changed, f.read()
+            return files
+
+        with TemporaryDirectory() as tempdir, patch(
+            "sys.stdout", new_callable=StringIO
+        ):
+            self.ground_truth_tester(tempdir=tempdir)
+            sequential_effect = OrderedDict()
+            for group in groups:
+                args = Namespace(
+                    **{
+                        k: list(map(partial(path.join, tempdir), v))
+                        if k
+                        in frozenset(("argparse_functions", "classes", "functions"))
+                        else v
+                        for k, v in group.items()
+                    }
+                )
+                sequential_effect.update(
+                    ground_truth(args, getattr(args, pluralise(args.truth))[0])
+                )
+            sequential_files = read_files(sequential_effect)
+
+        with TemporaryDirectory() as tempdir, patch(
+            "sys.stdout", new_callable=StringIO
+        ):
+            self.ground_truth_tester(tempdir=tempdir)
+            manifest_filename = os.path.join(tempdir, "manifest.json")
+            with open(manifest_filename, "wt") as f:
+                json.dump({"groups": groups}, f)
+
+            with patch(
+                "doctrans.conformance.ast_parse", wraps=ast_parse
+            ) as ast_parse_mock, patch(
+                "doctrans.conformance.emit.file", wraps=emit.file
+            ) as emit_file_mock:
+                effect = ground_truth_manifest(manifest_filename)
+
+            self.assertListEqual(
+                sorted(
+                    map(
+                        lambda call: path.basename(call[1]["filename"]),
+                        ast_parse_mock.call_args_list,
+                    )
+                ),
+                ["argparse.py", "classes.py", "methods.py"],
+            )
+            self.assertListEqual(
+                list(
+                    map(
+                        lambda call: path.basename(call[0][1]),
+                        emit_file_mock.call_args_list,
+                    )
+                ),
+                ["argparse_new.py"],
+            )
+            self.assertDictEqual(read_files(effect), sequential_files)
+
     @staticmethod
     def ground_truth_tester(
         tempdir,
         _argparse_func_ast=argparse_func_ast,
         _class_ast=class_ast_no_default_doc,
         _class_with_method_ast=class_with_method_types_ast,
+        **extra_args
     ):
         """
         Helper for ground_truth tests
@@ -178,6 +455,9 @@ class TestConformance(TestCase):
         :param _class_with_method_ast: AST node
         :type _class_with_method_ast: ```ClassDef```
 
+        :param extra_args: Extra CLI arguments, e.g., `cache_dir`
+        :type extra_args: ```**extra_args```
+
         :returns: OrderedDict of filenames and whether they were changed, Args
         :rtype: ```Tuple[OrderedDict, Namespace]```
         """
@@ -199,7 +479,8 @@ class TestConformance(TestCase):
                 "functions": (function,),
                 "function_names": ("C.function_name",),
                 "truth": "argparse_function",
-            }
+            },
+            **extra_args
         )
 
         with patch("sys.stdout", new_callable=StringIO), patch(
@@ -283,5 +564,40 @@ class TestConformance(TestCase):
                     (argparse_function_filename, False),
                 )
 
+    def test__conform_filename_spliced(self) -> None:
+        """ Tests that _conform_filename replaces just the source of the changed class """
+
+        with TemporaryDirectory() as tempdir:
+            class_filename = os.path.realpath(os.path.join(tempdir, "classes.py"))
+            before, after = "x = [ 1,2 ]  # as written\n\n\n", "\n\ny = {  }\n"
+            with open(class_filename, "wt") as f:
+                f.write(
+                    "{before}@dataclass\nclass ConfigClass(object):\n    pass{after}".format(
+                        before=before, after=after
+                    )
+                )
+
+            with patch("sys.stdout", new_callable=StringIO):
+                self.assertTupleEqual(
+                    _conform_filename(
+                        filename=class_filename,
+                        search=["ConfigClass"],
+                        emit_func=emit.class_,
+                        replacement_node_ir=deepcopy(intermediate_repr),
+                        type_wanted=ClassDef,
+                    ),
+                    (class_filename, True),
+                )
+
+            with open(class_filename, "rt") as f:
+                src = f.read()
+            self.assertTrue(src.startswith(before))
+            self.assertTrue(src.endswith(after))
+            run_ast_test(
+                self,
+                ast_parse(src[len(before) : -len(after)], skip_annotate=True).body[0],
+                emit.class_(deepcopy(intermediate_repr), class_name="ConfigClass"),
+            )
+
 
 unittest_main()
@@ -0,0 +1,150 @@
+"""
+Tests for the JSON-RPC daemon
+"""
+
+import os
+from io import StringIO
+from json import dumps, loads
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from doctrans import emit
+from doctrans.daemon import (
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    Daemon,
+    serve_stdio,
+)
+from doctrans.tests.mocks.argparse import argparse_func_ast
+from doctrans.tests.mocks.classes import class_ast_no_default_doc
+from doctrans.tests.mocks.methods import class_with_method_ast
+from doctrans.tests.test_sync_properties import populate_files
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+class TestDaemon(TestCase):
+    """
+    Tests the daemon's requests and responses
+    """
+
+    def test_serve_stdio_sync(self) -> None:
+        """ Tests that `sync` requests are served, reusing the parsed truth """
+
+        with TemporaryDirectory() as tempdir:
+            argparse_filename = os.path.join(tempdir, "argparse.py")
+            class_filename = os.path.join(tempdir, "classes.py")
+            method_filename = os.path.join(tempdir, "methods.py")
+            emit.file(argparse_func_ast, argparse_filename, mode="wt")
+            emit.file(class_ast_no_default_doc, class_filename, mode="wt")
+            emit.file(class_with_method_ast, method_filename, mode="wt")
+
+            request = {
+                "jsonrpc": "2.0",
+                "method": "sync",
+                "params": [
+                    "--argparse-function",
+                    argparse_filename,
+                    "--argparse-function-name",
+                    "set_cli_args",
+                    "--class",
+                    class_filename,
+                    "--class-name",
+                    "ConfigClass",
+                    "--function",
+                    method_filename,
+                    "--function-name",
+                    "C.function_name",
+                    "--truth",
+                    "argparse_function",
+                ],
+            }
+            daemon, stdout = Daemon(), StringIO()
+            serve_stdio(
+                daemon,
+                stdin=StringIO(
+                    "{}\n\n{}\n".format(
+                        dumps(dict(id=0, **request)), dumps(dict(id=1, **request))
+                    )
+                ),
+                stdout=stdout,
+            )
+
+            responses = list(map(loads, stdout.getvalue().splitlines()))
+            self.assertListEqual(list(map(lambda res: res["id"], responses)), [0, 1])
+            for response in responses:
+                self.assertListEqual(
+                    response["result"]["effect"],
+                    [
+                        [os.path.realpath(argparse_filename), False],
+                        [os.path.realpath(class_filename), False],
+                        [os.path.realpath(method_filename), False],
+                    ],
+                )
+            self.assertEqual(len(daemon.ir_cache._entries), 1)
+
+    def test_sync_properties_check(self) -> None:
+        """ Tests that `sync_properties --check` reports drift as a result, not as an error """
+        daemon = Daemon()
+        with TemporaryDirectory() as tempdir:
+            input_filename, _, output_filename, output_str = populate_files(tempdir)
+
+            def request(output_param, *flags):
+                """
+                :param output_param: Parameter of the output file to sync
+                :type output_param: ```str```
+
+                :param flags: Flags of `sync_properties`, e.g., `--check`
+                :type flags: ```*str```
+
+                :returns: The result of the `sync_properties` request
+                :rtype: ```dict```
+                """
+                return daemon.handle(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 0,
+                        "method": "sync_properties",
+                        "params": [
+                            "--input-file",
+                            input_filename,
+                            "--input-param",
+                            "Foo.g.f",
+                            "--output-file",
+                            output_filename,
+                            "--output-param",
+                            output_param,
+                        ]
+                        + list(flags),
+                    }
+                )["result"]
+
+            result = request("f.h", "--check")
+            self.assertFalse(result["in_sync"])
+            self.assertListEqual(
+                result["effect"], [[os.path.realpath(output_filename), True]]
+            )
+            with open(output_filename, "rt") as f:
+                self.assertEqual(f.read(), output_str)
+
+            self.assertFalse(request("f.h")["in_sync"])
+            # Now `h` is `f`
+            self.assertTrue(request("f.f", "--check")["in_sync"])
+
+    def test_errors(self) -> None:
+        """ Tests that bad requests get JSON-RPC errors, not exceptions """
+        daemon = Daemon()
+        self.assertEqual(loads(daemon.handle_line("{"))["error"]["code"], PARSE_ERROR)
+        self.assertEqual(daemon.handle([])["error"]["code"], INVALID_REQUEST)
+        self.assertEqual(
+            daemon.handle({"id": 5, "method": "rm"})["error"]["code"],
+            METHOD_NOT_FOUND,
+        )
+        response = daemon.handle({"id": 6, "method": "sync", "params": ["--truth"]})
+        self.assertEqual(response["id"], 6)
+        self.assertEqual(response["error"]["code"], INVALID_PARAMS)
+        self.assertIn("--truth", response["error"]["data"])
+
+
+unittest_main()
@@ -5,6 +5,7 @@ import ast
 import os
 from ast import FunctionDef
 from copy import deepcopy
+from pickle import dumps
 from platform import system
 from tempfile import TemporaryDirectory
 from unittest import TestCase
@@ -213,6 +214,89 @@ class TestEmitters(TestCase):
                 if os.path.isfile(filename):
                     os.remove(filename)
 
+    def test_to_file_append_atomically(self) -> None:
+        """
+        Tests that `file` appends to existing content, keeps the file's mode, and leaves no temporary files
+        """
+
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "delete_me.py")
+            with open(filename, "wt") as f:
+                f.write("import foo\n")
+            os.chmod(filename, 0o640)
+
+            emit.file(class_ast, filename, mode="a", skip_black=True)
+
+            with open(filename, "rt") as f:
+                src = f.read()
+            self.assertTrue(src.startswith("import foo\n"))
+            self.assertTrue(
+                cmp_ast(ast.parse(src).body[1], class_ast),
+                "Appended AST doesn't match class AST",
+            )
+            self.assertEqual(os.stat(filename).st_mode & 0o777, 0o640)
+            self.assertListEqual(os.listdir(tempdir), ["delete_me.py"])
+
+    def test_to_file_through_symlink(self) -> None:
+        """
+        Tests that `file` writes to the target of a symlink, keeping the link
+        """
+
+        with TemporaryDirectory() as tempdir:
+            filename, link = (
+                os.path.join(tempdir, "delete_me.py"),
+                os.path.join(tempdir, "link.py"),
+            )
+            open(filename, "wt").close()
+            os.symlink(filename, link)
+
+            emit.file(class_ast, link, mode="wt", skip_black=True)
+
+            self.assertTrue(os.path.islink(link))
+            with open(filename, "rt") as f:
+                self.assertTrue(
+                    cmp_ast(ast.parse(f.read()).body[0], class_ast),
+                    "Written AST doesn't match class AST",
+                )
+            self.assertListEqual(
+                sorted(os.listdir(tempdir)), ["delete_me.py", "link.py"]
+            )
+
+    def test_splice(self) -> None:
+        """
+        Tests that `splice` replaces just the lines of each node, and refuses nodes that don't span whole lines
+        """
+
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "delete_me.py")
+            source = "a  =  5\n\ndef f(): pass\nb  =  6\nclass C: pass  # C\n"
+            with open(filename, "wt") as f:
+                f.write(source)
+            module = ast.parse(source)
+            replacement = ast.parse("def g(  ): return 5").body[0]
+
+            emit.splice(((module.body[1], replacement),), filename, source)
+            with open(filename, "rt") as f:
+                self.assertEqual(
+                    f.read(),
+                    source.replace("def f(): pass\n", "def g():\n    return 5\n"),
+                )
+
+            for node in module.body[1].body[0], module.body[3], ast.Pass():
+                self.assertRaises(
+                    ValueError,
+                    lambda: emit.splice(((node, replacement),), filename, source),
+                )
+            self.assertRaises(
+                ValueError,
+                lambda: emit.splice(
+                    ((module.body[0], replacement), (module.body[0], replacement)),
+                    filename,
+                    source,
+                ),
+            )
+            self.assertListEqual(os.listdir(tempdir), ["delete_me.py"])
+
     def test_to_function(self) -> None:
         """
         Tests whether `function` produces method from `class_with_method_types_ast` given `docstring_str`
@@ -481,5 +565,34 @@ class TestEmitters(TestCase):
             gold=config_decl_base_ast,
         )
 
+    def test_all_targets(self) -> None:
+        """
+        Tests that `emit.all_targets` emits what each `emit` function does, in the order of `targets`
+        """
+        before = dumps(intermediate_repr_no_default_sql_doc)
+        targets = emit.all_targets(
+            intermediate_repr_no_default_sql_doc,
+            targets=("json_schema", "sqlalchemy_table", "class_"),
+            sqlalchemy_table={"name": "config_tbl"},
+        )
+        self.assertEqual(dumps(intermediate_repr_no_default_sql_doc), before)
+        self.assertListEqual(
+            list(targets), ["json_schema", "sqlalchemy_table", "class_"]
+        )
+        self.assertDictEqual(
+            targets["json_schema"],
+            emit.json_schema(deepcopy(intermediate_repr_no_default_sql_doc)),
+        )
+        run_ast_test(self, targets["sqlalchemy_table"], gold=config_tbl_ast)
+        run_ast_test(
+            self,
+            targets["class_"],
+            gold=emit.class_(deepcopy(intermediate_repr_no_default_sql_doc)),
+        )
+        self.assertRaises(
+            ValueError,
+            lambda: emit.all_targets(intermediate_repr, targets=("protobuf",)),
+        )
+
 
 unittest_main()
@@ -0,0 +1,99 @@
+"""
+Tests for the record of emitted file hashes
+"""
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from doctrans import emit
+from doctrans.file_hashes import FileHashes, file_digest, source_digest
+from doctrans.tests.mocks.classes import class_ast
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+class TestFileHashes(TestCase):
+    """
+    Tests the per-destination hash records
+    """
+
+    def test_source_digest(self) -> None:
+        """ Tests that the digest changes with the source and the formatting """
+        self.assertEqual(source_digest("a = 5", False), source_digest("a = 5", False))
+        self.assertNotEqual(
+            source_digest("a = 5", False), source_digest("a = 6", False)
+        )
+        self.assertNotEqual(source_digest("a = 5", False), source_digest("a = 5", True))
+
+    def test_unchanged(self) -> None:
+        """ Tests that a record only matches until the source or the file changes """
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "a.py")
+            file_hashes = FileHashes(os.path.join(tempdir, "hashes"))
+            self.assertIsNone(file_digest(filename))
+            self.assertFalse(file_hashes.unchanged(filename, "digest"))
+
+            with open(filename, "wt") as f:
+                f.write("a = 5\n")
+            file_hashes.record(filename, "digest")
+            self.assertTrue(file_hashes.unchanged(filename, "digest"))
+            self.assertFalse(file_hashes.unchanged(filename, "other digest"))
+
+            with open(filename, "at") as f:
+                f.write("b = 6\n")
+            self.assertFalse(file_hashes.unchanged(filename, "digest"))
+
+    def test_targets(self) -> None:
+        """ Tests that targets are recorded alongside the file's record, and forgotten once the file changes """
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "a.py")
+            file_hashes = FileHashes(os.path.join(tempdir, "hashes"))
+            with open(filename, "wt") as f:
+                f.write("a = 5\n")
+            self.assertIsNone(file_hashes.target(filename, "class_:A"))
+
+            file_hashes.record_target(filename, "class_:A", {"hash": "0"})
+            file_hashes.record_target(filename, "class_:B", {"hash": "1"})
+            file_hashes.record(filename, "digest")
+            self.assertDictEqual(
+                file_hashes.target(filename, "class_:A"), {"hash": "0"}
+            )
+            self.assertDictEqual(
+                file_hashes.target(filename, "class_:B"), {"hash": "1"}
+            )
+            self.assertTrue(file_hashes.unchanged(filename, "digest"))
+
+            with open(filename, "at") as f:
+                f.write("b = 6\n")
+            self.assertIsNone(file_hashes.target(filename, "class_:A"))
+            file_hashes.record_target(filename, "class_:B", {"hash": "2"})
+            self.assertIsNone(file_hashes.target(filename, "class_:A"))
+            self.assertDictEqual(
+                file_hashes.target(filename, "class_:B"), {"hash": "2"}
+            )
+
+    def test_emit_file_skips_unchanged(self) -> None:
+        """ Tests that `emit.file` neither formats nor writes when emitting what it last emitted """
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "a.py")
+            hash_dir = os.path.join(tempdir, "hashes")
+            emit.file(class_ast, filename, mode="wt", hash_dir=hash_dir)
+            mtime_ns = os.stat(filename).st_mtime_ns
+
+            with patch("doctrans.emit.formatter.format") as format_, patch(
+                "doctrans.emit._write_atomically"
+            ) as write_atomically:
+                emit.file(class_ast, filename, mode="wt", hash_dir=hash_dir)
+            format_.assert_not_called()
+            write_atomically.assert_not_called()
+            self.assertEqual(os.stat(filename).st_mtime_ns, mtime_ns)
+
+            with open(filename, "at") as f:
+                f.write("b = 6\n")
+            emit.file(class_ast, filename, mode="wt", hash_dir=hash_dir)
+            with open(filename, "rt") as f:
+                self.assertNotIn("b = 6", f.read())
+
+
+unittest_main()
@@ -0,0 +1,50 @@
+"""
+Tests for the memoizing black formatter
+"""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from doctrans.formatter import Formatter, default_mode
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+class TestFormatter(TestCase):
+    """
+    Tests the formatting service
+    """
+
+    def test_format(self) -> None:
+        """ Tests that formatting is memoized by source and mode """
+        formatter = Formatter()
+        with patch(
+            "doctrans.formatter._format_str", side_effect=lambda src, mode: src.strip()
+        ) as format_str:
+            self.assertEqual(formatter.format(" a = 5 "), "a = 5")
+            self.assertEqual(formatter.format(" a = 5 "), "a = 5")
+            self.assertEqual(format_str.call_count, 1)
+
+            mode = default_mode()
+            mode.line_length = 80
+            formatter.format(" a = 5 ", mode=mode)
+            self.assertEqual(format_str.call_count, 2)
+
+    def test_format_evicts(self) -> None:
+        """ Tests that the least recently used results are evicted beyond `max_size` """
+        formatter = Formatter(max_size=2)
+        for src in "a = 5", "b = 6", "a = 5", "c = 7":
+            formatter.format(src)
+        self.assertEqual(len(formatter._cache), 2)
+        with patch("doctrans.formatter._format_str") as format_str:
+            formatter.format("a = 5")
+            format_str.assert_not_called()
+
+    def test_format_many(self) -> None:
+        """ Tests that batches come back in order, formatted as one-at-a-time would """
+        sources = ["a  =  5", "b=6", "a  =  5", "def f( ):\n  pass"]
+        expected = list(map(Formatter().format, sources))
+        self.assertListEqual(Formatter().format_many(sources), expected)
+        self.assertListEqual(Formatter().format_many(sources, jobs=2), expected)
+
+
+unittest_main()
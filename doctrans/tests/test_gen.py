@@ -25,8 +25,8 @@ from unittest import TestCase
 from unittest.mock import patch
 
 from doctrans import emit, parse
-from doctrans.ast_utils import maybe_type_comment, set_value
-from doctrans.gen import gen
+from doctrans.ast_utils import LocationIndex, maybe_type_comment, set_value
+from doctrans.gen import _gen_entry, _init_worker, gen
 from doctrans.pure_utils import rpartial
 from doctrans.source_transformer import to_code
 from doctrans.tests.mocks.methods import function_adder_ast
@@ -208,6 +208,38 @@ class TestGen(TestCase):
             gold=self.expected_class_ast,
         )
 
+    def test_gen_from_module(self) -> None:
+        """ Tests that `gen` from a module generates from its public classes and functions """
+
+        output_filenames = tuple(
+            map(
+                lambda input_mapping: os.path.join(
+                    self.tempdir,
+                    "test_gen_from_module_{}_output.py".format(input_mapping),
+                ),
+                ("input", "input_map"),
+            )
+        )
+        with patch("sys.stdout", new_callable=StringIO), patch(
+            "sys.stderr", new_callable=StringIO
+        ):
+            for input_mapping, output_filename in zip(
+                ("gen_test_module.input", "gen_test_module.input_map"), output_filenames
+            ):
+                gen(
+                    name_tpl="{name}Config",
+                    input_mapping=input_mapping,
+                    type_="class",
+                    output_filename=output_filename,
+                    emit_call=True,
+                    emit_default_doc=False,
+                )
+        gen_strs = []
+        for output_filename in output_filenames:
+            with open(output_filename, "rt") as f:
+                gen_strs.append(f.read())
+        self.assertEqual(*gen_strs)
+
     def test_gen_with_imports_from_file(self) -> None:
         """ Tests `gen` with `imports_from_file` """
 
@@ -306,6 +338,159 @@ class TestGen(TestCase):
             gold=gold,
         )
 
+    def test_gen_in_parallel(self) -> None:
+        """ Tests that `gen` with `jobs` generates the same module as without """
+
+        output_filenames = tuple(
+            map(
+                lambda jobs: os.path.join(
+                    self.tempdir, "test_gen_in_parallel_{}_output.py".format(jobs)
+                ),
+                (1, 2),
+            )
+        )
+        for jobs, output_filename in enumerate(output_filenames, 1):
+            with patch("sys.stdout", new_callable=StringIO) as stdout, patch(
+                "sys.stderr", new_callable=StringIO
+            ):
+                self.assertIsNone(
+                    gen(
+                        name_tpl="{name}Config",
+                        input_mapping="gen_test_module.input_map",
+                        imports_from_file="gen_test_module",
+                        type_="class",
+                        prepend=_import_gen_test_module_str,
+                        output_filename=output_filename,
+                        emit_call=True,
+                        emit_default_doc=False,
+                        jobs=jobs,
+                    )
+                )
+            self.assertEqual(stdout.getvalue(), "Generating: 'Foo'\n")
+
+        gen_asts = []
+        for output_filename in output_filenames:
+            with open(output_filename, "rt") as f:
+                gen_asts.append(ast.parse(f.read()))
+        run_ast_test(self, gen_ast=gen_asts[1], gold=gen_asts[0])
+
+    def test_gen_entry_parses_module_once(self) -> None:
+        """ Tests that each process of `gen` with `jobs` parses the input module once, however many entries it gets """
+
+        _init_worker("gen_test_module.input_map", _import_gen_test_module_str)
+        with patch.object(
+            LocationIndex,
+            "__init__",
+            autospec=True,
+            side_effect=LocationIndex.__init__,
+        ) as location_index_calls:
+            sources = list(
+                map(
+                    lambda _: _gen_entry(
+                        0,
+                        name_tpl="{name}Config",
+                        type_="class",
+                        emit_call=True,
+                        emit_default_doc=False,
+                        decorator_list=None,
+                    )[0],
+                    range(2),
+                )
+            )
+        self.assertEqual(*sources)
+        self.assertLessEqual(location_index_calls.call_count, 1)
+
+    def test_gen_unparses_once(self) -> None:
+        """ Tests that `gen` assembles the module as AST, unparsing it only once: when writing it """
+
+        output_filename = os.path.join(self.tempdir, "test_gen_unparses_once_output.py")
+        with patch("sys.stdout", new_callable=StringIO), patch(
+            "sys.stderr", new_callable=StringIO
+        ), patch("doctrans.emit.to_code", wraps=to_code) as emit_to_code, patch(
+            "doctrans.gen.to_code", wraps=to_code
+        ) as gen_to_code, patch(
+            "doctrans.gen.ast.parse", wraps=ast.parse
+        ) as gen_parse:
+            gen(
+                name_tpl="{name}Config",
+                input_mapping="gen_test_module.input_map",
+                imports_from_file="gen_test_module",
+                type_="class",
+                output_filename=output_filename,
+                emit_call=True,
+                emit_default_doc=False,
+            )
+        emit_to_code.assert_called_once()
+        gen_to_code.assert_not_called()
+        # The parsers parse sources of the input mapping, but the generated module is never parsed
+        self.assertFalse(
+            any(map(lambda call: "FooConfig" in call[0][0], gen_parse.call_args_list))
+        )
+
+    def test_gen_prune_imports(self) -> None:
+        """ Tests that `gen` with `prune_imports` drops the imports the generated module doesn't use """
+
+        for jobs in 1, 2:
+            output_filename = os.path.join(
+                self.tempdir, "test_gen_prune_imports_{}_output.py".format(jobs)
+            )
+            with patch("sys.stdout", new_callable=StringIO), patch(
+                "sys.stderr", new_callable=StringIO
+            ):
+                self.assertIsNone(
+                    gen(
+                        name_tpl="{name}Config",
+                        input_mapping="gen_test_module.input_map",
+                        imports_from_file="gen_test_module",
+                        type_="class",
+                        prepend="from __future__ import annotations\n{}".format(
+                            _import_gen_test_module_str
+                        ),
+                        output_filename=output_filename,
+                        emit_call=True,
+                        emit_default_doc=False,
+                        jobs=jobs,
+                        prune_imports=True,
+                    )
+                )
+            with open(output_filename, "rt") as f:
+                gen_ast = ast.parse(f.read())
+            run_ast_test(
+                self,
+                gen_ast=gen_ast,
+                gold=Module(
+                    body=[
+                        ImportFrom(
+                            module="__future__",
+                            names=[
+                                alias(
+                                    name="annotations",
+                                    asname=None,
+                                    identifier=None,
+                                    identifier_name=None,
+                                )
+                            ],
+                            level=0,
+                            identifier=None,
+                        ),
+                        self.expected_class_ast,
+                        Assign(
+                            targets=[Name("__all__", Store())],
+                            value=List(
+                                ctx=Load(),
+                                elts=[set_value("FooConfig")],
+                                expr=None,
+                            ),
+                            expr=None,
+                            lineno=None,
+                            **maybe_type_comment
+                        ),
+                    ],
+                    type_ignores=[],
+                    stmt=None,
+                ),
+            )
+
 
 # unittest_main()
 # mock_class = ClassDef(
@@ -0,0 +1,73 @@
+"""
+Tests for the memoized introspection
+"""
+
+import inspect
+import os
+from importlib.util import module_from_spec, spec_from_file_location
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from doctrans import parse
+from doctrans.introspect import getdoc, parse_source, signature
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+def import_file(filename):
+    """
+    Import the module from its file, without adding it to `sys.modules`
+
+    :param filename: Location of the module's file
+    :type filename: ```str```
+
+    :returns: The module
+    :rtype: ```ModuleType```
+    """
+    spec = spec_from_file_location(
+        os.path.splitext(os.path.basename(filename))[0], filename
+    )
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestIntrospect(TestCase):
+    """
+    Tests that introspection is looked up once per object, until its module's file changes
+    """
+
+    def test_memoized(self) -> None:
+        """ Tests that the source is read and parsed once, however many times the object is parsed """
+
+        def f(a: int = 5) -> int:
+            """The f"""
+            return a
+
+        with patch("inspect.getsource", wraps=inspect.getsource) as getsource_calls:
+            self.assertIs(parse_source(f), parse_source(f))
+            self.assertDictEqual(parse.function(f), parse.function(f))
+        getsource_calls.assert_called_once_with(f)
+        self.assertEqual(getdoc(f), "The f")
+        self.assertIs(signature(f), signature(f))
+
+    def test_module_file_changed(self) -> None:
+        """ Tests that the source is looked up anew once the module's file changes """
+
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "introspected.py")
+            with open(filename, "wt") as f:
+                f.write("class A(object):\n    a: int = 5\n")
+            module = import_file(filename)
+            with patch.dict("sys.modules", {module.__name__: module}):
+                parsed = parse_source(module.A)
+                self.assertIs(parse_source(module.A), parsed)
+
+                with open(filename, "wt") as f:
+                    f.write("class A(object):\n    b: int = 6\n")
+                stat = os.stat(filename)
+                os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+                self.assertEqual(parse_source(module.A).body[0].target.id, "b")
+
+
+unittest_main()
@@ -0,0 +1,145 @@
+"""
+Tests for the compact IR
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from copy import deepcopy
+from operator import setitem
+from pickle import dumps, loads
+from unittest import TestCase
+from unittest.mock import patch
+
+from doctrans import emit, parse
+from doctrans.ir import IR, Param, Returns, as_dict, compact
+from doctrans.tests.mocks.argparse import argparse_func_ast
+from doctrans.tests.mocks.classes import class_ast
+from doctrans.tests.mocks.ir import (
+    intermediate_repr,
+    intermediate_repr_no_default_doc,
+    intermediate_repr_no_default_sql_doc,
+)
+from doctrans.tests.mocks.json_schema import config_schema
+from doctrans.tests.mocks.methods import function_adder_ast
+from doctrans.tests.mocks.sqlalchemy import config_tbl_ast
+from doctrans.tests.utils_for_tests import run_ast_test, unittest_main
+
+
+class TestIR(TestCase):
+    """
+    Tests the compact IR and its dict-compatible view
+    """
+
+    def test_param(self) -> None:
+        """ Tests that absent keys stay absent, and that other keys are kept """
+        param = Param({"typ": "".join(("in", "t")), "doc": None}, nargs="*")
+        self.assertIs(param["typ"], "int")
+        self.assertDictEqual(param.to_dict(), {"typ": "int", "doc": None, "nargs": "*"})
+        self.assertNotIn("default", param)
+        self.assertRaises(KeyError, lambda: param["default"])
+        self.assertFalse(hasattr(param, "__dict__"))
+
+    def test_round_trip(self) -> None:
+        """ Tests that the compact IR reads as, and converts back to, the dict form """
+        ir = compact(intermediate_repr)
+        self.assertIsInstance(ir, IR)
+        self.assertIs(compact(ir), ir)
+        self.assertEqual(ir, intermediate_repr)
+        self.assertIsInstance(ir["params"], Mapping)
+        self.assertIs(ir["params"], ir["params"])
+        self.assertIs(ir.evolve(doc="")["params"], ir["params"])
+        self.assertRaises(TypeError, setitem, ir["params"], "dataset_name", None)
+        self.assertIsInstance(ir["returns"]["return_type"], Returns)
+        self.assertListEqual(list(ir["params"]), list(intermediate_repr["params"]))
+
+        ir_dict = as_dict(ir)
+        self.assertDictEqual(ir_dict, intermediate_repr)
+        self.assertIs(type(ir_dict["params"]["dataset_name"]), dict)
+        self.assertIs(as_dict(ir_dict), ir_dict)
+        self.assertEqual(loads(dumps(ir)), ir)
+        self.assertEqual(deepcopy(ir), ir)
+
+    def test_parsers(self) -> None:
+        """ Tests that the parsers produce the compact IR natively """
+        for ir, gold in (
+            (
+                parse.json_schema(config_schema, compact=True),
+                parse.json_schema(config_schema),
+            ),
+            (parse.class_(class_ast, compact=True), parse.class_(class_ast)),
+            (
+                parse.argparse_ast(argparse_func_ast, compact=True),
+                parse.argparse_ast(argparse_func_ast),
+            ),
+        ):
+            self.assertIsInstance(ir, IR)
+            self.assertDictEqual(as_dict(ir), gold)
+
+        with patch("doctrans.parse.compact_ir") as compact_ir:
+            self.assertIsInstance(parse.class_(class_ast, compact=True), IR)
+            self.assertIsInstance(
+                parse.function(
+                    function_adder_ast, function_type="static", compact=True
+                ),
+                IR,
+            )
+        compact_ir.assert_not_called()
+
+    def test_emit(self) -> None:
+        """ Tests that the `emit.*` functions take the compact IR, leaving it unchanged """
+        ir = parse.argparse_ast(argparse_func_ast, compact=True)
+        before = dumps(ir)
+        run_ast_test(
+            self,
+            gen_ast=emit.class_(ir, emit_default_doc=True),
+            gold=class_ast,
+        )
+        self.assertEqual(dumps(ir), before)
+        self.assertDictEqual(
+            emit.json_schema(compact(intermediate_repr_no_default_doc)),
+            config_schema,
+        )
+
+    def test_evolve(self) -> None:
+        """ Tests that the compact IR is immutable, and that `evolve` shares everything unchanged """
+        ir = compact(intermediate_repr)
+        with self.assertRaises(AttributeError):
+            ir.name = "foo"
+        with self.assertRaises(AttributeError):
+            del ir["params"]["dataset_name"].typ
+        with self.assertRaises(TypeError):
+            ir["params"]["dataset_name"]["typ"] = "int"
+
+        evolved = ir.evolve(
+            name="foo",
+            params=OrderedDict(
+                ir["params"],
+                K=ir["params"]["K"].evolve(typ="str"),
+            ),
+        )
+        self.assertEqual(evolved["name"], "foo")
+        self.assertEqual(evolved["params"]["K"]["typ"], "str")
+        self.assertEqual(ir["params"]["K"]["typ"], "Literal['np', 'tf']")
+        self.assertIs(evolved["params"]["dataset_name"], ir["params"]["dataset_name"])
+        self.assertIs(evolved["returns"]["return_type"], ir["returns"]["return_type"])
+        self.assertEqual(ir, intermediate_repr)
+
+    def test_emit_without_copies(self) -> None:
+        """ Tests that one IR can be emitted to every target, with none of them changing it """
+        for ir in intermediate_repr_no_default_sql_doc, compact(
+            intermediate_repr_no_default_sql_doc
+        ):
+            before = dumps(ir)
+            emit.class_(ir)
+            emit.argparse_function(ir, emit_default_doc=False)
+            emit.function(ir, function_name="f", function_type="static")
+            emit.docstring(ir)
+            emit.json_schema(ir)
+            emit.sqlalchemy(ir)
+            run_ast_test(
+                self, emit.sqlalchemy_table(ir, name="config_tbl"), gold=config_tbl_ast
+            )
+            self.assertEqual(dumps(ir), before)
+
+
+unittest_main()
@@ -0,0 +1,103 @@
+"""
+Tests for the on-disk IR cache
+"""
+
+import os
+from copy import deepcopy
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from doctrans.ir_cache import IRCache, MemoryIRCache, ir_cache_key
+from doctrans.tests.mocks.ir import intermediate_repr
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+class TestIRCache(TestCase):
+    """
+    Tests the content-addressed IR cache
+    """
+
+    def test_ir_cache_key(self) -> None:
+        """ Tests that the key changes with the source, location, parser, and options """
+        key = ir_cache_key("a = 5", ["a"], "class_", infer_type=False)
+        self.assertEqual(key, ir_cache_key("a = 5", ["a"], "class_", infer_type=False))
+        self.assertEqual(
+            len(
+                set(
+                    (
+                        key,
+                        ir_cache_key("a = 6", ["a"], "class_", infer_type=False),
+                        ir_cache_key("a = 5", ["b"], "class_", infer_type=False),
+                        ir_cache_key("a = 5", ["a"], "function", infer_type=False),
+                        ir_cache_key("a = 5", ["a"], "class_", infer_type=True),
+                    )
+                )
+            ),
+            5,
+        )
+
+    def test_get_set(self) -> None:
+        """ Tests that what is `set` can be `get` """
+        with TemporaryDirectory() as tempdir:
+            ir_cache = IRCache(tempdir)
+            self.assertIsNone(ir_cache.get("key"))
+            ir_cache.set("key", deepcopy(intermediate_repr))
+            self.assertDictEqual(ir_cache.get("key"), intermediate_repr)
+
+    def test_get_or_parse(self) -> None:
+        """ Tests that `get_or_parse` only parses on a cache miss """
+        parsed = []
+
+        def parse():
+            """
+            :returns: the IR, recording that parsing happened
+            :rtype: ```dict```
+            """
+            parsed.append(True)
+            return deepcopy(intermediate_repr)
+
+        with TemporaryDirectory() as tempdir:
+            for _ in range(3):
+                self.assertDictEqual(
+                    IRCache(tempdir).get_or_parse(
+                        "a = 5", ["a"], parse=parse, parse_name="class_"
+                    ),
+                    intermediate_repr,
+                )
+        self.assertListEqual(parsed, [True])
+
+    def test_evict(self) -> None:
+        """ Tests that the least recently used entries are evicted first """
+        with TemporaryDirectory() as tempdir:
+            ir_cache = IRCache(tempdir)
+            ir_cache.set("0", intermediate_repr)
+            entry_size = os.path.getsize(os.path.join(tempdir, "0.ir"))
+            ir_cache.max_size = entry_size * 2
+
+            ir_cache.set("1", intermediate_repr)
+            os.utime(os.path.join(tempdir, "0.ir"), ns=(0, 0))
+            os.utime(os.path.join(tempdir, "1.ir"), ns=(1, 1))
+            ir_cache.set("2", intermediate_repr)
+
+            self.assertIsNone(ir_cache.get("0"))
+            self.assertIsNotNone(ir_cache.get("1"))
+            self.assertIsNotNone(ir_cache.get("2"))
+
+    def test_memory_ir_cache(self) -> None:
+        """ Tests that the in-memory cache hands out its immutable IR uncopied, and evicts the least recently used """
+        ir_cache = MemoryIRCache(max_size=2)
+        self.assertIs(ir_cache.set("0", intermediate_repr), ir_cache.get("0"))
+        ir = ir_cache.get("0")
+        self.assertEqual(ir, intermediate_repr)
+        self.assertIs(ir_cache.get("0"), ir)
+        with self.assertRaises(TypeError):
+            ir["params"]["dataset_name"] = None
+
+        ir_cache.set("1", intermediate_repr)
+        ir_cache.get("0")
+        ir_cache.set("2", intermediate_repr)
+        self.assertIsNone(ir_cache.get("1"))
+        self.assertIsNotNone(ir_cache.get("0"))
+
+
+unittest_main()
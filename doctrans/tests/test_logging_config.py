@@ -0,0 +1,57 @@
+"""
+Tests for the logging configuration
+"""
+
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+
+import doctrans
+from doctrans.tests.utils_for_tests import unittest_main
+
+
+class TestLoggingConfig(TestCase):
+    """
+    Tests that logging is configured once, overridable from the environment or a dict
+    """
+
+    def test_default_matches_yaml(self) -> None:
+        """ Tests that the built-in default is the same as the YAML file shipped with the package """
+        with patch.dict(
+            os.environ,
+            {
+                doctrans.LOGGING_CONFIG_ENV: resource_filename(
+                    "doctrans", os.path.join("_data", "logging.yml")
+                )
+            },
+        ):
+            self.assertDictEqual(
+                doctrans.load_logging_config(), doctrans.DEFAULT_LOGGING_CONFIG
+            )
+
+    def test_load_from_env(self) -> None:
+        """ Tests that the environment variable overrides the default """
+        self.assertIs(doctrans.load_logging_config(), doctrans.DEFAULT_LOGGING_CONFIG)
+        with TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "logging.json")
+            with open(filename, "wt") as f:
+                json.dump({"version": 1}, f)
+            with patch.dict(os.environ, {doctrans.LOGGING_CONFIG_ENV: filename}):
+                self.assertDictEqual(doctrans.load_logging_config(), {"version": 1})
+
+    def test_get_logger_configures_once(self) -> None:
+        """ Tests that `get_logger` only configures logging when it hasn't been """
+        with patch("doctrans._dictConfig") as dict_config:
+            doctrans.get_logger("doctrans.foo")
+            doctrans.get_logger("doctrans.bar")
+            dict_config.assert_not_called()
+
+            doctrans.configure_logging({"version": 1})
+            dict_config.assert_called_once_with({"version": 1})
+
+
+unittest_main()
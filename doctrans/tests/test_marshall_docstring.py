@@ -11,7 +11,12 @@ import doctrans.emit
 import doctrans.emitter_utils
 from doctrans import parse
 from doctrans.ast_utils import set_value
-from doctrans.docstring_parsers import _set_name_and_type, parse_docstring
+from doctrans.docstring_parsers import (
+    _scan_phase_rest,
+    _set_name_and_type,
+    parse_docstring,
+)
+from doctrans.docstring_utils import ARG_TOKENS, RETURN_TOKENS
 from doctrans.emitter_utils import to_docstring
 from doctrans.tests.mocks.docstrings import (
     docstring_extra_colons_str,
@@ -319,5 +324,28 @@ class TestMarshallDocstring(TestCase):
             parse_docstring(docstring_header_and_return_str), _intermediate_repr
         )
 
+    def test_scan_phase_rest(self) -> None:
+        """ Tests that `_scan_phase_rest` splits just before every token """
+        self.assertListEqual(
+            _scan_phase_rest(
+                "Header\n:param a: An a\n:type a: ```int```\n:returns: b\n:rtype: ```int```",
+                arg_tokens=ARG_TOKENS.rest,
+                return_tokens=RETURN_TOKENS.rest,
+            ),
+            [
+                (False, "Header\n"),
+                (True, ":param a: An a\n"),
+                (True, ":type a: ```int```\n"),
+                (True, ":returns: b\n"),
+                (True, ":rtype: ```int```"),
+            ],
+        )
+        self.assertListEqual(
+            _scan_phase_rest(
+                "", arg_tokens=ARG_TOKENS.rest, return_tokens=RETURN_TOKENS.rest
+            ),
+            [],
+        )
+
 
 unittest_main()
@@ -4,7 +4,9 @@ Tests for the Intermediate Representation produced by the parsers
 import ast
 from ast import FunctionDef
 from collections import OrderedDict
+from inspect import getsource
 from unittest import TestCase
+from unittest.mock import patch
 
 from doctrans import emit, parse
 from doctrans.ast_utils import RewriteAtQuery, get_value
@@ -325,6 +327,39 @@ class TestParsers(TestCase):
             docstring_google_tf_adadelta_function_ir,
         )
 
+    def test_from_module_in_memory(self) -> None:
+        """
+        Tests that `parse.module` produces what `parse.class_` and `parse.function` do for each public class and
+         function, from one read of the module's source; which later calls reuse
+        """
+        module = inspectable_compile(
+            "{}\n\n{}\n\ndef _private():\n{tab}pass\n".format(
+                docstring_google_tf_adadelta_function_str, function_adder_str, tab=tab
+            )
+        )
+        self.assertTupleEqual(parse.public_symbols(module), ("Adadelta", "add_6_5"))
+
+        with patch("inspect.getsource", wraps=getsource) as getsource_calls:
+            irs = parse.module(module)
+            next(parse.objects((module.add_6_5,)))
+        getsource_calls.assert_called_once_with(module)
+
+        self.assertListEqual(list(irs), ["Adadelta", "add_6_5"])
+        run_ast_test(
+            self,
+            emit.class_(irs["Adadelta"]),
+            gold=emit.class_(parse.class_(module.Adadelta)),
+        )
+        function_irs = (
+            parse.module(module.__name__, names=("add_6_5",))["add_6_5"],
+            parse.function(module.add_6_5),
+        )
+        for ir in function_irs:
+            del ir["_internal"]  # Not needed for this test
+        self.assertDictEqual(*function_irs)
+        del irs["Adadelta"]["_internal"]
+        self.assertDictEqual(irs["Adadelta"], docstring_google_tf_adadelta_function_ir)
+
     def test_from_class_and_function(self) -> None:
         """
         Tests that the parser can combine the outer class docstring + structure
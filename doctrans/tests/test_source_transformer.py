@@ -5,6 +5,7 @@ from ast import ClassDef
 from unittest import TestCase
 from unittest.mock import patch
 
+from doctrans import ast_utils
 from doctrans.pure_utils import PY_GTE_3_9
 from doctrans.tests.utils_for_tests import unittest_main
 
@@ -16,7 +17,7 @@ class TestSourceTransformer(TestCase):
 
     def test_to_code(self) -> None:
         """
-        Tests to_source in Python 3.9 and < 3.9
+        Tests to_source in Python 3.9 and < 3.9. The unparser is resolved once, so is reset around each.
         """
         class_def = ClassDef(
             name="Classy",
@@ -28,7 +29,8 @@ class TestSourceTransformer(TestCase):
             expr=None,
         )
 
-        with patch("doctrans.source_transformer.version_info", (3, 9, 0)):
+        ast_utils._unparser.cache_clear()
+        with patch.object(ast_utils, "version_info", (3, 9, 0)):
             import doctrans.source_transformer
 
             self.assertEqual(
@@ -38,13 +40,15 @@ class TestSourceTransformer(TestCase):
                 AttributeError, lambda: doctrans.source_transformer.to_code(class_def)
             )
 
-        with patch("doctrans.source_transformer.version_info", (3, 8, 0)):
+        ast_utils._unparser.cache_clear()
+        with patch.object(ast_utils, "version_info", (3, 8, 0)):
             import doctrans.source_transformer
 
             self.assertEqual(
                 doctrans.source_transformer.to_code(class_def).rstrip("\n"),
                 "class Classy:",
             )
+        ast_utils._unparser.cache_clear()
 
 
 unittest_main()
@@ -1,15 +1,25 @@
 """ Tests for sync_properties """
 
 import ast
+import json
 import os
+from functools import partial
+from io import StringIO
 from sys import modules
 from tempfile import TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
 
 from pkg_resources import resource_filename
 
 from doctrans.pure_utils import PY_GTE_3_8, tab
-from doctrans.sync_properties import sync_properties
+from doctrans.source_transformer import ast_parse
+from doctrans.sync_properties import (
+    _evaluate,
+    sync_properties,
+    sync_properties_effect,
+    sync_properties_manifest,
+)
 from doctrans.tests.mocks.eval import get_modules
 from doctrans.tests.utils_for_tests import run_ast_test, unittest_main
 
@@ -85,6 +95,149 @@ class TestSyncProperties(TestCase):
                 ast.parse(output_str.replace("h: Literal['b']", "f: Literal['a']")),
             )
 
+    def test_sync_properties_check_and_diff(self) -> None:
+        """ Tests that `sync_properties` with `check` or `diff` finds what syncing would do, without writing """
+
+        with TemporaryDirectory() as tempdir:
+            (
+                input_filename,
+                input_str,
+                output_filename,
+                output_str,
+            ) = populate_files(tempdir)
+            kwargs = dict(
+                input_filename=input_filename,
+                input_params=("Foo.g.f",),
+                input_eval=False,
+                output_filename=output_filename,
+                output_params=("f.h",),
+            )
+
+            self.assertTrue(sync_properties(check=True, **kwargs))
+            with patch("sys.stdout", new_callable=StringIO) as out:
+                self.assertTrue(sync_properties(diff=True, **kwargs))
+            self.assertIn("\n+def f(f: Literal['a']):\n", out.getvalue())
+            with open(output_filename, "rt") as f:
+                self.assertEqual(f.read(), output_str)
+
+            self.assertIsNone(sync_properties(**kwargs))
+            # Now `h` is `f`
+            kwargs["output_params"] = ("f.f",)
+            self.assertFalse(sync_properties(check=True, **kwargs))
+
+    def test_sync_properties_effect(self) -> None:
+        """ Tests that `sync_properties_effect` maps the output file to whether it was (or would be) changed """
+
+        with TemporaryDirectory() as tempdir:
+            (
+                input_filename,
+                input_str,
+                output_filename,
+                output_str,
+            ) = populate_files(tempdir)
+            kwargs = dict(
+                input_filename=input_filename,
+                input_params=("Foo.g.f",),
+                input_eval=False,
+                output_filename=output_filename,
+                output_params=("f.h",),
+            )
+
+            self.assertDictEqual(
+                sync_properties_effect(check=True, **kwargs), {output_filename: True}
+            )
+            self.assertDictEqual(
+                sync_properties_effect(**kwargs), {output_filename: True}
+            )
+            kwargs["output_params"] = ("f.f",)
+            self.assertDictEqual(
+                sync_properties_effect(check=True, **kwargs), {output_filename: False}
+            )
+            self.assertDictEqual(
+                sync_properties_effect(**kwargs), {output_filename: False}
+            )
+
+    def test_sync_properties_manifest(self) -> None:
+        """
+        Tests that `sync_properties_manifest` syncs every group, parsing and evaluating each input once,
+         and parsing each output once
+        """
+
+        with TemporaryDirectory() as tempdir:
+            input_filename, _, output_filename, _ = populate_files(
+                tempdir,
+                output_str="from typing import Literal\n\n"
+                "def f(f: Literal['b']):\n"
+                "{tab}pass\n".format(tab=tab),
+            )
+            eval_filename, other_output_filename = map(
+                partial(os.path.join, tempdir), ("eval_.py", "other.py")
+            )
+            with open(eval_filename, "wt") as f:
+                f.write("get_modules = ('mocks',)\n")
+            with open(other_output_filename, "wt") as f:
+                f.write(
+                    "def f(f: Literal['b'], i: Literal['c']):\n{tab}pass\n".format(
+                        tab=tab
+                    )
+                )
+            manifest_filename = os.path.join(tempdir, "manifest.json")
+            with open(manifest_filename, "wt") as f:
+                json.dump(
+                    {
+                        "groups": [
+                            {
+                                "input_filename": "class_.py",
+                                "input_params": ["Foo.g.f"],
+                                "output_filename": "method.py",
+                                "output_params": ["f.f"],
+                            },
+                            {
+                                "input_filename": "class_.py",
+                                "input_params": ["Foo.g.f"],
+                                "output_filename": "other.py",
+                                "output_params": ["f.f"],
+                            },
+                            {
+                                "input_filename": "eval_.py",
+                                "input_params": ["get_modules", "get_modules"],
+                                "input_eval": True,
+                                "output_filename": "other.py",
+                                "output_params": ["f.i", "f.i"],
+                            },
+                        ]
+                    },
+                    f,
+                )
+
+            with patch(
+                "doctrans.sync_properties.ast_parse", wraps=ast_parse
+            ) as parse_calls, patch(
+                "doctrans.sync_properties._evaluate", wraps=_evaluate
+            ) as evaluate_calls:
+                effect = sync_properties_manifest(manifest_filename)
+            self.assertEqual(parse_calls.call_count, 4)
+            self.assertEqual(evaluate_calls.call_count, 1)
+            self.assertListEqual(
+                list(effect.items()),
+                [(output_filename, True), (other_output_filename, True)],
+            )
+            with open(other_output_filename, "rt") as f:
+                run_ast_test(
+                    self,
+                    gen_ast=ast.parse(f.read()),
+                    gold=ast.parse(
+                        "def f(f: Literal['a'], i: Literal['mocks']):\n{tab}pass".format(
+                            tab=tab
+                        )
+                    ),
+                )
+
+            self.assertListEqual(
+                list(sync_properties_manifest(manifest_filename, check=True).values()),
+                [False, False],
+            )
+
     def test_sync_properties_eval(self) -> None:
         """ Tests `sync_properties` with `call=True` """
 
@@ -352,25 +505,71 @@ class TestSyncProperties(TestCase):
                 ),
             )
 
-    def test_sync_properties_eval_fails(self) -> None:
-        """ Tests `sync_properties` fails with `call=True` and dots """
+    def test_sync_properties_eval_dotted(self) -> None:
+        """
+        Tests `sync_properties` with `call=True` resolves dotted params on the evaluated module,
+         evaluating it once for every param
+        """
         with TemporaryDirectory() as tempdir:
-            input_filename = os.path.join(tempdir, "input_.py")
-            output_filename = os.path.join(tempdir, "input_str.py")
+            input_filename, _, output_filename, _ = populate_files(
+                tempdir,
+                input_str="class Foo(object):\n"
+                "{tab}bar = ('a', 'b')\n\n"
+                "baz = ('c',)\n".format(tab=tab),
+                output_str="def f(h: str, i: str):\n{tab}pass\n".format(tab=tab),
+            )
 
-            open(input_filename, "wt").close()
-            open(output_filename, "wt").close()
+            with patch(
+                "doctrans.sync_properties._evaluate", wraps=_evaluate
+            ) as evaluate_calls:
+                self.assertIsNone(
+                    sync_properties(
+                        input_filename=input_filename,
+                        input_params=("Foo.bar", "baz"),
+                        input_eval=True,
+                        output_filename=output_filename,
+                        output_params=("f.h", "f.i"),
+                    )
+                )
+                self.assertFalse(
+                    sync_properties(
+                        input_filename=input_filename,
+                        input_params=("Foo.bar", "baz"),
+                        input_eval=True,
+                        output_filename=output_filename,
+                        output_params=("f.h", "f.i"),
+                        check=True,
+                    )
+                )
+            self.assertEqual(evaluate_calls.call_count, 1)
 
-            self.assertRaises(
-                NotImplementedError,
-                lambda: sync_properties(
-                    input_filename=input_filename,
-                    input_params=("foo.bar",),
-                    input_eval=True,
-                    output_filename=output_filename,
-                    output_params=("f.h",),
-                ),
-            )
+            with open(output_filename, "rt") as f:
+                run_ast_test(
+                    self,
+                    gen_ast=ast.parse(f.read()),
+                    gold=ast.parse(
+                        "def f(h: Literal['a', 'b'], i: Literal['c']):\n"
+                        "{tab}pass".format(tab=tab)
+                    ),
+                )
+
+            # Changed, so evaluated anew
+            with open(input_filename, "at") as f:
+                f.write("baz = ('d',)\n")
+            with patch(
+                "doctrans.sync_properties._evaluate", wraps=_evaluate
+            ) as evaluate_calls:
+                self.assertRaises(
+                    AttributeError,
+                    lambda: sync_properties(
+                        input_filename=input_filename,
+                        input_params=("Foo.qux",),
+                        input_eval=True,
+                        output_filename=output_filename,
+                        output_params=("f.h",),
+                    ),
+                )
+            self.assertEqual(evaluate_calls.call_count, 1)
 
     def test_eval(self) -> None:
         """ Ensure mock returns the right result """
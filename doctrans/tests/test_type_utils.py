@@ -0,0 +1,62 @@
+"""
+Tests for the type-expression layer
+"""
+
+from unittest import TestCase
+
+from doctrans.emitter_utils import typ2column, typ2json_schema
+from doctrans.tests.utils_for_tests import unittest_main
+from doctrans.type_utils import (
+    literal_values,
+    mentions_str,
+    parse_type,
+    unwrap_optional,
+)
+
+
+class TestTypeUtils(TestCase):
+    """
+    Tests the answers given about type strings, and that they're parsed once
+    """
+
+    def test_parse_type(self) -> None:
+        """ Tests that each distinct type string is parsed once, balancing an unclosed `[` """
+        parse_type.cache_clear()
+        self.assertIs(parse_type("List[int]"), parse_type("List[int]"))
+        self.assertEqual(parse_type.cache_info().misses, 1)
+        self.assertEqual(parse_type("Optional[List[int]").value.id, "Optional")
+
+    def test_mentions_str(self) -> None:
+        """ Tests whether `str` or string literals are found within the type """
+        self.assertTrue(mentions_str("str"))
+        self.assertTrue(mentions_str("Union[int, str]"))
+        self.assertTrue(mentions_str("Literal['a']"))
+        self.assertFalse(mentions_str("int"))
+        self.assertFalse(mentions_str("Literal[5]"))
+
+    def test_unwrap_optional(self) -> None:
+        """ Tests that the outer `Optional` is removed """
+        self.assertTupleEqual(unwrap_optional("Optional[int]"), ("int", True))
+        self.assertTupleEqual(unwrap_optional("int"), ("int", False))
+
+    def test_literal_values(self) -> None:
+        """ Tests that the values of a `Literal` are enumerated """
+        self.assertTupleEqual(literal_values("Literal['a', 'b']"), ("a", "b"))
+        self.assertTupleEqual(literal_values("Literal[-5]"), (-5,))
+        self.assertIsNone(literal_values("List[int]"))
+
+    def test_typ2json_schema(self) -> None:
+        """ Tests the JSON schema type of types """
+        self.assertTupleEqual(typ2json_schema("Optional[int]"), ("number", None, True))
+        self.assertTupleEqual(
+            typ2json_schema("Literal['a', 'b']"), ("string", ("a", "b"), False)
+        )
+
+    def test_typ2column(self) -> None:
+        """ Tests the SQLalchemy column type of types """
+        self.assertTupleEqual(typ2column("int"), ("Integer", None))
+        self.assertTupleEqual(typ2column("Literal['a']"), (None, ("a",)))
+        self.assertRaises(AssertionError, lambda: typ2column("List[Literal['a']]"))
+
+
+unittest_main()
@@ -0,0 +1,108 @@
+"""
+Type-expression layer: each distinct type string is parsed once, and questions about it answered from a cache
+"""
+
+import ast
+from ast import literal_eval
+from functools import lru_cache
+
+# Maximum number of distinct type strings to keep the answers of
+TYPE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def parse_type(typ):
+    """
+    Parse the type string into its AST, balancing an unclosed `[` (as acquired from PyTorch parsing).
+    The result is shared between callers, so must not be modified.
+
+    :param typ: The type, e.g., `Optional[Literal['a', 'b']]`
+    :type typ: ```str```
+
+    :returns: AST of the type expression
+    :rtype: ```ast.expr```
+    """
+    balanced = (typ.count("[") + typ.count("]")) & 1 == 0
+    return ast.parse(typ if balanced else "{}]".format(typ)).body[0].value
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def mentions_str(typ):
+    """
+    Whether the type is, or contains, `str` or a string literal
+
+    :param typ: The type
+    :type typ: ```str```
+
+    :returns: Whether values with this type need quoting
+    :rtype: ```bool```
+    """
+    parsed_typ_ast = parse_type(typ)
+    if isinstance(parsed_typ_ast, ast.Name):
+        return parsed_typ_ast.id == "str"
+
+    return any(
+        filter(
+            lambda node: isinstance(node, ast.Str)
+            or isinstance(node, ast.Constant)
+            and type(node.value).__name__ == "str"
+            or isinstance(node, ast.Name)
+            and node.id == "str",
+            ast.walk(parsed_typ_ast),
+        )
+    )
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def unwrap_optional(typ):
+    """
+    Remove the outer `Optional[…]` from the type
+
+    :param typ: The type, e.g., `Optional[int]`
+    :type typ: ```str```
+
+    :returns: The type within `Optional[…]` (or `typ` if not `Optional`), whether it was `Optional`
+    :rtype: ```Tuple[str, bool]```
+    """
+    return (
+        (typ[len("Optional[") : -1], True)
+        if typ.startswith("Optional[")
+        else (typ, False)
+    )
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def literal_values(typ):
+    """
+    Enumerate the values of a `Literal[…]` type
+
+    :param typ: The type, e.g., `Literal['a', 'b']`
+    :type typ: ```str```
+
+    :returns: The values of the `Literal`, or None if the type isn't a `Literal`
+    :rtype: ```Optional[tuple]```
+    """
+    parsed_typ = parse_type(typ)
+    if not (
+        isinstance(parsed_typ, ast.Subscript)
+        and isinstance(parsed_typ.value, ast.Name)
+        and parsed_typ.value.id == "Literal"
+    ):
+        return None
+    _slice = (
+        parsed_typ.slice.value
+        if isinstance(parsed_typ.slice, ast.Index)  # Python < 3.9
+        else parsed_typ.slice
+    )
+    return tuple(
+        map(literal_eval, _slice.elts if isinstance(_slice, ast.Tuple) else (_slice,))
+    )
+
+
+__all__ = [
+    "TYPE_CACHE_SIZE",
+    "literal_values",
+    "mentions_str",
+    "parse_type",
+    "unwrap_optional",
+]